@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from vector_index import VectorIndex, normalize_rows
+
+
+def _normalize(vectors):
+    return normalize_rows(np.array(vectors, dtype=np.float32, ndmin=2, copy=True))
+
+
+def spherical_kmeans(vectors, nlist, iterations=15, seed=0, chunk_size=65536):
+    """
+    Cluster unit vectors by cosine similarity; returns unit-length centroids.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _assign(vectors, centroids, chunk_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=nlist)
+        # Re-seed empty clusters with random points so every list gets used
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def _assign(vectors, centroids, chunk_size=65536):
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF-flat) approximate nearest-neighbour index over unit vectors.
+
+    Vectors are bucketed by their nearest of `nlist` k-means centroids. A query is
+    scored exactly against the vectors in its `nprobe` closest buckets only, so
+    raising `nprobe` trades latency for recall (nprobe == nlist is exact search).
+    Vectors can be added after training; rows are numbered in insertion order, which
+    is the order a search `mask` refers to. Added vectors are merged into their lists
+    under a lock by the next search, so concurrent searches never see a list half
+    merged; adding while searching is not supported.
+
+    `data_version` is the Firestore change marker version the vectors were read at,
+    or None for an index that may not match any published data (see covers()).
+    """
+
+    def __init__(self, centroids=None, nprobe=8, nlist=None, train_size=4096, data_version=None):
+        self.nprobe = nprobe
+        self.ids = []
+        self._nlist = nlist
+        self.train_size = train_size
+        self.data_version = data_version
+        self._consolidate_lock = threading.Lock()
+        # Until centroids exist, added vectors are staged and searched exhaustively
+        self._staged = []
+        self.centroids = None
+        if centroids is not None:
+            self._set_centroids(centroids)
+
+    def _set_centroids(self, centroids):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self._list_vectors = [np.zeros((0, self.dim), dtype=np.float32) for _ in range(self.nlist)]
+        self._list_rows = [np.zeros(0, dtype=np.int64) for _ in range(self.nlist)]
+        self._pending = [[] for _ in range(self.nlist)]
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    @classmethod
+    def train(cls, vectors, nlist=None, nprobe=8, sample_size=None, iterations=15, seed=0):
+        """
+        Learn centroids from (a sample of) the vectors. Defaults to about sqrt(n) lists.
+        """
+        vectors = _normalize(vectors)
+        nlist = nlist or max(1, int(np.sqrt(len(vectors))))
+        sample_size = sample_size or min(len(vectors), nlist * 64)
+        if sample_size < len(vectors):
+            sample = vectors[np.random.default_rng(seed).choice(len(vectors), sample_size, replace=False)]
+        else:
+            sample = vectors
+        return cls(spherical_kmeans(sample, nlist, iterations, seed), nprobe, nlist)
+
+    @classmethod
+    def build(cls, ids, vectors, nlist=None, nprobe=8, **train_params):
+        index = cls.train(vectors, nlist, nprobe, **train_params)
+        index.add(ids, vectors)
+        return index
+
+    @property
+    def nlist(self):
+        return self.centroids.shape[0] if self.trained else self._nlist
+
+    @property
+    def dim(self):
+        if self.trained:
+            return self.centroids.shape[1]
+        return self._staged[0].shape[1] if self._staged else None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        """
+        Insert vectors into their nearest lists; they are searchable immediately.
+
+        An index created without centroids stages what it is given and trains itself
+        once `train_size` vectors have arrived, so it can be filled incrementally.
+        """
+        vectors = _normalize(vectors)
+        if vectors.shape[0] != len(ids):
+            raise ValueError(f"Got {len(ids)} ids for {vectors.shape[0]} vectors")
+        first_row = len(self.ids)
+        self.ids.extend(str(college_id) for college_id in ids)
+        if not self.trained:
+            self._staged.append(vectors)
+            if len(self.ids) >= self.train_size:
+                self._train_staged()
+            return
+        self._insert(vectors, np.arange(first_row, first_row + len(vectors)))
+
+    def covers(self, ids, data_version):
+        """
+        Whether the index holds exactly these ids, as of the same data version.
+        """
+        return (self.data_version is not None and self.data_version == data_version
+                and len(ids) == len(self.ids) and set(map(str, ids)) == set(self.ids))
+
+    def reindexed(self, ids, vectors, data_version=None):
+        """
+        A copy holding exactly `vectors`, bucketed with this index's trained centroids,
+        so it can follow newer data without retraining.
+        """
+        if self.trained:
+            index = IVFIndex(self.centroids, self.nprobe, data_version=data_version)
+        else:
+            index = IVFIndex(nprobe=self.nprobe, nlist=self._nlist, train_size=self.train_size,
+                             data_version=data_version)
+        if len(ids):
+            index.add(ids, vectors)
+        index._consolidate()
+        return index
+
+    def _insert(self, vectors, rows):
+        assignments = _assign(vectors, self.centroids)
+        for list_no in np.unique(assignments):
+            members = assignments == list_no
+            self._pending[list_no].append((vectors[members], rows[members]))
+
+    def _train_staged(self, iterations=15, seed=0):
+        staged = np.concatenate(self._staged)
+        nlist = min(self._nlist or max(1, int(np.sqrt(len(staged)))), len(staged))
+        self._set_centroids(spherical_kmeans(staged, nlist, iterations, seed))
+        self._staged = []
+        self._insert(staged, np.arange(len(staged)))
+
+    def _consolidate(self):
+        if not self.trained:
+            return
+        with self._consolidate_lock:
+            for list_no, pending in enumerate(self._pending):
+                if not pending:
+                    continue
+                self._list_vectors[list_no] = np.concatenate([self._list_vectors[list_no]] + [v for v, _ in pending])
+                self._list_rows[list_no] = np.concatenate([self._list_rows[list_no]] + [r for _, r in pending])
+                self._pending[list_no] = []
+
+    def search(self, query_vector, k=5, mask=None, nprobe=None):
+        """
+        Return the approximate top-k (id, score) pairs, best first.
+        """
+        self._consolidate()
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        if not self.trained:
+            if not self._staged:
+                return []
+            return VectorIndex(self.ids, np.concatenate(self._staged), normalized=True, coarse_dim=0).search(
+                query, k, mask)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        scores, rows = [], []
+        for list_no in probes:
+            list_rows = self._list_rows[list_no]
+            list_vectors = self._list_vectors[list_no]
+            if mask is not None:
+                keep = mask[list_rows]
+                list_rows, list_vectors = list_rows[keep], list_vectors[keep]
+            if len(list_rows):
+                scores.append(list_vectors @ query)
+                rows.append(list_rows)
+        if not scores:
+            return []
+        scores, rows = np.concatenate(scores), np.concatenate(rows)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def save(self, path):
+        """
+        Write the index to a single .npz file (written to a temp file, then renamed).
+        """
+        self._consolidate()
+        params = {"nprobe": self.nprobe, "nlist": self._nlist, "train_size": self.train_size,
+                  "data_version": self.data_version}
+        if self.trained:
+            arrays = {
+                "centroids": self.centroids,
+                "list_sizes": np.array([len(rows) for rows in self._list_rows], dtype=np.int64),
+                "list_vectors": np.concatenate(self._list_vectors),
+                "list_rows": np.concatenate(self._list_rows),
+            }
+        else:
+            arrays = {"staged": np.concatenate(self._staged) if self._staged else np.zeros((0, 0), np.float32)}
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, ids=np.array(self.ids, dtype=str), params=np.array(json.dumps(params)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            params = json.loads(str(data["params"]))
+            index = cls(data["centroids"] if "centroids" in data else None, **params)
+            index.ids = data["ids"].tolist()
+            if not index.trained:
+                if len(data["staged"]):
+                    index._staged = [data["staged"]]
+                return index
+            bounds = np.concatenate([[0], np.cumsum(data["list_sizes"])])
+            vectors, rows = data["list_vectors"], data["list_rows"]
+            for list_no in range(index.nlist):
+                index._list_vectors[list_no] = vectors[bounds[list_no]:bounds[list_no + 1]]
+                index._list_rows[list_no] = rows[bounds[list_no]:bounds[list_no + 1]]
+        return index
+
+
+def build_vector_index(ids, vectors, kind="exact", **params):
+    """
+    Build the retriever's vector index: "exact" (VectorIndex) or "ivf" approximate search.
+    """
+    if kind == "exact":
+        return VectorIndex(ids, vectors)
+    if kind == "ivf":
+        return IVFIndex.build(ids, vectors, **params)
+    raise ValueError(f"Unknown vector index kind: {kind}")
@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import numpy as np
+
+from ann_index import IVFIndex
+from vector_index import VectorIndex
+
+
+def clustered_vectors(count, dim, clusters, spread, rng):
+    """
+    Synthetic embeddings: Gaussian blobs around random centres, like real text embeddings.
+    """
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centres[rng.integers(0, clusters, count)]
+    vectors += spread * rng.standard_normal((count, dim), dtype=np.float32)
+    return vectors
+
+
+def timed_search(index, queries, k, **params):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([college_id for college_id, _ in index.search(query, k=k, **params)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies), results
+
+
+def run_benchmark(count, dim, k, nlist, probes, query_count, clusters, spread, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = clustered_vectors(count, dim, clusters, spread, rng)
+    ids = [str(i) for i in range(count)]
+    queries = vectors[rng.choice(count, query_count, replace=False)]
+    queries += spread * rng.standard_normal(queries.shape, dtype=np.float32)
+
+    start = time.perf_counter()
+    exact = VectorIndex(ids, vectors, coarse_dim=0)
+    print(f"Vectors: {count}  dim: {dim}  k: {k}  queries: {query_count}")
+    print(f"Exact index built in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    ivf = IVFIndex.train(vectors, nlist=nlist)
+    train_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for offset in range(0, count, 1000):
+        ivf.add(ids[offset:offset + 1000], vectors[offset:offset + 1000])
+    ivf.search(queries[0], k=k)
+    add_s = time.perf_counter() - start
+    print(f"IVF index: {ivf.nlist} lists, trained in {train_s:.2f} s, "
+          f"{count / add_s:,.0f} vectors/s incremental insert")
+
+    exact_ms, truth = timed_search(exact, queries, k)
+    print(f"\n{'index':<16}{'recall@' + str(k):>10}{'p50 ms':>10}{'p95 ms':>10}{'speedup':>10}")
+    print(f"{'exact':<16}{1.0:>10.3f}{np.percentile(exact_ms, 50):>10.3f}"
+          f"{np.percentile(exact_ms, 95):>10.3f}{1.0:>10.1f}")
+    for nprobe in probes:
+        if nprobe > ivf.nlist:
+            continue
+        ivf_ms, found = timed_search(ivf, queries, k, nprobe=nprobe)
+        recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth)])
+        print(f"{'ivf nprobe=' + str(nprobe):<16}{recall:>10.3f}{np.percentile(ivf_ms, 50):>10.3f}"
+              f"{np.percentile(ivf_ms, 95):>10.3f}{np.median(exact_ms) / np.median(ivf_ms):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k versus latency of the IVF index against exact search.")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None, help="Default: sqrt(count).")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.0)
+    args = parser.parse_args()
+    run_benchmark(args.count, args.dim, args.k, args.nlist, args.nprobe, args.queries, args.clusters, args.spread)
@@ -0,0 +1,54 @@
+import argparse
+import json
+import time
+
+from bulk_writer import BulkWriter
+from memory_firestore import InMemoryFirestore
+
+
+def load_colleges(path, limit=None):
+    with open(path, 'r') as file:
+        colleges = json.load(file)
+    return colleges[:limit] if limit else colleges
+
+
+def time_per_document(colleges, latency):
+    db = InMemoryFirestore(latency=latency)
+    colleges_ref = db.collection('colleges')
+    start = time.perf_counter()
+    for college in colleges:
+        colleges_ref.document(str(college['id'])).set(college)
+    return time.perf_counter() - start, db
+
+
+def time_bulk_writer(colleges, latency, max_workers, failure_rate):
+    db = InMemoryFirestore(latency=latency, commit_failure_rate=failure_rate, seed=0)
+    colleges_ref = db.collection('colleges')
+    start = time.perf_counter()
+    with BulkWriter(db, max_workers=max_workers, backoff=latency) as writer:
+        for college in colleges:
+            writer.set(colleges_ref.document(str(college['id'])), college)
+    return time.perf_counter() - start, db, writer
+
+
+def run_benchmark(path, limit, latency, max_workers, failure_rate):
+    colleges = load_colleges(path, limit)
+    print(f"Colleges: {len(colleges)}  simulated RPC latency: {latency * 1000:.0f} ms")
+
+    elapsed, db = time_per_document(colleges, latency)
+    print(f"Per-document set(): {elapsed:.2f} s  {len(colleges) / elapsed:,.0f} docs/s  {db.rpcs} RPCs")
+
+    elapsed, db, writer = time_bulk_writer(colleges, latency, max_workers, failure_rate)
+    print(f"BulkWriter ({max_workers} workers): {elapsed:.2f} s  {len(colleges) / elapsed:,.0f} docs/s  "
+          f"{db.rpcs} RPCs  {writer.batches_committed} batches  {writer.retries} retries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-document and batched Firestore writes offline.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    run_benchmark(args.colleges, args.limit, args.latency_ms / 1000, args.workers, args.failure_rate)
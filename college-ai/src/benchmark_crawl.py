@@ -0,0 +1,40 @@
+import argparse
+import time
+import tracemalloc
+
+import fetch_colleges
+from fake_scorecard_api import FakeScorecardAPI
+from memory_firestore import InMemoryFirestore
+
+
+def run_crawl(workers, rate, api_url, manifest_path):
+    # Point the crawler at the fake API and give it a fresh token bucket
+    fetch_colleges.SCORECARD_API_URL = api_url
+    fetch_colleges.rate_limiter = fetch_colleges.TokenBucket(rate, fetch_colleges.REQUEST_BURST)
+    fetch_colleges.MANIFEST_PATH = manifest_path
+
+    db = InMemoryFirestore()
+    crawler = fetch_colleges.StateCrawler(max_workers=workers)
+    tracemalloc.start()
+    start = time.perf_counter()
+    changed = fetch_colleges.upload_to_firestore(crawler, db=db)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, changed, crawler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl a local fake College Scorecard API into InMemoryFirestore.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--fail-every", type=int, default=25)
+    parser.add_argument("--workers", default="1,8")
+    parser.add_argument("--rate", type=float, default=50.0, help="Requests per second allowed by the token bucket.")
+    args = parser.parse_args()
+
+    with FakeScorecardAPI(args.colleges, args.latency_ms / 1000, args.fail_every) as api:
+        for workers in (int(count) for count in args.workers.split(",")):
+            elapsed, peak, changed, crawler = run_crawl(workers, args.rate, api.url, manifest_path=None)
+            print(f"{workers} worker(s): {elapsed:.2f} s  {crawler.pages_fetched} pages  {changed} colleges  "
+                  f"peak {peak / 1e6:.1f} MB  failed states: {sorted(crawler.failures) or 'none'}")
@@ -0,0 +1,66 @@
+import argparse
+import time
+
+import numpy as np
+
+from college_facets import FACET_NAMES, FacetIndex, _bucket_codes, facet_labels
+from college_filters import CollegeColumns, parse_query
+from college_stream import iter_colleges
+
+SELECTIONS = [
+    ("no filters", "", None),
+    ("query filters", "schools in CA under $15k in-state tuition", None),
+    ("two states", "", {"state": ["CA", "OR"]}),
+    ("state + size + admission", "", {"state": ["NY"], "student_size": ["5k-15k", "15k-30k"],
+                                      "admission_rate": ["<10%", "10-25%"]}),
+    ("query + tuition band", "colleges with more than 1000 students", {"tuition_in_state": ["$10k-20k"]}),
+]
+
+
+def time_us(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def scan_counts(columns, selected, mask):
+    """
+    The same counts recomputed from the columns on every request, for comparison.
+    """
+    codes = {facet: _bucket_codes(columns, facet) for facet in FACET_NAMES}
+    selected = selected or {}
+    counts = {}
+    for facet in FACET_NAMES:
+        rows = np.ones(len(columns), dtype=bool) if mask is None else mask.copy()
+        for other, labels in selected.items():
+            if other != facet:
+                wanted = [facet_labels(other).index(label) for label in labels]
+                rows &= np.isin(codes[other], wanted)
+        counts[facet] = dict(zip(facet_labels(facet),
+                                 np.bincount(codes[facet][rows], minlength=len(facet_labels(facet))).tolist()))
+    return counts
+
+
+def run_benchmark(path, repeat):
+    colleges = [college for college in iter_colleges(path) if "id" in college]
+    columns = CollegeColumns.from_records(colleges)
+    build_us, facets = time_us(lambda: FacetIndex.from_columns(columns), 10)
+    print(f"Colleges: {len(colleges)}  facet buckets: {len(facets.bits)}  "
+          f"bitsets: {facets.bits.nbytes / 1024:.0f} KiB  build {build_us / 1000:.2f} ms")
+    print(f"\n{'selection':<28}{'matching':>9}{'bitsets us':>12}{'scan us':>10}")
+    for label, query, selected in SELECTIONS:
+        filters = parse_query(query) if query else None
+        mask = columns.mask(filters) if filters else None
+        bitset_us, counts = time_us(lambda: facets.counts(selected, mask), repeat)
+        scan_us, expected = time_us(lambda: scan_counts(columns, selected, mask), max(1, repeat // 10))
+        assert all(counts[facet] == expected[facet] for facet in FACET_NAMES), label
+        print(f"{label:<28}{counts['total']:>9}{bitset_us:>12.1f}{scan_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark precomputed facet counts for the filter UI.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    run_benchmark(args.colleges, args.repeat)
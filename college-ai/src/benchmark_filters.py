@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import numpy as np
+
+from college_filters import CollegeColumns, parse_query
+from college_stream import iter_colleges
+from vector_index import VectorIndex
+
+QUERIES = [
+    "public schools in CA under $15k in-state tuition with >50% admission rate",
+    "colleges in New York with fewer than 5,000 students",
+    "schools in Texas or Oklahoma with admission rate at least 30% and tuition under 30000",
+    "universities with more than 20000 students",
+]
+
+
+def time_ms(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def run_benchmark(path, dim, repeat, seed=0):
+    colleges = list(iter_colleges(path))
+    rng = np.random.default_rng(seed)
+    index = VectorIndex([str(college["id"]) for college in colleges],
+                        rng.standard_normal((len(colleges), dim), dtype=np.float32))
+    columns = CollegeColumns.from_records(colleges)
+    query_vector = rng.standard_normal(dim, dtype=np.float32)
+    print(f"Colleges: {len(colleges)}  dim: {dim}")
+
+    full_ms, _ = time_ms(lambda: index.search(query_vector, k=5), repeat)
+    print(f"Unfiltered search: {full_ms:.3f} ms")
+    for query in QUERIES:
+        parse_ms, filters = time_ms(lambda: parse_query(query), repeat)
+        mask_ms, mask = time_ms(lambda: columns.mask(filters), repeat)
+        search_ms, _ = time_ms(lambda: index.search(query_vector, k=5, mask=mask), repeat)
+        print(f"{query!r}\n    {filters}\n    {int(mask.sum())} rows match  parse {parse_ms:.3f} ms  "
+              f"filter {mask_ms:.3f} ms  filtered search {search_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark structured pre-filtering of college queries.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run_benchmark(args.colleges, args.dim, args.repeat)
@@ -0,0 +1,63 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmark_ann import clustered_vectors
+from embedding_codec import STORAGE_TYPES, encode_embedding
+from vector_index import VectorIndex
+
+# Firestore stores every number in a float list as an 8-byte double
+FIRESTORE_NUMBER_BYTES = 8
+
+
+def stored_bytes(fields):
+    if "embedding" in fields:
+        return len(fields["embedding"]) * FIRESTORE_NUMBER_BYTES
+    return len(fields["embedding_q"]) + FIRESTORE_NUMBER_BYTES
+
+
+def load_records(vectors, storage):
+    """
+    The college dicts a process holds after reading the collection, embeddings only.
+    """
+    return [dict(encode_embedding(vector, storage), id=row) for row, vector in enumerate(vectors)]
+
+
+def run_benchmark(count, dim, k, query_count, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = clustered_vectors(count, dim, clusters=max(1, count // 50), spread=1.0, rng=rng)
+    queries = vectors[rng.choice(count, query_count, replace=False)]
+    queries += rng.standard_normal(queries.shape, dtype=np.float32)
+    print(f"Vectors: {count}  dim: {dim}  queries: {query_count}")
+    print(f"\n{'storage':<10}{'doc bytes':>11}{'records MB':>12}{'load s':>9}{'speedup':>9}"
+          f"{'recall@' + str(k):>11}")
+
+    truth, baseline_s = None, None
+    for storage in STORAGE_TYPES:
+        tracemalloc.start()
+        records = load_records(vectors, storage)
+        records_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        index = VectorIndex.from_records(records)
+        load_s = time.perf_counter() - start
+        found = [{college_id for college_id, _ in index.search(query, k=k)} for query in queries]
+        if truth is None:
+            truth, baseline_s = found, load_s
+        recall = np.mean([len(a & b) / k for a, b in zip(found, truth)])
+        print(f"{storage:<10}{stored_bytes(records[0]):>11,}{records_mb:>12.1f}{load_s:>9.2f}"
+              f"{baseline_s / load_s:>9.1f}{recall:>11.4f}")
+        del records, index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall, memory and load time of quantized embeddings.")
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run_benchmark(args.count, args.dim, args.k, args.queries)
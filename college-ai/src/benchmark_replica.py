@@ -0,0 +1,91 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from college_filters import NUMERIC_FIELDS, parse_query
+from college_replica import CollegeReplica
+from college_stream import iter_colleges
+from memory_firestore import InMemoryFirestore
+from upload_to_firestore import upload_colleges
+
+FILTER_QUERY = "schools in CA under $15k in-state tuition"
+
+
+def percentiles(latencies_ms):
+    return np.percentile(latencies_ms, 50), np.percentile(latencies_ms, 95)
+
+
+def time_each(function, arguments):
+    latencies = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentiles(latencies)
+
+
+def timed_sync(replica, db):
+    db.reset_counters()
+    start = time.perf_counter()
+    fetched = replica.sync(db)
+    return fetched, (time.perf_counter() - start) * 1000, db.reads
+
+
+def firestore_find(db, filters):
+    query = db.collection("colleges")
+    for state in filters.states:
+        query = query.where("school.state", "==", state)
+    for column, op, value in filters.conditions:
+        query = query.where(NUMERIC_FIELDS[column], op, value)
+    return [doc.to_dict() for doc in query.stream()]
+
+
+def run_benchmark(path, latency_ms, lookups, changed, seed=0):
+    colleges = [college for college in iter_colleges(path) if "id" in college]
+    db = InMemoryFirestore()
+    upload_colleges(iter(colleges), db, manifest_path=None)
+    db.latency = latency_ms / 1000
+    print(f"Colleges: {len(colleges)}  simulated Firestore RPC latency: {latency_ms} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        replica = CollegeReplica(os.path.join(directory, "replica.sqlite3"))
+        fetched, elapsed, reads = timed_sync(replica, db)
+        print(f"\nFull sync:        {fetched:>6} docs  {elapsed:>8.1f} ms  {reads:>6} reads")
+        fetched, elapsed, reads = timed_sync(replica, db)
+        print(f"No-change sync:   {fetched:>6} docs  {elapsed:>8.1f} ms  {reads:>6} reads")
+
+        rng = random.Random(seed)
+        edited = [dict(college, **{"latest.student.size": (college.get("latest.student.size") or 0) + 1})
+                  for college in rng.sample(colleges, changed)]
+        upload_colleges(iter(edited), db, manifest_path=None)
+        fetched, elapsed, reads = timed_sync(replica, db)
+        print(f"Incremental sync: {fetched:>6} docs  {elapsed:>8.1f} ms  {reads:>6} reads")
+
+        ids = [str(college["id"]) for college in rng.choices(colleges, k=lookups)]
+        filters = parse_query(FILTER_QUERY)
+        print(f"\n{'read':<28}{'replica p50':>12}{'p95':>8}{'firestore p50':>15}{'p95':>8}  (ms)")
+        replica_ms = time_each(replica.get, ids)
+        firestore_ms = time_each(lambda college_id: db.collection("colleges").document(college_id).get(), ids)
+        print(f"{'get by id':<28}{replica_ms[0]:>12.3f}{replica_ms[1]:>8.3f}{firestore_ms[0]:>15.3f}"
+              f"{firestore_ms[1]:>8.3f}")
+        repeat = range(max(1, lookups // 20))
+        replica_ms = time_each(lambda _: replica.find(filters), repeat)
+        firestore_ms = time_each(lambda _: firestore_find(db, filters), repeat)
+        print(f"{'state + tuition filter':<28}{replica_ms[0]:>12.3f}{replica_ms[1]:>8.3f}{firestore_ms[0]:>15.3f}"
+              f"{firestore_ms[1]:>8.3f}")
+        print(f"  ({len(replica.find(filters))} matches for {FILTER_QUERY!r})")
+        replica.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replica read latency versus the in-memory Firestore stand-in.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Simulated Firestore RPC round trip.")
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--changed", type=int, default=25)
+    args = parser.parse_args()
+    run_benchmark(args.colleges, args.latency_ms, args.lookups, args.changed)
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from college_filters import CollegeColumns
+from college_snapshot import CollegeSnapshot, build_snapshot
+from vector_index import VectorIndex
+
+
+def write_source(path, colleges_path, dim, seed=0):
+    """
+    Write colleges.json with a random embedding attached to every college.
+    """
+    with open(colleges_path, 'r') as file:
+        colleges = json.load(file)
+    rng = np.random.default_rng(seed)
+    for college in colleges:
+        college["embedding"] = rng.standard_normal(dim).astype(np.float32).round(6).tolist()
+    with open(path, 'w') as file:
+        json.dump(colleges, file)
+    return colleges
+
+
+def measure(label, load):
+    # Time without tracing (tracemalloc slows allocation-heavy loads a lot), then trace memory
+    start = time.perf_counter()
+    load()
+    elapsed = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    result = load()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:>22}: {elapsed:8.1f} ms  private heap peak {peak / 1e6:7.1f} MB")
+    return result
+
+
+def load_from_json(path):
+    with open(path, 'r') as file:
+        colleges = json.load(file)
+    index = VectorIndex.from_records(colleges)
+    return index, CollegeColumns.from_records(colleges), colleges
+
+
+def load_from_snapshot(directory):
+    snapshot = CollegeSnapshot(directory)
+    return snapshot.vector_index(), snapshot.columns(), snapshot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare start-up cost of colleges.json and a mapped snapshot.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "colleges_with_embeddings.json")
+        colleges = write_source(source, args.colleges, args.dim)
+        snapshot_dir = os.path.join(tmp_dir, "snapshot")
+        start = time.perf_counter()
+        build_snapshot(colleges, snapshot_dir)
+        del colleges
+        print(f"Snapshot build: {(time.perf_counter() - start) * 1000:.0f} ms  "
+              f"source {os.path.getsize(source) / 1e6:.0f} MB")
+
+        measure("json.load + index", lambda: load_from_json(source))
+        index, columns, snapshot = measure("mmap snapshot", lambda: load_from_snapshot(snapshot_dir))
+
+        query = np.random.default_rng(1).standard_normal(args.dim, dtype=np.float32)
+        start = time.perf_counter()
+        hits = index.search(query, k=5)
+        print(f"First query on snapshot: {(time.perf_counter() - start) * 1000:.1f} ms  "
+              f"top hit {snapshot.records()[hits[0][0]]['school.name']}")
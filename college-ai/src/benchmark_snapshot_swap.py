@@ -0,0 +1,84 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from college_filters import parse_query
+from college_snapshot import VERSIONS_DIR, publish_snapshot
+from college_stream import iter_colleges
+from snapshot_manager import SnapshotManager
+
+QUERY = "schools in CA under $15k in-state tuition"
+# Think time between one reader's queries, so readers do not monopolize the GIL
+READER_PAUSE_SECONDS = 0.002
+
+
+def with_embeddings(colleges, dim, seed):
+    rng = np.random.default_rng(seed)
+    return [dict(college, embedding=rng.standard_normal(dim).tolist()) for college in colleges]
+
+
+def load(snapshot):
+    # The expensive part of a refresh, done before the swap: index, columns, facets
+    return {"version": snapshot.version, "index": snapshot.vector_index(), "columns": snapshot.columns(),
+            "facets": snapshot.facets()}
+
+
+def run_benchmark(path, dim, versions, readers):
+    colleges = [college for college in iter_colleges(path) if "id" in college]
+    query_vector = np.random.default_rng(0).standard_normal(dim).astype(np.float32)
+    with tempfile.TemporaryDirectory() as root:
+        publish_snapshot(with_embeddings(colleges, dim, 0), root)
+        manager = SnapshotManager(root, load)
+        print(f"Colleges: {len(colleges)}  dim: {dim}  readers: {readers}")
+
+        stop = threading.Event()
+        served = []
+
+        def reader():
+            while not stop.is_set():
+                with manager.acquire() as current:
+                    filter_mask = current["columns"].mask(parse_query(QUERY))
+                    current["index"].search(query_vector, k=5, mask=filter_mask)
+                    current["facets"].counts(mask=filter_mask)
+                    served.append(current["version"])
+                time.sleep(READER_PAUSE_SECONDS)
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+
+        print(f"\n{'version':<24}{'publish ms':>11}{'refresh ms':>11}{'swap us':>9}{'on disk':>9}{'queries':>9}")
+        for seed in range(1, versions + 1):
+            # Hold one query open on the outgoing version across the swap
+            with manager.acquire() as old:
+                start = time.perf_counter()
+                meta = publish_snapshot(with_embeddings(colleges, dim, seed), root)
+                publish_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                manager.refresh()
+                refresh_ms = (time.perf_counter() - start) * 1000
+                # The outgoing version stays usable while a query holds it
+                assert old["version"] in manager.in_use() and old["index"].search(query_vector, k=5)
+            while old["version"] in manager.in_use():
+                time.sleep(0.001)
+            on_disk = len(os.listdir(os.path.join(root, VERSIONS_DIR)))
+            print(f"{meta['version']:<24}{publish_ms:>11.1f}{refresh_ms:>11.1f}{manager.swap_seconds * 1e6:>9.1f}"
+                  f"{on_disk:>9}{len(served):>9}")
+        stop.set()
+        for thread in threads:
+            thread.join()
+        print(f"\nQueries served: {len(served)} across {len(set(served))} versions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish snapshot versions under concurrent queries.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--versions", type=int, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+    run_benchmark(args.colleges, args.dim, args.versions, args.readers)
@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from college_stream import iter_colleges
+
+
+def write_scaled_copy(source_path, dest_path, copies):
+    """
+    Write a JSON array holding `copies` copies of the source colleges, with fresh ids.
+    """
+    with open(source_path, 'r') as file:
+        colleges = json.load(file)
+    with open(dest_path, 'w') as file:
+        file.write("[\n")
+        for copy_number in range(copies):
+            for index, college in enumerate(colleges):
+                record = dict(college, id=copy_number * 10_000_000 + college.get("id", index))
+                separator = "" if copy_number == 0 and index == 0 else ",\n"
+                file.write(separator + json.dumps(record))
+        file.write("\n]\n")
+    return len(colleges) * copies
+
+
+def measure(label, load):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = load()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:>12}: {count} records  {elapsed:.2f} s  peak {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare peak memory of json.load and the streaming reader.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--scales", default="1,4,16")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for copies in (int(scale) for scale in args.scales.split(",")):
+            path = os.path.join(tmp_dir, f"colleges_x{copies}.json")
+            total = write_scaled_copy(args.colleges, path, copies)
+            print(f"x{copies} ({total} colleges, {os.path.getsize(path) / 1e6:.1f} MB on disk)")
+
+            def load_all():
+                with open(path, 'r') as file:
+                    return len(json.load(file))
+
+            measure("json.load", load_all)
+            measure("streaming", lambda: sum(1 for _ in iter_colleges(path)))
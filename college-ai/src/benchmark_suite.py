@@ -0,0 +1,368 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from ann_index import IVFIndex
+from bulk_writer import BulkWriter
+from college_filters import STATE_CODES, parse_query
+from college_retriever import CollegeRetriever
+from college_snapshot import CollegeSnapshot, build_snapshot
+from embedding_codec import encode_embedding
+from fake_embeddings import FakeEmbeddings
+from memory_firestore import InMemoryFirestore
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+RESULTS_FORMAT = 1
+
+_KINDS = ["University", "College", "State University", "Community College", "Institute of Technology",
+          "Technical College", "College of Art and Design", "Seminary"]
+_SYLLABLES = ["bra", "ton", "mel", "vik", "sor", "lan", "dre", "kas", "pol", "ner", "wil", "gan", "hur",
+              "mon", "tia", "rel", "os", "cam", "fer", "lin", "bro", "sta", "qui", "ver", "dal", "mar"]
+
+
+def pseudo_words(count, rng):
+    """
+    `count` distinct capitalized nonsense words ("Bravik", "Tolmarsor") of two to four
+    syllables, so at most about 470,000.
+    """
+    words = set()
+    while len(words) < count:
+        parts = rng.choice(_SYLLABLES, size=rng.integers(2, 5))
+        words.add("".join(parts).capitalize())
+    return sorted(words)
+
+
+def synthetic_colleges(count, seed=0, chunk_size=10_000):
+    """
+    Yield `count` college records shaped like the Scorecard documents, with realistic
+    value distributions (log-normal tuition and size, beta admission rates) and
+    two-word names drawn from a vocabulary that grows with the corpus.
+    """
+    rng = np.random.default_rng(seed)
+    names = pseudo_words(max(200, int(np.sqrt(count) * 4)), rng)
+    cities = pseudo_words(max(100, count // 40), rng)
+    state_weights = rng.dirichlet(np.ones(len(STATE_CODES)) * 2)
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        first, second = rng.integers(0, len(names), (2, size))
+        kinds = rng.integers(0, len(_KINDS), size)
+        city = rng.integers(0, len(cities), size)
+        state = rng.choice(len(STATE_CODES), size=size, p=state_weights)
+        tuition = np.round(rng.lognormal(9.6, 0.6, size))
+        out_of_state = np.round(tuition * rng.uniform(1.0, 2.5, size))
+        admission = np.round(rng.beta(5, 2, size), 4)
+        completion = np.round(rng.beta(4, 3, size), 4)
+        students = np.round(rng.lognormal(7.8, 1.3, size))
+        missing = rng.random((3, size)) < 0.08
+        for i in range(size):
+            yield {
+                "id": start + i + 1,
+                "school.name": f"{names[first[i]]} {names[second[i]]} {_KINDS[kinds[i]]}",
+                "school.city": cities[city[i]],
+                "school.state": STATE_CODES[state[i]],
+                "latest.cost.tuition.in_state": None if missing[0, i] else int(tuition[i]),
+                "latest.cost.tuition.out_of_state": None if missing[0, i] else int(out_of_state[i]),
+                "latest.admissions.admission_rate.overall": None if missing[1, i] else float(admission[i]),
+                "latest.completion.rate_suppressed.overall": float(completion[i]),
+                "latest.student.size": None if missing[2, i] else int(students[i]),
+            }
+
+
+def describe(college):
+    # Same text generate_embeddings.describe_college() embeds
+    return f"{college['school.name']} in {college['school.city']}, {college['school.state']}."
+
+
+def resident_mb():
+    """
+    Current resident set size in MB (Linux), or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            pages = int(file.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def measured(function):
+    """
+    Run `function`; return (result, seconds, MB of resident memory it retained).
+    """
+    gc.collect()
+    before = resident_mb()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    after = resident_mb()
+    return result, seconds, None if before is None else round(after - before, 1)
+
+
+def latency_summary(latencies_ms):
+    latencies = np.asarray(latencies_ms)
+    return {"p50": round(float(np.percentile(latencies, 50)), 4),
+            "p95": round(float(np.percentile(latencies, 95)), 4),
+            "p99": round(float(np.percentile(latencies, 99)), 4)}
+
+
+def timed_calls(function, arguments):
+    latencies, results = [], []
+    for argument in arguments:
+        start = time.perf_counter()
+        results.append(function(argument))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies), results
+
+
+def recall(found, truth):
+    scores = [len({hit for hit, _ in a} & {hit for hit, _ in b}) / len(b) for a, b in zip(found, truth) if b]
+    return round(float(np.mean(scores)), 4) if scores else None
+
+
+def target_recall(results, targets):
+    return round(float(np.mean([target in {hit for hit, _ in hits} for hits, target in zip(results, targets)])), 4)
+
+
+def load_firestore(db, count, embeddings, storage, seed):
+    """
+    Embed the synthetic colleges with the stand-in embeddings and bulk-write them,
+    embedding included, into the in-memory Firestore.
+    """
+    collection = db.collection("colleges")
+    with BulkWriter(db) as writer:
+        batch = []
+        for college in synthetic_colleges(count, seed):
+            batch.append(college)
+            if len(batch) == 1000:
+                _write_embedded(writer, collection, batch, embeddings, storage)
+                batch = []
+        if batch:
+            _write_embedded(writer, collection, batch, embeddings, storage)
+
+
+def _write_embedded(writer, collection, batch, embeddings, storage):
+    matrix = embeddings.embed_matrix([describe(college) for college in batch])
+    for college, vector in zip(batch, matrix):
+        writer.set(collection.document(str(college["id"])), dict(college, **encode_embedding(vector, storage)))
+
+
+def stream_firestore(db):
+    for doc in db.collection("colleges").stream():
+        yield dict(doc.to_dict(), id=doc.id)
+
+
+def make_queries(snapshot, count, rng):
+    """
+    Two query sets over random colleges: name queries ("Bravik Tolmar College Lanver"),
+    whose target college is known, and structured ones ("colleges in CA under $15k
+    tuition") that exercise the pre-filter.
+    """
+    rows = rng.choice(len(snapshot), size=count, replace=False)
+    names = snapshot.text_column("school.name")
+    cities = snapshot.text_column("school.city")
+    named, targets, filtered = [], [], []
+    for row in rows.tolist():
+        named.append(f"{names[row]} {cities[row]}")
+        targets.append(str(int(snapshot.ids[row])))
+        state = STATE_CODES[rng.integers(len(STATE_CODES))]
+        filtered.append(f"{' '.join(names[row].split()[:2])} colleges in {state} under "
+                        f"${int(rng.integers(10, 40))}k tuition")
+    return named, targets, filtered
+
+
+def throughput(search, queries, threads, seconds):
+    """
+    Queries per second with `threads` workers issuing `queries` in a loop for `seconds`.
+    """
+    deadline = time.perf_counter() + seconds
+
+    def worker(offset):
+        done = 0
+        while time.perf_counter() < deadline:
+            search(queries[(offset + done) % len(queries)])
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        done = sum(executor.map(worker, range(0, threads * 7, 7)))
+    return round(done / (time.perf_counter() - start), 1)
+
+
+def run_scale(count, args, directory):
+    print(f"\n== {count:,} colleges ==")
+    rng = np.random.default_rng(args.seed)
+    embeddings = FakeEmbeddings(dim=args.dim)
+    db = InMemoryFirestore()
+    _, load_s, load_mb = measured(lambda: load_firestore(db, count, embeddings, args.storage, args.seed))
+    print(f"embed + write to Firestore stand-in: {load_s:.1f} s")
+    snapshot_dir = os.path.join(directory, f"snapshot_{count}")
+    _, snapshot_s, _ = measured(lambda: build_snapshot(stream_firestore(db), snapshot_dir))
+    del db
+    gc.collect()
+    snapshot_mb = sum(entry.stat().st_size for entry in os.scandir(snapshot_dir)) / 2 ** 20
+    print(f"snapshot build: {snapshot_s:.1f} s, {snapshot_mb:.0f} MB on disk")
+
+    snapshot = CollegeSnapshot(snapshot_dir)
+    exact, exact_s, exact_mb = measured(lambda: CollegeRetriever.from_snapshot(snapshot, embeddings, k=args.k))
+    print(f"retriever (exact + BM25 + facets) build: {exact_s:.1f} s, +{exact_mb} MB")
+    ivf_index, ivf_s, ivf_mb = measured(lambda: IVFIndex.build(exact.index.ids, snapshot.embeddings,
+                                                               nprobe=args.nprobe))
+    print(f"IVF build: {ivf_s:.1f} s, +{ivf_mb} MB ({ivf_index.nlist} lists, nprobe {args.nprobe})")
+    # The IVF index keeps the snapshot's row order, so it shares columns and BM25 with `exact`
+    ivf = CollegeRetriever(index=ivf_index, columns=exact.columns, embeddings=embeddings, colleges=exact.colleges,
+                           base_mask=exact.base_mask, lexical=exact.lexical, facets=exact.facets,
+                           data_version=exact.data_version, k=args.k)
+
+    named, targets, filtered = make_queries(snapshot, args.queries, rng)
+    vectors = [np.asarray(embeddings.embed_query(query), dtype=np.float32) for query in named]
+    masks = [exact.columns.mask(parse_query(query)) & exact.base_mask for query in filtered]
+    filtered_vectors = [np.asarray(embeddings.embed_query(query), dtype=np.float32) for query in filtered]
+    k = args.k
+
+    latency, recalls = {}, {}
+    latency["vector_exact"], truth = timed_calls(lambda v: exact.index.search(v, k=k), vectors)
+    latency["vector_ivf"], found = timed_calls(lambda v: ivf_index.search(v, k=k), vectors)
+    recalls[f"ivf@{k}"] = recall(found, truth)
+    pairs = list(zip(filtered_vectors, masks))
+    latency["filtered_exact"], truth = timed_calls(lambda p: exact.index.search(p[0], k=k, mask=p[1]), pairs)
+    latency["filtered_ivf"], found = timed_calls(lambda p: ivf_index.search(p[0], k=k, mask=p[1]), pairs)
+    recalls[f"ivf_filtered@{k}"] = recall(found, truth)
+    latency["lexical"], _ = timed_calls(lambda q: exact.lexical.search(q, k=k), named)
+    latency["retriever_exact"], results = timed_calls(exact.search, named)
+    recalls[f"target_exact@{k}"] = target_recall(results, targets)
+    latency["retriever_ivf"], results = timed_calls(ivf.search, named)
+    recalls[f"target_ivf@{k}"] = target_recall(results, targets)
+    latency["retriever_filtered"], _ = timed_calls(ivf.search, filtered)
+    latency["facets"], _ = timed_calls(lambda m: exact.facets.counts(mask=m), masks)
+
+    print(f"{'query path':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, summary in latency.items():
+        print(f"{name:<22}{summary['p50']:>10.3f}{summary['p95']:>10.3f}{summary['p99']:>10.3f}")
+    print("recall: " + "  ".join(f"{name} {value}" for name, value in recalls.items()))
+
+    qps = {}
+    mixed = [query for pair in zip(named, filtered) for query in pair]
+    for threads in args.threads:
+        qps[str(threads)] = throughput(ivf.search, mixed, threads, args.throughput_seconds)
+    print("throughput (hybrid IVF retriever, q/s): " + "  ".join(f"{t} threads {q}" for t, q in qps.items()))
+
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    return {
+        "colleges": count,
+        "build": {
+            "firestore_load_s": round(load_s, 3), "firestore_load_mb": load_mb,
+            "snapshot_build_s": round(snapshot_s, 3), "snapshot_disk_mb": round(snapshot_mb, 1),
+            "retriever_build_s": round(exact_s, 3), "retriever_mb": exact_mb,
+            "ivf_build_s": round(ivf_s, 3), "ivf_mb": ivf_mb, "ivf_lists": ivf_index.nlist,
+        },
+        "latency_ms": latency,
+        "recall": recalls,
+        "throughput_qps": qps,
+        "embedding_calls": embeddings.calls,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results):
+    """
+    {(colleges, metric path): value} for every numeric metric, for comparisons.
+    """
+    flat = {}
+    for scale in results["scales"]:
+        for section in ("build", "latency_ms", "recall", "throughput_qps"):
+            for name, value in scale[section].items():
+                values = value.items() if isinstance(value, dict) else [(None, value)]
+                for stat, number in values:
+                    if isinstance(number, (int, float)):
+                        flat[(scale["colleges"], ".".join(filter(None, (section, name, stat))))] = number
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """
+    Metrics that got worse than the baseline by more than `tolerance` (a fraction).
+    Recall and throughput regress when they drop; times and memory when they grow.
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    for key, value in sorted(current.items()):
+        old = previous.get(key)
+        if not old or key[1].endswith(("_mb", "_lists")):
+            continue
+        higher_is_better = key[1].startswith(("recall", "throughput"))
+        change = (value - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append((key, old, value))
+    return regressions
+
+
+def run_suite(args):
+    results = {
+        "format": RESULTS_FORMAT,
+        "created_at": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "environment": {"python": platform.python_version(), "numpy": np.__version__,
+                        "platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {key: value for key, value in vars(args).items() if key not in ("out", "history", "baseline")},
+        "scales": [],
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.scales:
+            results["scales"].append(run_scale(count, args, directory))
+            gc.collect()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="College search benchmarks on synthetic corpora.")
+    parser.add_argument("--scales", type=lambda text: [int(n) for n in text.split(",")], default=list(DEFAULT_SCALES))
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--storage", choices=["float32", "float16", "int8"], default="int8")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--threads", type=lambda text: [int(n) for n in text.split(",")], default=[1, 2, 4, 8])
+    parser.add_argument("--throughput-seconds", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark_results.json", help="Write this run's results as JSON.")
+    parser.add_argument("--history", help="Also append the results as one line to this JSONL file.")
+    parser.add_argument("--baseline", help="Results JSON to compare against; exits 1 on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed fractional regression.")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    with open(args.out, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.history:
+        with open(args.history, "a") as file:
+            file.write(json.dumps(results) + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for (colleges, metric), old, new in regressions:
+            print(f"REGRESSION {colleges:,} colleges {metric}: {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
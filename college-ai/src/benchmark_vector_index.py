@@ -0,0 +1,69 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmark_ann import clustered_vectors
+from vector_index import COARSE_DIM, VectorIndex
+
+# Per-query latency the in-process index is meant to stay under at ~7k colleges
+TARGET_MS = 1.0
+
+
+def timed_search(index, queries, k):
+    for query in queries[:10]:
+        index.search(query, k=k)
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append({college_id for college_id, _ in index.search(query, k=k)})
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000, results
+
+
+def run_benchmark(num_colleges=7000, dim=1536, k=5, queries=1000, clusters=200, spread=1.0,
+                  coarse_dim=COARSE_DIM, seed=0):
+    """
+    Time top-k search on clustered embeddings shaped like the colleges collection,
+    for the default two-stage index and for an exact scan of the full matrix.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = clustered_vectors(num_colleges, dim, clusters, spread, rng)
+    ids = [str(i) for i in range(num_colleges)]
+    query_vectors = vectors[rng.choice(num_colleges, queries)]
+    query_vectors += spread * rng.standard_normal(query_vectors.shape, dtype=np.float32)
+
+    print(f"Colleges: {num_colleges}  dim: {dim}  k: {k}  queries: {queries}")
+    rows, truth = [], None
+    for default, dim_setting in ((False, 0), (True, coarse_dim)):
+        start = time.perf_counter()
+        index = VectorIndex(ids, vectors, coarse_dim=dim_setting)
+        build_ms = (time.perf_counter() - start) * 1000
+        kind = f"two-stage, coarse dim {index.coarse.shape[1]}" if index.coarse is not None else "exact scan"
+        name = f"default ({kind})" if default else kind
+        megabytes = (index.matrix.nbytes + (index.coarse.nbytes if index.coarse is not None else 0)) / 1e6
+        latencies, results = timed_search(index, query_vectors, k)
+        truth = truth or results
+        recall = np.mean([len(found & expected) / len(expected) for found, expected in zip(results, truth)])
+        rows.insert(0, (name, build_ms, megabytes, recall, latencies))
+
+    print(f"\n{'index':<38}{'build ms':>10}{'MB':>8}{'recall@' + str(k):>10}{'mean ms':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for name, build_ms, megabytes, recall, latencies in rows:
+        print(f"{name:<38}{build_ms:>10.1f}{megabytes:>8.1f}{recall:>10.3f}{latencies.mean():>9.3f}"
+              f"{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 99):>9.3f}")
+    p50 = np.percentile(rows[0][4], 50)
+    print(f"\nDefault index p50 {p50:.3f} ms: {'meets' if p50 < TARGET_MS else 'DOES NOT meet'} "
+          f"the {TARGET_MS:g} ms target")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the in-process college vector index.")
+    parser.add_argument("--colleges", type=int, default=7000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--spread", type=float, default=1.0)
+    parser.add_argument("--coarse-dim", type=int, default=COARSE_DIM)
+    args = parser.parse_args()
+    run_benchmark(args.colleges, args.dim, args.k, args.queries, args.clusters, args.spread, args.coarse_dim)
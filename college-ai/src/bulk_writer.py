@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    RETRYABLE_ERRORS = (
+        google_exceptions.Aborted,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        ConnectionError,
+        TimeoutError,
+    )
+except ImportError:
+    RETRYABLE_ERRORS = (ConnectionError, TimeoutError)
+
+# Firestore rejects batched writes with more than 500 operations
+MAX_BATCH_OPS = 500
+
+
+class BulkWriteError(Exception):
+    """
+    Raised when one or more batches still fail after every retry.
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        failed_ops = sum(len(ops) for ops, _ in failures)
+        super().__init__(f"{len(failures)} batch(es) with {failed_ops} write(s) failed: {failures[0][1]}")
+
+
+class BulkWriter:
+    """
+    Buffers Firestore set/update calls and commits them as batched writes.
+
+    Batches hold at most 500 operations and are committed in parallel on a small
+    thread pool. A batched write is all-or-nothing, so when a commit fails with a
+    transient error only that batch is retried, with jittered exponential backoff;
+    batches that already committed are never resent.
+
+    Usage:
+        with BulkWriter(db) as writer:
+            writer.set(db.collection('colleges').document('100654'), college)
+    """
+
+    def __init__(self, client, batch_size=MAX_BATCH_OPS, max_workers=4, max_retries=5, backoff=0.5):
+        if not 0 < batch_size <= MAX_BATCH_OPS:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_OPS}")
+        self.client = client
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.ops_written = 0
+        self.batches_committed = 0
+        self.retries = 0
+        self._ops = []
+        self._futures = []
+        self._failures = []
+        self._lock = threading.Lock()
+        # Bound the number of batches buffered or in flight so memory stays flat
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def set(self, reference, data, merge=False):
+        self._add(("set", reference, data, merge))
+
+    def update(self, reference, data):
+        self._add(("update", reference, data, False))
+
+    def delete(self, reference):
+        self._add(("delete", reference, None, False))
+
+    def _add(self, op):
+        with self._lock:
+            self._ops.append(op)
+            if len(self._ops) < self.batch_size:
+                return
+            ops, self._ops = self._ops, []
+        self._submit(ops)
+
+    def _submit(self, ops):
+        self._slots.acquire()
+        future = self._executor.submit(self._commit_with_retry, ops)
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            self._futures.append(future)
+
+    def _commit_with_retry(self, ops):
+        for attempt in range(self.max_retries + 1):
+            batch = self.client.batch()
+            for op, reference, data, merge in ops:
+                if op == "set":
+                    batch.set(reference, data, merge=merge)
+                elif op == "update":
+                    batch.update(reference, data)
+                else:
+                    batch.delete(reference)
+            try:
+                batch.commit()
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self._failures.append((ops, e))
+                    return
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+                continue
+            with self._lock:
+                self.ops_written += len(ops)
+                self.batches_committed += 1
+            return
+
+    def flush(self):
+        """
+        Commit everything buffered so far and wait for all in-flight batches.
+        """
+        with self._lock:
+            ops, self._ops = self._ops, []
+        if ops:
+            self._submit(ops)
+        with self._lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+        with self._lock:
+            failures, self._failures = self._failures, []
+        if failures:
+            raise BulkWriteError(failures)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
+        return False
@@ -0,0 +1,163 @@
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+import math
+import os
+import time
+
+from bulk_writer import BulkWriter
+
+# Every job that writes college documents does so through a VersionedWriter: it
+# reserves a sync version in a short transaction on the collection's marker
+# document, stamps its documents with it while writing them through BulkWriter,
+# and releases the reservation once they have committed. Versions are handed out
+# in increasing order, and the marker's `version` only advances to just below the
+# oldest reservation still pending, so the marker never moves backwards and every
+# document stamped at or below it is already committed, however the writers'
+# commits interleave. Replicas read the one marker document to learn whether
+# anything changed, then fetch only the documents and tombstones stamped after
+# their last sync.
+SYNC_FIELD = "sync_version"
+MARKERS_COLLECTION = "sync_markers"
+
+# A reservation not released within this long belongs to a writer that died; it
+# stops holding the marker back. Writers must finish well within it.
+RESERVATION_SECONDS = float(os.getenv("SYNC_RESERVATION_SECONDS", 3600))
+# Reservations of concurrent jobs contend on the marker document and are retried
+TRANSACTION_ATTEMPTS = 20
+
+
+def tombstones_collection(collection="colleges"):
+    """
+    Where deletions from `collection` are recorded: one document per deleted id,
+    stamped with the version of the writer that deleted it.
+    """
+    return f"{collection}_tombstones"
+
+
+def next_sync_version(marker):
+    # Markers written before versions were counted hold a timestamp; continue above it
+    if not marker:
+        return 1
+    return math.floor(max(marker.get("reserved") or 0, marker["version"])) + 1
+
+
+@contextmanager
+def reserved_version(db, collection="colleges", source=None):
+    """
+    Reserve the next sync version of `collection` for the writes made inside the
+    block, and release it when the block exits, whether or not they all succeeded.
+    Writes must have committed (e.g. their BulkWriter closed) before the block exits.
+    """
+    version = _update_marker(db, collection, lambda marker, pending: _reserve(marker, pending, source))
+    try:
+        yield version
+    finally:
+        _update_marker(db, collection, lambda marker, pending: _release(marker, pending, version, collection))
+
+
+def _reserve(marker, pending, source):
+    version = next_sync_version(marker)
+    pending[str(version)] = time.time() + RESERVATION_SECONDS
+    return version, {"reserved": version, "source": source}
+
+
+def _release(marker, pending, version, collection):
+    if pending.pop(str(version), None) is None:
+        print(f"Sync version {version} of {collection} was released after its reservation expired; "
+              f"replicas that synced past it may have missed its writes")
+    watermark = min(map(int, pending)) - 1 if pending else marker["reserved"]
+    return version, {"version": max(marker.get("version") or 0, watermark)}
+
+
+def _update_marker(db, collection, change):
+    marker_ref = db.collection(MARKERS_COLLECTION).document(collection)
+
+    def update(transaction):
+        snapshot = marker_ref.get(transaction=transaction)
+        marker = snapshot.to_dict() if snapshot.exists else {}
+        now = time.time()
+        # Reservations past their lease belong to writers that died
+        pending = {version: expires for version, expires in (marker.get("pending") or {}).items() if expires > now}
+        result, fields = change(marker, pending)
+        marker = dict(marker, **fields, pending=pending, updated_at=datetime.now().isoformat())
+        marker.setdefault("version", 0)
+        transaction.set(marker_ref, marker)
+        return result
+
+    return _run_transaction(db, update)
+
+
+def _run_transaction(db, function):
+    run_transaction = getattr(db, "run_transaction", None)
+    if run_transaction is not None:  # memory_firestore.InMemoryFirestore
+        return run_transaction(function)
+    from google.cloud import firestore
+    return firestore.transactional(function)(db.transaction(max_attempts=TRANSACTION_ATTEMPTS))
+
+
+class VersionedWriter:
+    """
+    BulkWriter for `collection` whose writes are stamped with a sync version reserved
+    on the change marker at the first write, and released when the writer closes,
+    after every write has committed. A writer that never writes moves no marker.
+
+        with VersionedWriter(db, source="upload_to_firestore") as writer:
+            writer.stage({"100654": college, "100663": None})
+
+    Updates are merged into the documents, or with merge=False applied with update()
+    so missing documents fail. An update of None deletes the document and leaves a
+    tombstone.
+    """
+
+    def __init__(self, db, collection="colleges", source=None, merge=True, **writer_params):
+        self.db = db
+        self.collection = collection
+        self.source = source
+        self.merge = merge
+        self.writer_params = writer_params
+        self.version = None
+        self._stack = ExitStack()
+        self._writer = None
+
+    def stage(self, changes):
+        """
+        Queue a {document id: update or None} dict of changes.
+        """
+        if self._writer is None:
+            self.version = self._stack.enter_context(reserved_version(self.db, self.collection, self.source))
+            self._writer = self._stack.enter_context(BulkWriter(self.db, **self.writer_params))
+        documents = self.db.collection(self.collection)
+        tombstones = self.db.collection(tombstones_collection(self.collection))
+        for doc_id, update in changes.items():
+            if update is None:
+                self._writer.delete(documents.document(doc_id))
+                self._writer.set(tombstones.document(doc_id), {SYNC_FIELD: self.version})
+            elif self.merge:
+                self._writer.set(documents.document(doc_id), dict(update, **{SYNC_FIELD: self.version}), merge=True)
+            else:
+                self._writer.update(documents.document(doc_id), dict(update, **{SYNC_FIELD: self.version}))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._stack.__exit__(exc_type, exc, tb)
+
+
+def commit_changes(db, changes, collection="colleges", source=None, merge=True, **writer_params):
+    """
+    Write `changes` (see VersionedWriter) under one reserved sync version and return
+    that version once they have committed, or None if there were none.
+    """
+    with VersionedWriter(db, collection, source, merge, **writer_params) as writer:
+        if changes:
+            writer.stage(changes)
+    return writer.version
+
+
+def read_change_marker(db, collection="colleges"):
+    """
+    Return the latest marker for `collection` as a dict, or None if none was written.
+    """
+    snapshot = db.collection(MARKERS_COLLECTION).document(collection).get()
+    return snapshot.to_dict() if snapshot.exists else None
@@ -0,0 +1,183 @@
+import numpy as np
+
+from college_filters import STATE_CODES
+
+FACETS_FILE = "facets.npz"
+UNKNOWN = "unknown"
+
+# Band edges per numeric facet; a value v falls in band i when edges[i] <= v < edges[i + 1]
+FACET_BANDS = {
+    "tuition_in_state": (
+        [0, 10000, 20000, 30000, 40000, 50000, np.inf],
+        ["<$10k", "$10k-20k", "$20k-30k", "$30k-40k", "$40k-50k", "$50k+"],
+    ),
+    "admission_rate": (
+        [0, 0.1, 0.25, 0.5, 0.75, np.inf],
+        ["<10%", "10-25%", "25-50%", "50-75%", "75%+"],
+    ),
+    "student_size": (
+        [0, 1000, 5000, 15000, 30000, np.inf],
+        ["<1k", "1k-5k", "5k-15k", "15k-30k", "30k+"],
+    ),
+}
+FACET_NAMES = ["state"] + list(FACET_BANDS)
+# Bins of the finer histograms drawn behind the numeric range sliders
+HISTOGRAM_BINS = 20
+
+# Set bits per byte value, for popcounts on NumPy < 2.0 (no np.bitwise_count)
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint16)
+
+
+def _popcount(words):
+    """
+    Set bits in each row of a 2-D array of uint64 words.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+def _pack(mask):
+    """
+    Boolean rows -> bitset as uint64 words (along the last axis), zero-padded.
+    """
+    packed = np.packbits(mask, axis=-1)
+    padding = -packed.shape[-1] % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(packed.shape[:-1] + (padding,), dtype=np.uint8)], axis=-1)
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def facet_labels(facet):
+    """
+    Bucket labels of a facet, in bucket order; the last bucket holds missing values.
+    """
+    labels = STATE_CODES if facet == "state" else FACET_BANDS[facet][1]
+    return list(labels) + [UNKNOWN]
+
+
+def _bucket_codes(columns, facet):
+    if facet == "state":
+        codes = columns.state_codes.astype(np.int16)
+        return np.where(codes < 0, len(STATE_CODES), codes).astype(np.int16)
+    edges, labels = FACET_BANDS[facet]
+    values = np.asarray(columns.numeric[facet], dtype=np.float32)
+    codes = np.digitize(values, edges[1:-1]).astype(np.int16)
+    codes[np.isnan(values) | (values < edges[0])] = len(labels)
+    return codes
+
+
+class FacetIndex:
+    """
+    Facet counts for the college filter UI: state, in-state tuition band, admission
+    rate band and student size band.
+
+    Built once per snapshot. Each row gets a bucket code per facet, and np.bincount
+    over those codes gives the unfiltered counts. Every bucket also keeps a packed
+    bitset of its rows, so filtered counts come from ANDing bitsets and popcounting,
+    without going back to the columns.
+    """
+
+    def __init__(self, codes, histograms):
+        self.codes = codes
+        self.histograms = histograms
+        self.size = len(next(iter(codes.values())))
+        self.totals = {facet: np.bincount(codes[facet], minlength=len(facet_labels(facet)))
+                       for facet in FACET_NAMES}
+        # One row of packed bits per bucket, facets stacked in FACET_NAMES order
+        self.offsets = {}
+        blocks = []
+        for facet in FACET_NAMES:
+            self.offsets[facet] = sum(len(block) for block in blocks)
+            buckets = np.arange(len(facet_labels(facet)), dtype=np.int16)
+            blocks.append(_pack(codes[facet][None, :] == buckets[:, None]))
+        self.bits = np.concatenate(blocks)
+
+    @classmethod
+    def from_columns(cls, columns):
+        codes = {facet: _bucket_codes(columns, facet) for facet in FACET_NAMES}
+        histograms = {}
+        for facet in FACET_BANDS:
+            values = np.asarray(columns.numeric[facet], dtype=np.float32)
+            values = values[~np.isnan(values)]
+            histograms[facet] = np.histogram(values, bins=HISTOGRAM_BINS) if len(values) \
+                else (np.zeros(HISTOGRAM_BINS, dtype=np.int64), np.zeros(HISTOGRAM_BINS + 1))
+        return cls(codes, histograms)
+
+    def __len__(self):
+        return self.size
+
+    def take(self, rows):
+        """
+        Reorder/subset the rows, e.g. to line them up with another index's row order.
+        Histograms stay those of the whole snapshot.
+        """
+        return FacetIndex({facet: codes[rows] for facet, codes in self.codes.items()}, self.histograms)
+
+    def _bucket_bits(self, facet, labels):
+        labels_index = {label: i for i, label in enumerate(facet_labels(facet))}
+        rows = [self.offsets[facet] + labels_index[label] for label in labels if label in labels_index]
+        return np.bitwise_or.reduce(self.bits[rows], axis=0) if rows else np.zeros(self.bits.shape[1], np.uint64)
+
+    def counts(self, selected=None, mask=None):
+        """
+        {facet: {label: count}} plus the matching total.
+
+        `selected` maps facets to the labels ticked in the UI ({"state": ["CA", "OR"]});
+        labels within a facet are ORed and facets are ANDed. Each facet's own
+        selection is left out of its counts, so the other options in that facet keep
+        showing how many colleges they would add. `mask` is an optional boolean row
+        mask, e.g. from CollegeColumns.mask() for the query's parsed filters.
+        """
+        selected = {facet: labels for facet, labels in (selected or {}).items() if facet in self.offsets}
+        if not selected and mask is None:
+            return self._format({facet: self.totals[facet] for facet in FACET_NAMES}, self.size)
+
+        base = _pack(mask) if mask is not None else None
+        selections = {facet: self._bucket_bits(facet, labels) for facet, labels in selected.items()}
+        matching = list(selections.values()) + ([base] if base is not None else [])
+        everything = np.bitwise_and.reduce(matching, axis=0)
+        # Facets with nothing selected are all counted against every constraint in one pass
+        shared = _popcount(self.bits & everything)
+        counts = {}
+        for facet in FACET_NAMES:
+            start, end = self.offsets[facet], self.offsets[facet] + len(facet_labels(facet))
+            if facet not in selections:
+                counts[facet] = shared[start:end]
+                continue
+            others = [bits for other, bits in selections.items() if other != facet]
+            if base is not None:
+                others.append(base)
+            if others:
+                counts[facet] = _popcount(self.bits[start:end] & np.bitwise_and.reduce(others, axis=0))
+            else:
+                counts[facet] = self.totals[facet]
+        total = int(_popcount(everything))
+        return self._format(counts, total)
+
+    def histogram(self, facet):
+        """
+        (counts, bin edges) of a numeric facet over the whole snapshot.
+        """
+        counts, edges = self.histograms[facet]
+        return counts.tolist(), edges.tolist()
+
+    @staticmethod
+    def _format(counts, total):
+        result = {facet: dict(zip(facet_labels(facet), values.tolist())) for facet, values in counts.items()}
+        result["total"] = int(total)
+        return result
+
+    def save(self, path):
+        arrays = {f"codes_{facet}": codes for facet, codes in self.codes.items()}
+        for facet, (counts, edges) in self.histograms.items():
+            arrays[f"histogram_{facet}"] = counts
+            arrays[f"edges_{facet}"] = edges
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            codes = {facet: data[f"codes_{facet}"] for facet in FACET_NAMES}
+            histograms = {facet: (data[f"histogram_{facet}"], data[f"edges_{facet}"]) for facet in FACET_BANDS}
+        return cls(codes, histograms)
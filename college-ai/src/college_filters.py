@@ -0,0 +1,214 @@
+import re
+
+import numpy as np
+
+# Numeric fields available as filter columns
+NUMERIC_FIELDS = {
+    "tuition_in_state": "latest.cost.tuition.in_state",
+    "tuition_out_of_state": "latest.cost.tuition.out_of_state",
+    "admission_rate": "latest.admissions.admission_rate.overall",
+    "student_size": "latest.student.size",
+}
+
+STATE_NAMES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "florida": "FL", "georgia": "GA",
+    "hawaii": "HI", "idaho": "ID", "illinois": "IL", "indiana": "IN", "iowa": "IA",
+    "kansas": "KS", "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS", "missouri": "MO",
+    "montana": "MT", "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ",
+    "new mexico": "NM", "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT",
+    "virginia": "VA", "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+    "district of columbia": "DC",
+}
+STATE_CODES = sorted(set(STATE_NAMES.values()))
+
+# Longest names first so "west virginia" wins over "virginia"
+_STATE_NAME_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(STATE_NAMES, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+# Only upper-case codes count, so words like "in", "or" and "me" are not read as states
+_STATE_CODE_PATTERN = re.compile(r"\b(" + "|".join(STATE_CODES) + r")\b")
+# A state mention is a location constraint ("in Texas", "CA schools"), not part of a
+# school name ("University of Virginia", "Alabama A & M")
+_LOCATION_BEFORE = re.compile(r"\b(in|from|within|near|across)\s+(the\s+state\s+of\s+)?$", re.IGNORECASE)
+_LIST_BEFORE = re.compile(r"(,|\band|\bor)\s+$", re.IGNORECASE)
+_LOCATION_AFTER = re.compile(r"^\s+(schools|colleges|universities|institutions)\b", re.IGNORECASE)
+
+_COMPARISON_PATTERN = re.compile(
+    r"(?P<op>under|below|less than|fewer than|cheaper than|at most|no more than|up to|<=|<|"
+    r"over|above|more than|greater than|higher than|at least|no less than|>=|>)"
+    r"\s*(?P<dollar>\$)?\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>%|percent\b|k\b|thousand\b)?",
+    re.IGNORECASE)
+
+_OPERATORS = {
+    "under": "<", "below": "<", "less than": "<", "fewer than": "<", "cheaper than": "<", "<": "<",
+    "at most": "<=", "no more than": "<=", "up to": "<=", "<=": "<=",
+    "over": ">", "above": ">", "more than": ">", "greater than": ">", "higher than": ">", ">": ">",
+    "at least": ">=", "no less than": ">=", ">=": ">=",
+}
+
+# How far around a comparison to look for words that say which field it is about
+_CONTEXT_CHARS = 40
+
+# "top 100 ranked", "ranked in the top 50", "top-200 in the world rankings"
+_TOP_RANK_PATTERN = re.compile(r"\btop[- ]?(\d[\d,]*)\b", re.IGNORECASE)
+_RANK_CONTEXT = re.compile(r"\brank|\bworld\b", re.IGNORECASE)
+
+
+class QueryFilters:
+    """
+    Structured constraints pulled out of a natural-language query: a set of state
+    codes plus (column, operator, value) conditions on the numeric columns.
+    """
+
+    def __init__(self, states=None, conditions=None):
+        self.states = set(states or ())
+        self.conditions = list(conditions or ())
+
+    def __bool__(self):
+        return bool(self.states or self.conditions)
+
+    def __repr__(self):
+        return f"QueryFilters(states={sorted(self.states)}, conditions={self.conditions})"
+
+
+def _parse_states(query):
+    mentions = [(m.start(), m.end(), STATE_NAMES[m.group(1).lower()]) for m in _STATE_NAME_PATTERN.finditer(query)]
+    mentions += [(m.start(), m.end(), m.group(1)) for m in _STATE_CODE_PATTERN.finditer(query)]
+    states = set()
+    previous_end = None
+    for start, end, code in sorted(mentions):
+        before = query[:start]
+        chained = previous_end is not None and _LIST_BEFORE.search(query[previous_end:start])
+        if _LOCATION_BEFORE.search(before) or chained or _LOCATION_AFTER.match(query[end:]):
+            states.add(code)
+            previous_end = end
+    return states
+
+
+_CLAUSE_BOUNDARY = re.compile(r",|;|\band\b|\bwith\b|\bbut\b|\bor\b")
+
+
+def _keyword_column(before, after):
+    """
+    Pick the column named by the keyword nearest a bare number within its own clause,
+    preferring keywords that come before it ("admission rate over 70").
+    """
+    before = _CLAUSE_BOUNDARY.split(before)[-1]
+    after = _CLAUSE_BOUNDARY.split(after)[0]
+    for text, nearest in ((before, lambda ms: ms[-1]), (after, lambda ms: ms[0])):
+        matches = list(re.finditer(r"(admi|accept)|(tuition|cost|price)|(rank)", text))
+        if matches:
+            match = nearest(matches)
+            return "admission_rate" if match.group(1) else "tuition" if match.group(2) else "world_rank"
+    return None
+
+
+def _classify(query, match):
+    before = query[max(0, match.start() - _CONTEXT_CHARS):match.start()].lower()
+    after = query[match.end():match.end() + _CONTEXT_CHARS].lower()
+    unit = (match.group("unit") or "").lower()
+    value = float(match.group("number").replace(",", ""))
+    if unit in ("k", "thousand"):
+        value *= 1000
+
+    out_of_state = re.search(r"out[- ]of[- ]state", before + " " + after)
+    tuition_column = "tuition_out_of_state" if out_of_state else "tuition_in_state"
+    if unit in ("%", "percent"):
+        return "admission_rate", value / 100
+    if re.match(r"\W*(students|undergrad|enrolled|enrollment)", after):
+        return "student_size", value
+    if match.group("dollar") or unit in ("k", "thousand"):
+        return tuition_column, value
+
+    column = _keyword_column(before, after)
+    if column == "admission_rate":
+        return column, value / 100 if value > 1 else value
+    if column == "tuition":
+        return tuition_column, value
+    if column == "world_rank":
+        return column, value
+    return None, None
+
+
+def parse_query(query):
+    """
+    Pull state and numeric constraints out of a query such as
+    "schools in CA under $15k in-state tuition with >50% admission rate".
+    """
+    states = _parse_states(query)
+
+    conditions = []
+    for match in _COMPARISON_PATTERN.finditer(query):
+        column, value = _classify(query, match)
+        if column is not None:
+            conditions.append((column, _OPERATORS[match.group("op").lower()], value))
+    for match in _TOP_RANK_PATTERN.finditer(query):
+        context = query[max(0, match.start() - _CONTEXT_CHARS):match.end() + _CONTEXT_CHARS]
+        if _RANK_CONTEXT.search(context):
+            conditions.append(("world_rank", "<=", float(match.group(1).replace(",", ""))))
+    return QueryFilters(states, conditions)
+
+
+class CollegeColumns:
+    """
+    Columnar view of the colleges, row-aligned with a VectorIndex, used to evaluate
+    QueryFilters as vectorized boolean masks. Missing numbers are stored as NaN and
+    never satisfy a condition.
+    """
+
+    def __init__(self, numeric, state_codes):
+        self.numeric = numeric
+        self.state_codes = state_codes
+
+    @classmethod
+    def from_records(cls, records):
+        numeric = {
+            column: np.array([_as_float(record.get(field)) for record in records], dtype=np.float32)
+            for column, field in NUMERIC_FIELDS.items()
+        }
+        state_index = {code: i for i, code in enumerate(STATE_CODES)}
+        state_codes = np.array([state_index.get(record.get("school.state"), -1) for record in records],
+                               dtype=np.int16)
+        return cls(numeric, state_codes)
+
+    def __len__(self):
+        return len(self.state_codes)
+
+    def take(self, rows):
+        """
+        Reorder/subset the columns, e.g. to line them up with another index's row order.
+        """
+        return CollegeColumns({column: values[rows] for column, values in self.numeric.items()},
+                              self.state_codes[rows])
+
+    def mask(self, filters):
+        """
+        Boolean mask of the rows that satisfy every constraint in `filters`.
+
+        Conditions on columns this view does not have (e.g. world_rank without a
+        ranking index) are ignored.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if filters.states:
+            wanted = [STATE_CODES.index(code) for code in filters.states if code in STATE_CODES]
+            mask &= np.isin(self.state_codes, wanted)
+        for column, op, value in filters.conditions:
+            if column not in self.numeric:
+                continue
+            values = self.numeric[column]
+            if op == "<":
+                mask &= values < value
+            elif op == "<=":
+                mask &= values <= value
+            elif op == ">":
+                mask &= values > value
+            else:
+                mask &= values >= value
+        return mask
+
+
+def _as_float(value):
+    return float(value) if value is not None else np.nan
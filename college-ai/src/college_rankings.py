@@ -0,0 +1,271 @@
+import argparse
+from collections import defaultdict
+import csv
+from datetime import datetime
+import json
+import math
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+from college_stream import iter_colleges
+
+RANKINGS_CSV_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "college_test_data.csv")
+RANKINGS_INDEX_PATH = os.getenv("COLLEGE_RANKINGS_PATH", "college_rankings.json")
+
+# Scorecard only covers US institutions
+RANKINGS_COUNTRY = "USA"
+# Ranking columns kept in the per-year time series
+RANKING_FIELDS = ("world_rank", "national_rank", "score")
+
+# Minimum name similarity for a match; a ranking name that is a word prefix of the
+# college name ("Tulane University" / "Tulane University of Louisiana") scores at
+# least PREFIX_SIMILARITY
+MATCH_THRESHOLD = 0.75
+PREFIX_SIMILARITY = 0.9
+# Blocking keys: the first PREFIX_LENGTH letters of a name's BLOCKING_TOKENS rarest
+# tokens, skipping tokens found in more than COMMON_TOKEN_SHARE of college names
+BLOCKING_TOKENS = 2
+PREFIX_LENGTH = 4
+COMMON_TOKEN_SHARE = 0.02
+
+_ALIASES = {"st": "saint", "mt": "mount", "ft": "fort", "lsu": "louisiana state university"}
+# System names are written inconsistently ("SUNY Downstate", "University at Albany,
+# SUNY", "Queens College, City University of New York"), so they are dropped
+_SYSTEM_NAMES = re.compile(
+    r"\b(the )?(state university of new york|state university of new jersey|city university of new york|suny|cuny)\b")
+_IGNORED_TOKENS = {"the", "of", "at", "in", "and", "for", "main", "campus"}
+_DASHES = re.compile(r"[\u2010-\u2015-]")
+# What comes after the last of these is a campus qualifier: "Arizona State University - Tucson"
+_CAMPUS_SEPARATORS = re.compile(r"[,\u2010-\u2015-]")
+
+
+def name_tokens(name):
+    """
+    Normalized tokens of an institution name: ASCII, lower-case, dashes and "&" split,
+    parentheticals and filler words dropped, common abbreviations expanded.
+    """
+    text = _DASHES.sub(" ", name or "").replace("&", " and ")
+    text = re.sub(r"\(.*?\)", " ", text)
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    text = _SYSTEM_NAMES.sub(" ", text)
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text):
+        for part in _ALIASES.get(token, token).split():
+            if part not in _IGNORED_TOKENS:
+                tokens.append(part)
+    return tokens
+
+
+def is_university(name):
+    """
+    Whether a name denotes a university; SUNY campuses count even without the word.
+    """
+    text = (name or "").lower()
+    return "university" in name_tokens(name) or bool(re.search(r"\bsuny\b|state university of new york", text))
+
+
+def load_rankings(path=RANKINGS_CSV_PATH, country=RANKINGS_COUNTRY):
+    """
+    Return {institution: {year: {world_rank, national_rank, score}}} for one country.
+    """
+    rankings = defaultdict(dict)
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            if country and row["country"] != country:
+                continue
+            rankings[row["institution"]][row["year"]] = {
+                field: float(row[field]) if "." in row[field] else int(row[field])
+                for field in RANKING_FIELDS if row.get(field)
+            }
+    return rankings
+
+
+class _CollegeNames:
+    """
+    Blocking structure over college names: token prefix -> candidate colleges, plus
+    IDF weights for scoring.
+    """
+
+    def __init__(self, colleges):
+        self.colleges = []
+        self.blocks = defaultdict(list)
+        document_frequency = defaultdict(int)
+        for college in colleges:
+            if "id" not in college or not college.get("school.name"):
+                continue
+            sequence = name_tokens(college["school.name"])
+            name, city = set(sequence), set(name_tokens(college.get("school.city")))
+            parts = _CAMPUS_SEPARATORS.split(college["school.name"])
+            campus = city & set(name_tokens(parts[-1])) if len(parts) > 1 else set()
+            position = len(self.colleges)
+            self.colleges.append((college, sequence, name, city, campus, is_university(college["school.name"])))
+            for token in name | city:
+                document_frequency[token] += 1
+                if position not in self.blocks[token[:PREFIX_LENGTH]][-1:]:
+                    self.blocks[token[:PREFIX_LENGTH]].append(position)
+        total = len(self.colleges)
+        self.idf = {token: math.log(1 + total / count) for token, count in document_frequency.items()}
+        self._default_idf = math.log(1 + total)
+        self._common_idf = math.log(1 + 1 / COMMON_TOKEN_SHARE)
+
+    def weight(self, tokens):
+        # Summed in a fixed order so equal token sets weigh exactly the same and score 1.0
+        return sum(self.idf.get(token, self._default_idf) for token in sorted(tokens))
+
+    def candidates(self, tokens):
+        """
+        Colleges sharing a prefix with one of the name's rarest tokens.
+        """
+        rarest = sorted(set(tokens), key=lambda token: -self.idf.get(token, self._default_idf))
+        keys = [token for token in rarest if self.idf.get(token, self._default_idf) > self._common_idf]
+        positions = set()
+        for token in (keys or rarest)[:BLOCKING_TOKENS]:
+            positions.update(self.blocks.get(token[:PREFIX_LENGTH], ()))
+        return positions
+
+    def similarity(self, tokens, university, position):
+        """
+        Score a ranking name against a college: (similarity, word-order agreement).
+
+        Similarity is an IDF-weighted Dice overlap. The college's city counts as part
+        of its name ("Ohio State University, Columbus" vs "Ohio State University-Main
+        Campus" in Columbus), and a campus city after a dash or comma in the college
+        name ("University of Michigan-Ann Arbor") is not held against it; a city
+        elsewhere in the name ("Boston University") is part of the name. A
+        university is never matched to a non-university
+        ("Georgetown University" / "Georgetown College"). Word-order agreement is 2 for
+        identical names and 1 when the ranking name is a word prefix of the college
+        name; it separates "Miami University" from "University of Miami".
+        """
+        _, sequence, name, city, campus, college_university = self.colleges[position]
+        if university != college_university:
+            return 0.0, 0
+        similarity = self._overlap(set(tokens), name, city, campus)
+        if sequence == tokens:
+            return 1.0, 2
+        if sequence[:len(tokens)] == tokens:
+            return max(PREFIX_SIMILARITY, similarity), 1
+        return similarity, 0
+
+    def _overlap(self, ranking, name, city, campus):
+        matched = ranking & (name | city)
+        college = (name - campus) | (city & ranking)
+        total = self.weight(ranking) + self.weight(college)
+        return 2 * self.weight(matched) / total if total else 0.0
+
+
+def match_rankings(rankings, colleges, threshold=MATCH_THRESHOLD):
+    """
+    Resolve ranking institutions to Scorecard colleges, one-to-one.
+
+    Candidate pairs come only from shared token-prefix blocks. Pairs are accepted
+    greedily from the most similar down; ties go to the name with the same word
+    order, then to the larger campus. Campuses whose names start with the ranked
+    name ("Arizona State University - Tucson", "Arizona State University Campus
+    Immersion") all rank with the best of their scores, so the larger campus wins
+    however closely the rest of its name matched.
+    Returns ({institution: (college, similarity)}, number of pairs compared).
+    """
+    names = _CollegeNames(colleges)
+    scored = []
+    comparisons = 0
+    for institution in rankings:
+        tokens = name_tokens(institution)
+        university = is_university(institution)
+        candidates = []
+        for position in names.candidates(tokens):
+            comparisons += 1
+            similarity, order = names.similarity(tokens, university, position)
+            if similarity >= threshold:
+                candidates.append((similarity, order, position))
+        campus_score = max((similarity for similarity, order, _ in candidates if order == 1), default=0.0)
+        for similarity, order, position in candidates:
+            size = names.colleges[position][0].get("latest.student.size") or 0
+            score = campus_score if order == 1 else similarity
+            scored.append((score, order, size, institution, position, similarity))
+
+    matches, used = {}, set()
+    for _, _, _, institution, position, similarity in sorted(scored, key=lambda item: (-item[0], -item[1], -item[2])):
+        if institution in matches or position in used:
+            continue
+        matches[institution] = (names.colleges[position][0], similarity)
+        used.add(position)
+    return matches, comparisons
+
+
+def build_ranking_index(rankings_path, colleges, output_path=RANKINGS_INDEX_PATH, threshold=MATCH_THRESHOLD):
+    """
+    Join the rankings CSV to the colleges and write {college id: ranking time series}.
+    """
+    rankings = load_rankings(rankings_path)
+    matches, comparisons = match_rankings(rankings, colleges, threshold)
+    index = {}
+    for institution, (college, similarity) in matches.items():
+        index[str(college["id"])] = {
+            "institution": institution,
+            "name": college["school.name"],
+            "similarity": round(similarity, 3),
+            "rankings": dict(sorted(rankings[institution].items())),
+        }
+    payload = {"built_at": datetime.now().isoformat(), "colleges": index}
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(payload, file, indent=2)
+    os.replace(tmp_path, output_path)
+    return {"institutions": len(rankings), "matched": len(matches), "comparisons": comparisons}
+
+
+class RankingIndex:
+    """
+    Read-side of the persisted join: O(1) ranking lookups by college id.
+    """
+
+    def __init__(self, path=RANKINGS_INDEX_PATH):
+        with open(path) as file:
+            self.colleges = json.load(file)["colleges"]
+
+    def __len__(self):
+        return len(self.colleges)
+
+    def __contains__(self, college_id):
+        return str(college_id) in self.colleges
+
+    def history(self, college_id):
+        """
+        {year: {world_rank, national_rank, score}} for a college, or {} if unranked.
+        """
+        entry = self.colleges.get(str(college_id))
+        return entry["rankings"] if entry else {}
+
+    def world_rank(self, college_id, year=None):
+        """
+        World rank in `year`, or in the latest ranked year; None if unranked.
+        """
+        history = self.history(college_id)
+        if not history:
+            return None
+        year = str(year) if year else max(history)
+        return history.get(year, {}).get("world_rank")
+
+    def column(self, ids, year=None):
+        """
+        Latest (or `year`) world rank for each id as a float32 array, NaN where unranked.
+        """
+        ranks = [self.world_rank(college_id, year) for college_id in ids]
+        return np.array([np.nan if rank is None else rank for rank in ranks], dtype=np.float32)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Join world rankings to the Scorecard colleges.")
+    parser.add_argument("--rankings", default=RANKINGS_CSV_PATH)
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--out", default=RANKINGS_INDEX_PATH)
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD)
+    args = parser.parse_args()
+
+    stats = build_ranking_index(args.rankings, iter_colleges(args.colleges), args.out, args.threshold)
+    print(f"Matched {stats['matched']} of {stats['institutions']} ranked institutions "
+          f"using {stats['comparisons']} name comparisons; wrote {args.out}")
@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from change_marker import SYNC_FIELD, read_change_marker, tombstones_collection
+from college_filters import NUMERIC_FIELDS, STATE_CODES
+from embedding_codec import EMBEDDING_FIELDS, decode_embedding
+from vector_index import VectorIndex, normalize_rows
+
+REPLICA_PATH = os.getenv("COLLEGE_REPLICA_PATH", "colleges_replica.sqlite3")
+
+# Indexed columns pulled out of each record; the full record is kept as JSON
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS colleges (
+    id TEXT PRIMARY KEY,
+    state TEXT,
+    tuition_in_state REAL,
+    tuition_out_of_state REAL,
+    admission_rate REAL,
+    student_size REAL,
+    data TEXT NOT NULL,
+    embedding BLOB,
+    sync_version REAL
+);
+CREATE INDEX IF NOT EXISTS colleges_state ON colleges (state);
+CREATE INDEX IF NOT EXISTS colleges_tuition ON colleges (tuition_in_state);
+CREATE INDEX IF NOT EXISTS colleges_admission_rate ON colleges (admission_rate);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_NUMERIC_COLUMNS = ("tuition_in_state", "tuition_out_of_state", "admission_rate", "student_size")
+_SQL_OPERATORS = {"<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+class CollegeReplica:
+    """
+    Local SQLite (WAL) read replica of the Firestore colleges collection.
+
+    sync() reads the change marker moved by every change_marker.commit_changes()
+    and, if it moved, fetches only the documents and tombstones stamped since the
+    last sync. Readers get their own connection per thread, and WAL mode lets them
+    keep reading while a sync writes.
+    """
+
+    def __init__(self, path=REPLICA_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+        connection.commit()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            self._local.connection = connection
+        return connection
+
+    @property
+    def version(self):
+        """
+        Version of the last change marker applied, or None before the first sync.
+        """
+        row = self._connection().execute("SELECT value FROM sync_state WHERE key = 'version'").fetchone()
+        return float(row[0]) if row else None
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM colleges").fetchone()[0]
+
+    def sync(self, db, collection="colleges"):
+        """
+        Bring the replica up to date; returns the number of documents fetched or deleted.
+
+        Costs one read when nothing changed. The first sync copies the collection;
+        later ones fetch the documents and tombstones stamped after the last marker.
+        """
+        marker = read_change_marker(db, collection)
+        last_version = self.version
+        if last_version is not None and (marker is None or marker["version"] <= last_version):
+            return 0
+
+        query = db.collection(collection)
+        tombstones = ()
+        if last_version is not None:
+            query = query.where(SYNC_FIELD, ">", last_version)
+            tombstones = db.collection(tombstones_collection(collection)).where(SYNC_FIELD, ">", last_version).stream()
+        rows = [_to_row(doc.id, doc.to_dict()) for doc in query.stream()]
+        # Only ids whose document is gone: one may have been re-created since
+        fetched = {row[0] for row in rows}
+        tombstoned = [doc.id for doc in tombstones if doc.id not in fetched]
+        deleted = []
+        if tombstoned:
+            references = [db.collection(collection).document(doc_id) for doc_id in tombstoned]
+            deleted = [(snapshot.id,) for snapshot in db.get_all(references, field_paths=[SYNC_FIELD])
+                       if not snapshot.exists]
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO colleges VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                connection.executemany("DELETE FROM colleges WHERE id = ?", deleted)
+                if marker is not None:
+                    connection.execute("INSERT OR REPLACE INTO sync_state VALUES ('version', ?)",
+                                       (str(marker["version"]),))
+        return len(rows) + len(deleted)
+
+    def get(self, college_id):
+        row = self._connection().execute("SELECT data FROM colleges WHERE id = ?", (str(college_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def records(self):
+        """
+        Every college record (dotted keys plus `id`, no embedding), in id order.
+        """
+        for (data,) in self._connection().execute("SELECT data FROM colleges ORDER BY id"):
+            yield json.loads(data)
+
+    def find(self, filters=None, limit=None):
+        """
+        Records matching college_filters.QueryFilters, answered from the SQL indexes.
+        """
+        clauses, params = [], []
+        if filters and filters.states:
+            states = [code for code in filters.states if code in STATE_CODES]
+            clauses.append(f"state IN ({','.join('?' * len(states))})")
+            params += states
+        for column, op, value in (filters.conditions if filters else ()):
+            if column in _NUMERIC_COLUMNS:
+                clauses.append(f"{column} {_SQL_OPERATORS[op]} ?")
+                params.append(value)
+        sql = "SELECT data FROM colleges"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [json.loads(data) for (data,) in self._connection().execute(sql, params)]
+
+    def vector_index(self):
+        """
+        VectorIndex over every replicated embedding, decoded with one frombuffer call.
+        """
+        rows = self._connection().execute(
+            "SELECT id, embedding FROM colleges WHERE embedding IS NOT NULL ORDER BY id").fetchall()
+        if not rows:
+            raise ValueError(f"Replica {self.path} has no embeddings")
+        matrix = np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.float32).reshape(len(rows), -1)
+        return VectorIndex([college_id for college_id, _ in rows], normalize_rows(matrix.copy()), normalized=True)
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def _to_row(doc_id, data):
+    vector = decode_embedding(data)
+    record = {key: value for key, value in data.items() if key not in EMBEDDING_FIELDS and key != SYNC_FIELD}
+    record["id"] = doc_id
+    numeric = [record.get(NUMERIC_FIELDS[column]) for column in _NUMERIC_COLUMNS]
+    return (
+        doc_id,
+        record.get("school.state"),
+        *numeric,
+        json.dumps(record),
+        vector.astype(np.float32).tobytes() if vector is not None else None,
+        data.get(SYNC_FIELD),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the local SQLite replica of the colleges collection.")
+    parser.add_argument("--replica", default=REPLICA_PATH)
+    args = parser.parse_args()
+
+    from google.cloud import firestore
+    replica = CollegeReplica(args.replica)
+    fetched = replica.sync(firestore.Client())
+    print(f"Fetched {fetched} documents; replica holds {len(replica)} colleges at version {replica.version}")
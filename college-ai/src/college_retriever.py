@@ -0,0 +1,236 @@
+from datetime import datetime
+from typing import Any, List
+
+import numpy as np
+
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+
+from ann_index import IVFIndex
+from college_facets import FacetIndex
+from college_filters import CollegeColumns, parse_query
+from embedding_codec import EMBEDDING_FIELDS, embedding_matrix
+from lexical_index import LEXICAL_FIELDS, LexicalIndex, reciprocal_rank_fusion
+from vector_index import VectorIndex
+
+# Fields shown to the LLM for each retrieved college
+DOCUMENT_FIELDS = {
+    "latest.cost.tuition.in_state": "In-state tuition",
+    "latest.cost.tuition.out_of_state": "Out-of-state tuition",
+    "latest.admissions.admission_rate.overall": "Admission rate",
+    "latest.completion.rate_suppressed.overall": "Completion rate",
+    "latest.student.size": "Student size",
+    "world_rank": "World rank",
+}
+
+
+def load_colleges(firestore_client, collection="colleges"):
+    """
+    Read every college document (including its embedding) from Firestore once.
+    """
+    colleges = []
+    for doc in firestore_client.collection(collection).stream():
+        data = doc.to_dict()
+        data["id"] = doc.id
+        colleges.append(data)
+    return colleges
+
+
+def college_to_record(college, score=None):
+    """
+    The college as a plain, JSON-serializable dict (no embedding), with its score.
+    """
+    record = {key: value for key, value in college.items() if key not in EMBEDDING_FIELDS}
+    if score is not None:
+        record["score"] = score
+    return record
+
+
+def college_to_document(college, score=None):
+    """
+    Render a college record as a LangChain Document for the QA chain.
+    """
+    lines = [f"{college.get('school.name')} in {college.get('school.city')}, {college.get('school.state')}."]
+    for field, label in DOCUMENT_FIELDS.items():
+        if college.get(field) is not None:
+            lines.append(f"{label}: {college[field]}")
+    return Document(page_content="\n".join(lines), metadata=college_to_record(college, score))
+
+
+class CollegeRetriever(BaseRetriever):
+    """
+    LangChain retriever backed by an in-process vector index instead of a Firestore scan.
+
+    The index is the exact VectorIndex built from the colleges, or a separately built
+    IVFIndex from ann_index. An IVFIndex is used as-is only when it covers the same
+    colleges at the same data version; otherwise its lists are refilled from the
+    colleges' own embeddings, so stale or missing ids never break search.
+
+    State and numeric constraints in the query ("in CA", "under $15k tuition") are
+    applied exactly as a vectorized pre-filter over columnar arrays, and only the
+    surviving rows are ranked by vector similarity. With a LexicalIndex, the vector
+    ranking is fused with a BM25 ranking over name, city and state by reciprocal rank
+    fusion, so "colleges in Normal" finds the colleges in Normal.
+
+    With a RankingIndex, "top 100 ranked" style filters work and, if `rank_boost` is
+    set, ranked colleges get an extra 1 / (rrf_k + world rank) share of fused score.
+    """
+
+    index: Any
+    columns: Any
+    embeddings: Any
+    colleges: Any
+    base_mask: Any = None
+    lexical: Any = None
+    data_version: str = ""
+    k: int = 5
+    # How many hits each ranking contributes to the fusion
+    fusion_candidates: int = 50
+    rrf_k: int = 60
+    rankings: Any = None
+    rank_boost: float = 0.0
+    facets: Any = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_colleges(cls, colleges, embeddings, k=5, index=None, rankings=None, rank_boost=0.0,
+                      data_version=None, source_version=None, vectors=None):
+        """
+        `vectors` is a VectorIndex over the colleges' embeddings when the records do
+        not carry them (see CollegeReplica.vector_index). `source_version` is the
+        change marker version the colleges were read at (see CollegeReplica.version),
+        which a separately built IVFIndex must match.
+        """
+        if index is None:
+            index = vectors if vectors is not None else VectorIndex.from_records(colleges)
+        elif isinstance(index, IVFIndex):
+            if vectors is not None:
+                ids, matrix = vectors.ids, vectors.matrix
+            else:
+                positions, matrix = embedding_matrix(colleges)
+                ids = [str(colleges[p]["id"]) for p in positions]
+            if not index.covers(ids, source_version):
+                index = index.reindexed(ids, matrix, source_version)
+        by_id = {str(college["id"]): college for college in colleges}
+        records = [by_id[college_id] for college_id in index.ids]
+        columns = _with_rankings(CollegeColumns.from_records(records), index.ids, rankings)
+        return cls(index=index, columns=columns, embeddings=embeddings, colleges=by_id,
+                   lexical=LexicalIndex.from_records(index.ids, records), rankings=rankings,
+                   facets=FacetIndex.from_columns(columns),
+                   rank_boost=rank_boost, data_version=data_version or f"firestore-{datetime.now().isoformat()}",
+                   k=k)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, embeddings, k=5, index=None, rankings=None, rank_boost=0.0):
+        """
+        Serve search straight from a memory-mapped CollegeSnapshot.
+
+        With a separately built IVFIndex, the snapshot only supplies records and filter
+        columns, reordered to the index's rows. A snapshot without embeddings (built
+        from a colleges file) is served by the lexical index alone.
+        """
+        if snapshot.embeddings is None:
+            ids = [str(college_id) for college_id in snapshot.ids]
+            text = {field: snapshot.text_column(field) for field in LEXICAL_FIELDS}
+            lexical = LexicalIndex.from_records(ids, ({field: text[field][row] for field in text}
+                                                     for row in range(len(snapshot))))
+            return cls(index=None, columns=_with_rankings(snapshot.columns(), ids, rankings), embeddings=embeddings,
+                       colleges=snapshot.records(), lexical=lexical, rankings=rankings, rank_boost=rank_boost,
+                       facets=snapshot.facets(), data_version=snapshot.version, k=k)
+        if index is not None:
+            source_version = snapshot.meta.get("source_version")
+            embedded = np.flatnonzero(snapshot.has_embedding)
+            ids = [str(college_id) for college_id in snapshot.ids[embedded]]
+            if not index.covers(ids, source_version):
+                index = index.reindexed(ids, snapshot.embeddings[embedded], source_version)
+        if index is None:
+            index = snapshot.vector_index()
+            rows = range(len(snapshot))
+            columns, base_mask = snapshot.columns(), snapshot.has_embedding
+            facets = snapshot.facets()
+        else:
+            rows = [snapshot.row_of(college_id) for college_id in index.ids]
+            columns, base_mask = snapshot.columns().take(rows), None
+            facets = snapshot.facets().take(rows)
+        text = {field: snapshot.text_column(field) for field in LEXICAL_FIELDS}
+        lexical = LexicalIndex.from_records(index.ids, ({field: text[field][row] for field in text} for row in rows))
+        return cls(index=index, columns=_with_rankings(columns, index.ids, rankings), embeddings=embeddings,
+                   colleges=snapshot.records(), base_mask=base_mask, lexical=lexical, rankings=rankings,
+                   rank_boost=rank_boost, facets=facets, data_version=snapshot.version, k=k)
+
+    def search(self, query, k=None):
+        """
+        Return the top-k (college id, score) pairs that satisfy the query's filters.
+        """
+        mask = self._mask(query)
+        if mask is not None and not mask.any():
+            return []
+        k = k or self.k
+        boost = self.rankings is not None and self.rank_boost
+        if self.lexical is None and not boost:
+            return self.index.search(self.embeddings.embed_query(query), k=k, mask=mask)
+        candidates = max(k, self.fusion_candidates)
+        rankings = []
+        if self.index is not None:
+            rankings.append(self.index.search(self.embeddings.embed_query(query), k=candidates, mask=mask))
+        if self.lexical is not None:
+            rankings.append(self.lexical.search(query, k=candidates, mask=mask))
+        fused = reciprocal_rank_fusion([[college_id for college_id, _ in hits] for hits in rankings], k=self.rrf_k)
+        if boost:
+            fused = sorted(((college_id, score + self._rank_bonus(college_id)) for college_id, score in fused),
+                           key=lambda hit: -hit[1])
+        return fused[:k]
+
+    def facet_counts(self, query="", selected=None):
+        """
+        Facet counts for the filter UI over the colleges matching the query's filters
+        and the facet options ticked in `selected` (see FacetIndex.counts).
+        """
+        return self.facets.counts(selected, self._mask(query))
+
+    def _mask(self, query):
+        """
+        Rows the query's filters allow, among those that can be served (base_mask),
+        or None when every row can.
+        """
+        filters = parse_query(query) if query else None
+        mask = self.columns.mask(filters) if filters else None
+        if self.base_mask is not None:
+            mask = self.base_mask if mask is None else mask & self.base_mask
+        return mask
+
+    def _rank_bonus(self, college_id):
+        world_rank = self.rankings.world_rank(college_id)
+        return self.rank_boost / (self.rrf_k + world_rank) if world_rank else 0.0
+
+    def college(self, college_id):
+        """
+        The college record, with its latest world rank when the ranking index has one.
+        """
+        college = self.colleges[college_id]
+        world_rank = self.rankings.world_rank(college_id) if self.rankings is not None else None
+        return college if world_rank is None else dict(college, world_rank=world_rank)
+
+    def exact_match(self, query):
+        """
+        Id of the college the query names outright ("Alabama A & M"), or None.
+
+        Queries with filters are never treated as name lookups.
+        """
+        if self.lexical is None or parse_query(query):
+            return None
+        return self.lexical.exact_match(query)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        hits = self.search(query)
+        return [college_to_document(self.college(college_id), score) for college_id, score in hits]
+
+
+def _with_rankings(columns, ids, rankings):
+    if rankings is not None:
+        columns.numeric["world_rank"] = rankings.column(ids)
+    return columns
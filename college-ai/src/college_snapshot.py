@@ -0,0 +1,368 @@
+import argparse
+from datetime import datetime
+import json
+import os
+import shutil
+
+import numpy as np
+
+from college_facets import FACETS_FILE, FacetIndex
+from college_filters import STATE_CODES, CollegeColumns, NUMERIC_FIELDS
+from embedding_codec import EMBEDDING_FIELDS, embedding_matrix
+from vector_index import COARSE_DIM, VectorIndex, coarse_projection, normalize_rows
+
+SNAPSHOT_FORMAT = 1
+
+# Versioned layout: <root>/versions/<version>/ holds immutable snapshots and
+# <root>/CURRENT names the one readers should open
+VERSIONS_DIR = "versions"
+CURRENT_FILE = "CURRENT"
+# Versions kept on disk after a publish, so processes that have not refreshed yet
+# can still open the one they know about
+KEEP_VERSIONS = 2
+
+# Every numeric field in the colleges collection, stored as a float32 column
+SNAPSHOT_NUMERIC_FIELDS = [
+    "latest.cost.tuition.in_state",
+    "latest.cost.tuition.out_of_state",
+    "latest.admissions.admission_rate.overall",
+    "latest.completion.rate_suppressed.overall",
+    "latest.student.size",
+]
+
+# Text fields, stored as indexes into one interned string table
+SNAPSHOT_STRING_FIELDS = ["school.name", "school.city", "school.state"]
+
+
+def _column_file(field):
+    return field.replace(".", "_") + ".npy"
+
+
+def _new_version():
+    return datetime.now().strftime("%Y%m%dT%H%M%S%f")
+
+
+def build_snapshot(colleges, directory, dim=None, version=None, source_version=None):
+    """
+    Write colleges (dicts, optionally with a float or quantized embedding) as a columnar snapshot.
+
+    The snapshot is a directory of .npy arrays plus meta.json: one float32 array per
+    numeric field (NaN for missing), one int32 array per text field pointing into an
+    interned UTF-8 string table, a unit-normalized float32 embedding matrix (plus
+    the vector index's coarse projection of it, when it has one) and the
+    precomputed filter facets.
+    It is written to a temporary directory and renamed into place when complete.
+    `source_version` records the Firestore change marker the colleges were read at.
+    """
+    ids = []
+    numeric = {field: [] for field in SNAPSHOT_NUMERIC_FIELDS}
+    string_refs = {field: [] for field in SNAPSHOT_STRING_FIELDS}
+    interned = {}
+    vectors = []
+
+    for college in colleges:
+        if "id" not in college:
+            continue
+        ids.append(int(college["id"]))
+        for field in SNAPSHOT_NUMERIC_FIELDS:
+            value = college.get(field)
+            numeric[field].append(np.nan if value is None else float(value))
+        for field in SNAPSHOT_STRING_FIELDS:
+            text = college.get(field) or ""
+            string_refs[field].append(interned.setdefault(text, len(interned)))
+        vectors.append({field: college[field] for field in EMBEDDING_FIELDS if field in college})
+
+    tmp_dir = f"{directory.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, "ids.npy"), np.array(ids, dtype=np.int64))
+    for field, values in numeric.items():
+        np.save(os.path.join(tmp_dir, _column_file(field)), np.array(values, dtype=np.float32))
+    for field, refs in string_refs.items():
+        np.save(os.path.join(tmp_dir, _column_file(field)), np.array(refs, dtype=np.int32))
+
+    encoded = [text.encode("utf-8") for text in interned]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded])
+    with open(os.path.join(tmp_dir, "strings.bin"), "wb") as file:
+        file.write(b"".join(encoded))
+    np.save(os.path.join(tmp_dir, "string_offsets.npy"), offsets)
+
+    state_index = {code: i for i, code in enumerate(STATE_CODES)}
+    strings = list(interned)
+    columns = CollegeColumns(
+        {column: np.array(numeric[field], dtype=np.float32) for column, field in NUMERIC_FIELDS.items()},
+        np.array([state_index.get(strings[ref], -1) for ref in string_refs["school.state"]], dtype=np.int16))
+    FacetIndex.from_columns(columns).save(os.path.join(tmp_dir, FACETS_FILE))
+
+    rows, decoded = embedding_matrix(vectors)
+    if rows and dim is None:
+        dim = decoded.shape[1]
+    coarse_dim = 0
+    if dim:
+        matrix = np.zeros((len(ids), dim), dtype=np.float32)
+        has_embedding = np.zeros(len(ids), dtype=bool)
+        if rows:
+            matrix[rows] = decoded
+            has_embedding[rows] = True
+        matrix = normalize_rows(matrix)
+        np.save(os.path.join(tmp_dir, "embeddings.npy"), matrix)
+        np.save(os.path.join(tmp_dir, "has_embedding.npy"), has_embedding)
+        # The vector index's coarse search stage, so opening the snapshot stays instant
+        projection = coarse_projection(matrix)
+        if projection is not None:
+            np.save(os.path.join(tmp_dir, "embedding_projection.npy"), projection)
+            np.save(os.path.join(tmp_dir, "embedding_coarse.npy"), matrix @ projection)
+        coarse_dim = 0 if projection is None else projection.shape[1]
+
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "version": version or _new_version(),
+        "source_version": source_version,
+        "count": len(ids),
+        "dim": dim,
+        "coarse_dim": coarse_dim,
+        "numeric_fields": SNAPSHOT_NUMERIC_FIELDS,
+        "string_fields": SNAPSHOT_STRING_FIELDS,
+        "strings": len(encoded),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as file:
+        json.dump(meta, file, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+    return meta
+
+
+def publish_snapshot(colleges, root, dim=None, source_version=None, keep=KEEP_VERSIONS):
+    """
+    Build a new immutable snapshot version under `root` and make it current.
+
+    The version directory is complete before CURRENT is replaced by a single
+    rename, so readers open either the old version or the new one, never a mix.
+    Older versions beyond `keep` are then deleted. A snapshot without embeddings
+    cannot serve vector search, so it is discarded and ValueError raised instead.
+    """
+    version = _new_version()
+    os.makedirs(os.path.join(root, VERSIONS_DIR), exist_ok=True)
+    directory = os.path.join(root, VERSIONS_DIR, version)
+    meta = build_snapshot(colleges, directory, dim, version, source_version)
+    if not meta["dim"]:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise ValueError(f"Refusing to publish snapshot {version}: no college has an embedding")
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.tmp")
+    with open(tmp_path, "w") as file:
+        file.write(version)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+    meta["removed"] = collect_snapshots(root, keep)
+    return meta
+
+
+def current_version(root):
+    path = os.path.join(root, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return file.read().strip()
+
+
+def current_snapshot_dir(root):
+    """
+    Directory of the current snapshot under `root`, or None if nothing was published.
+    A flat snapshot written by build_snapshot() directly into `root` also counts.
+    """
+    version = current_version(root)
+    if version:
+        return os.path.join(root, VERSIONS_DIR, version)
+    return root if os.path.exists(os.path.join(root, "meta.json")) else None
+
+
+def collect_snapshots(root, keep=KEEP_VERSIONS, in_use=()):
+    """
+    Delete all but the newest `keep` versions, sparing the current one and `in_use`.
+
+    Returns the versions removed. A process that still maps a removed version keeps
+    reading it; the OS frees the files once they are unmapped.
+    """
+    versions_dir = os.path.join(root, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    # Skip half-built ".tmp" directories; a build may be in progress
+    versions = sorted(name for name in os.listdir(versions_dir) if not name.endswith(".tmp"))
+    spared = set(in_use) | {current_version(root)}
+    removed = []
+    for version in versions[:max(len(versions) - keep, 0)]:
+        if version not in spared:
+            shutil.rmtree(os.path.join(versions_dir, version), ignore_errors=True)
+            removed.append(version)
+    return removed
+
+
+class CollegeSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot written by build_snapshot().
+
+    Opening only maps the files, so start-up takes milliseconds, and every process
+    that opens the same snapshot shares its pages through the OS page cache.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as file:
+            self.meta = json.load(file)
+        if self.meta.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format in {directory}: {self.meta.get('format')}")
+
+        self.ids = self._load("ids.npy")
+        self.numeric = {field: self._load(_column_file(field)) for field in self.meta["numeric_fields"]}
+        self.string_refs = {field: self._load(_column_file(field)) for field in self.meta["string_fields"]}
+        self.string_offsets = self._load("string_offsets.npy")
+        self.string_data = np.memmap(os.path.join(directory, "strings.bin"), dtype=np.uint8, mode="r") \
+            if self.string_offsets[-1] else np.zeros(0, dtype=np.uint8)
+        self.embeddings = self._load("embeddings.npy") if self.meta.get("dim") else None
+        self.has_embedding = self._load("has_embedding.npy") if self.meta.get("dim") else None
+        self._rows_by_id = None
+        self._facets = None
+
+    def _load(self, name):
+        return np.load(os.path.join(self.directory, name), mmap_mode="r")
+
+    @property
+    def version(self):
+        return self.meta["version"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def string(self, index):
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return bytes(self.string_data[start:end]).decode("utf-8")
+
+    def text_column(self, field):
+        """
+        Decoded values of a text field for every row, decoding each distinct string once.
+        """
+        refs, inverse = np.unique(self.string_refs[field], return_inverse=True)
+        data, offsets = bytes(self.string_data), self.string_offsets.tolist()
+        strings = [data[offsets[ref]:offsets[ref + 1]].decode("utf-8") for ref in refs.tolist()]
+        return [strings[i] for i in inverse.tolist()]
+
+    def row_of(self, college_id):
+        if self._rows_by_id is None:
+            self._rows_by_id = {int(college_id): row for row, college_id in enumerate(self.ids)}
+        return self._rows_by_id[int(college_id)]
+
+    def record(self, row):
+        """
+        Rebuild the college dict (dotted keys, no embedding) for a row.
+        """
+        record = {}
+        for field, values in self.numeric.items():
+            value = float(values[row])
+            if np.isnan(value):
+                record[field] = None
+            elif value.is_integer() and "rate" not in field:
+                record[field] = int(value)
+            else:
+                # Undo float32 noise, e.g. 0.684 -> 0.6840000152587891
+                record[field] = round(value, 6)
+        for field, refs in self.string_refs.items():
+            record[field] = self.string(refs[row])
+        record["id"] = int(self.ids[row])
+        return record
+
+    def records(self):
+        """
+        Mapping-style view of the colleges keyed by string id, as the retriever expects.
+        """
+        return SnapshotRecords(self)
+
+    def columns(self):
+        """
+        Filter columns for college_filters, read straight from the mapped arrays.
+        """
+        numeric = {column: self.numeric[field] for column, field in NUMERIC_FIELDS.items()}
+        state_index = {code: i for i, code in enumerate(STATE_CODES)}
+        refs, inverse = np.unique(self.string_refs["school.state"], return_inverse=True)
+        codes = np.array([state_index.get(self.string(ref), -1) for ref in refs], dtype=np.int16)
+        return CollegeColumns(numeric, codes[inverse])
+
+    def facets(self):
+        """
+        FacetIndex precomputed by build_snapshot(); built from the columns for older snapshots.
+        """
+        if self._facets is None:
+            path = os.path.join(self.directory, FACETS_FILE)
+            self._facets = FacetIndex.load(path) if os.path.exists(path) else FacetIndex.from_columns(self.columns())
+        return self._facets
+
+    def vector_index(self):
+        if self.embeddings is None:
+            raise ValueError(f"Snapshot {self.directory} has no embeddings")
+        ids = [str(college_id) for college_id in self.ids]
+        if self.meta.get("coarse_dim"):
+            return VectorIndex(ids, self.embeddings, normalized=True, projection=self._load("embedding_projection.npy"),
+                               coarse=self._load("embedding_coarse.npy"))
+        # Snapshots written before the coarse stage existed derive it here; 0 means exact search
+        return VectorIndex(ids, self.embeddings, normalized=True, coarse_dim=self.meta.get("coarse_dim", COARSE_DIM))
+
+
+class SnapshotRecords:
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def __getitem__(self, college_id):
+        return self._snapshot.record(self._snapshot.row_of(college_id))
+
+    def __contains__(self, college_id):
+        try:
+            self._snapshot.row_of(college_id)
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._snapshot)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a columnar, memory-mappable college snapshot.")
+    parser.add_argument("--out", default="college_snapshot")
+    parser.add_argument("--colleges", help="Build from a colleges JSON/NDJSON file (no embeddings).")
+    parser.add_argument("--publish", action="store_true",
+                        help="Publish a new version under --out instead of overwriting it in place.")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="Versions to keep when publishing.")
+    args = parser.parse_args()
+
+    source_version = None
+    if args.colleges:
+        from college_stream import iter_colleges
+        source = iter_colleges(args.colleges)
+    else:
+        from google.cloud import firestore
+        from change_marker import SYNC_FIELD, read_change_marker
+        from college_retriever import load_colleges
+        db = firestore.Client()
+        # Every document stamped at or below the marker is committed, so a document
+        # newer than it, or a moved marker, means a writer was still committing
+        # while the collection was being read
+        marker = read_change_marker(db)
+        source = load_colleges(db)
+        source_version = marker["version"] if marker else None
+        newest = max((college.get(SYNC_FIELD) or 0 for college in source), default=0)
+        if newest > (source_version or 0) or read_change_marker(db) != marker:
+            raise SystemExit("The colleges changed while they were being read; publish once the writers finish")
+
+    if args.publish:
+        try:
+            meta = publish_snapshot(source, args.out, source_version=source_version, keep=args.keep)
+        except ValueError as error:
+            raise SystemExit(str(error))
+        print(f"Published snapshot {meta['version']} with {meta['count']} colleges to {args.out}; "
+              f"removed {len(meta['removed'])} old versions")
+    else:
+        meta = build_snapshot(source, args.out, source_version=source_version)
+        print(f"Wrote snapshot {meta['version']} with {meta['count']} colleges to {args.out}")
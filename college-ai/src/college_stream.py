@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+
+READ_CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_colleges(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield college records one at a time from a JSON array or an NDJSON file.
+
+    The format is detected from the first non-whitespace character, and only one
+    read chunk plus the record being decoded are held in memory at a time.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        first = _peek_first_char(file)
+        if first == "[":
+            yield from _iter_json_array(file, chunk_size)
+        elif first:
+            yield from _iter_ndjson(file)
+
+
+def _peek_first_char(file):
+    while True:
+        position = file.tell()
+        char = file.read(1)
+        if not char or char not in _WHITESPACE:
+            file.seek(position)
+            return char
+
+
+def _iter_ndjson(file):
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+
+
+def _iter_json_array(file, chunk_size):
+    buffer = file.read(chunk_size)
+    position = buffer.index("[") + 1
+    eof = False
+
+    while True:
+        # Skip separators, pulling in more data when the buffer runs dry
+        while True:
+            while position < len(buffer) and (buffer[position] in _WHITESPACE or buffer[position] == ","):
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = file.read(chunk_size), 0
+            eof = not buffer
+
+        if position >= len(buffer):
+            raise ValueError("Unexpected end of file inside JSON array")
+        if buffer[position] == "]":
+            return
+
+        try:
+            record, end = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            record, end = None, None
+        # A value that runs to the end of the buffer may continue in the next chunk
+        if end is None or (end == len(buffer) and not eof):
+            chunk = file.read(chunk_size)
+            if not chunk:
+                if end is None:
+                    raise ValueError("Unexpected end of file inside JSON array")
+                eof = True
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        yield record
+        position = end
+
+
+def export_ndjson(source_path, dest_path):
+    """
+    Rewrite a colleges JSON array (or NDJSON file) as NDJSON, one record per line.
+    """
+    count = 0
+    tmp_path = f"{dest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        for record in iter_colleges(source_path):
+            file.write(json.dumps(record, separators=(",", ":")))
+            file.write("\n")
+            count += 1
+    os.replace(tmp_path, dest_path)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export colleges.json as NDJSON.")
+    parser.add_argument("source", nargs="?", default="colleges.json")
+    parser.add_argument("dest", nargs="?", default="colleges.ndjson")
+    args = parser.parse_args()
+    print(f"Exported {export_ndjson(args.source, args.dest)} colleges to {args.dest}")
@@ -0,0 +1,98 @@
+from datetime import datetime
+import json
+import os
+import threading
+import time
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+
+class PageCache:
+    """
+    On-disk cache of raw College Scorecard responses, one file per (state, page).
+
+    Entries older than `ttl` seconds count as misses for a normal crawl, but can
+    still be read with `ignore_ttl=True` when resuming a checkpointed crawl or
+    replaying the cache without network access.
+    """
+
+    def __init__(self, directory, ttl=24 * 3600):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, state, page):
+        return os.path.join(self.directory, state, f"{page:05d}.json")
+
+    def get(self, state, page, ignore_ttl=False):
+        """
+        Return the cached response body, or None if it is missing or expired.
+        """
+        path = self._path(state, page)
+        try:
+            if not ignore_ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, 'r') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, state, page, body):
+        os.makedirs(os.path.join(self.directory, state), exist_ok=True)
+        _write_json_atomic(self._path(state, page), body)
+
+    def iter_pages(self, state):
+        """
+        Yield every cached response body for a state in page order, regardless of age.
+        """
+        page = 0
+        while True:
+            body = self.get(state, page, ignore_ttl=True)
+            if body is None:
+                return
+            yield body
+            page += 1
+
+
+class CrawlCheckpoint:
+    """
+    Per-state progress of an in-flight crawl: how many pages have been fetched and
+    cached, and whether the state's last (empty) page has been reached.
+
+    Every update is written to disk immediately, so a crawl that dies halfway can
+    resume from the cache without refetching pages it already has.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._states = {}
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                self._states = json.load(file).get("states", {})
+
+    def pages_done(self, state):
+        with self._lock:
+            return self._states.get(state, {}).get("pages", 0)
+
+    def is_complete(self, state):
+        with self._lock:
+            return self._states.get(state, {}).get("complete", False)
+
+    def record_page(self, state, page, last=False):
+        with self._lock:
+            progress = self._states.setdefault(state, {"pages": 0, "complete": False})
+            progress["pages"] = max(progress["pages"], page + 1)
+            progress["complete"] = progress["complete"] or last
+            _write_json_atomic(self.path, {"states": self._states, "updated_at": datetime.now().isoformat()})
+
+    def clear(self):
+        with self._lock:
+            self._states = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
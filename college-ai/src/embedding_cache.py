@@ -0,0 +1,104 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+def embedding_key(model, text):
+    """
+    Content address of an embedding: the SHA-256 of the model name and the exact text.
+    """
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Local SQLite store of embeddings keyed by embedding_key(), as float32 blobs.
+
+    One connection is shared by all threads behind a lock; WAL mode keeps readers in
+    other processes from blocking on the embedding job's writes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)")
+        self._connection.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """
+        Return {key: vector} for the keys that are cached.
+        """
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items):
+        """
+        Store (key, vector) pairs, replacing any existing entries.
+        """
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._connection.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class CachedDocumentEmbeddings:
+    """
+    Wraps a LangChain embeddings object so embed_documents() only sends the texts
+    whose (model, text) pair is not in the EmbeddingCache.
+    """
+
+    def __init__(self, embeddings, cache, model=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, "model", type(embeddings).__name__)
+        self.hits = 0
+        self.misses = 0
+        self.api_calls = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        keys = [embedding_key(self.model, text) for text in texts]
+        cached = self.cache.get_many(list(set(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing, vectors))
+            self.cache.put_many(fresh.items())
+            cached.update(fresh)
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            self.api_calls += 1 if missing else 0
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "api_calls": self.api_calls, "cached": len(self.cache)}
@@ -0,0 +1,92 @@
+import numpy as np
+
+# Full-precision embeddings are a plain float list in `embedding`; quantized ones are
+# raw bytes in `embedding_q`, with their dtype and per-vector scale alongside
+QUANTIZED_FIELDS = ("embedding_q", "embedding_dtype", "embedding_scale")
+# embedding_cache.embedding_key() of the model and text the embedding was made from
+EMBEDDING_KEY_FIELD = "embedding_key"
+EMBEDDING_FIELDS = ("embedding", EMBEDDING_KEY_FIELD) + QUANTIZED_FIELDS
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+
+def encode_embedding(vector, storage="int8"):
+    """
+    Firestore fields storing a vector as float32 (a list), float16 or int8 (bytes).
+
+    int8 is symmetric per vector: each component is round(x / scale) with
+    scale = max|x| / 127, i.e. 1 byte per dimension instead of 8 for a Firestore double.
+    """
+    if storage == "float32":
+        return {"embedding": [float(x) for x in vector]}
+    vector = np.asarray(vector, dtype=np.float32)
+    if storage == "float16":
+        return {"embedding_q": vector.astype("<f2").tobytes(), "embedding_dtype": "float16",
+                "embedding_scale": 1.0}
+    if storage == "int8":
+        peak = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        codes = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return {"embedding_q": codes.tobytes(), "embedding_dtype": "int8", "embedding_scale": scale}
+    raise ValueError(f"Unknown embedding storage type: {storage}")
+
+
+def has_embedding(record):
+    return bool(record.get("embedding")) or bool(record.get("embedding_q"))
+
+
+def embedding_storage(record):
+    """
+    The storage type (one of STORAGE_TYPES) of the record's embedding, or None.
+    """
+    if record.get("embedding_q"):
+        return record.get("embedding_dtype", "int8")
+    return "float32" if record.get("embedding") else None
+
+
+def decode_embedding(record):
+    """
+    The record's embedding as a float32 array, or None if it has none.
+    """
+    rows, matrix = embedding_matrix([record])
+    return matrix[0] if rows else None
+
+
+def embedding_matrix(records):
+    """
+    Decode the embeddings of many records at once.
+
+    Returns (positions, matrix): the indexes of the records that have an embedding,
+    and a float32 matrix with one row per such record, in the same order. Quantized
+    vectors of each dtype are decoded with one frombuffer call and one multiply.
+    """
+    positions, plain, quantized = [], {}, {"int8": {}, "float16": {}}
+    for position, record in enumerate(records):
+        if record.get("embedding_q"):
+            quantized[record.get("embedding_dtype", "int8")][len(positions)] = record
+        elif record.get("embedding"):
+            plain[len(positions)] = record["embedding"]
+        else:
+            continue
+        positions.append(position)
+    if not positions:
+        return [], np.zeros((0, 0), dtype=np.float32)
+
+    blocks = []
+    if plain:
+        blocks.append((list(plain), np.array(list(plain.values()), dtype=np.float32)))
+    for dtype, group in quantized.items():
+        if not group:
+            continue
+        codes = np.frombuffer(b"".join(record["embedding_q"] for record in group.values()),
+                              dtype=np.int8 if dtype == "int8" else "<f2")
+        scales = np.array([record.get("embedding_scale", 1.0) for record in group.values()], dtype=np.float32)
+        block = codes.reshape(len(group), -1).astype(np.float32)
+        block *= scales[:, None]
+        blocks.append((list(group), block))
+
+    if len(blocks) == 1:
+        return positions, blocks[0][1]
+    matrix = np.empty((len(positions), blocks[0][1].shape[1]), dtype=np.float32)
+    for slots, block in blocks:
+        matrix[slots] = block
+    return positions, matrix
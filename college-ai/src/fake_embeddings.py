@@ -0,0 +1,71 @@
+import hashlib
+import re
+import threading
+import time
+
+import numpy as np
+
+
+class FakeEmbeddings:
+    """
+    Local stand-in for LangChain's OpenAIEmbeddings.
+
+    Each word gets a fixed pseudo-random unit vector derived from its hash, and a
+    text embeds as the normalized sum of its words' vectors. Texts that share words
+    therefore land close together, which is enough for search benchmarks to measure
+    meaningful recall without network access or an API key. `latency` simulates the
+    round trip of each API call.
+    """
+
+    def __init__(self, dim=256, latency=0.0, model="fake-embedding"):
+        self.dim = dim
+        self.latency = latency
+        self.model = model
+        self.calls = 0
+        self.texts = 0
+        self._vocabulary = {}
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def _word_rows(self, words):
+        rows = []
+        new = []
+        with self._lock:
+            for word in words:
+                row = self._vocabulary.get(word)
+                if row is None:
+                    row = self._vocabulary[word] = len(self._vocabulary)
+                    new.append(word)
+                rows.append(row)
+            if new:
+                vectors = np.stack([self._word_vector(word) for word in new])
+                self._vectors = np.concatenate([self._vectors, vectors])
+            return rows, self._vectors
+
+    def _word_vector(self, word):
+        seed = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed_matrix(self, texts):
+        """
+        Embed many texts as one (len(texts), dim) float32 matrix of unit rows.
+        """
+        words = [re.findall(r"\w+", text.lower()) or [""] for text in texts]
+        rows, vectors = self._word_rows([word for text_words in words for word in text_words])
+        starts = np.cumsum([0] + [len(text_words) for text_words in words[:-1]])
+        matrix = np.add.reduceat(vectors[rows], starts, axis=0) if texts else np.zeros((0, self.dim), np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return matrix / norms
+
+    def embed_documents(self, texts):
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text):
+        return self.embed_matrix([text])[0].tolist()
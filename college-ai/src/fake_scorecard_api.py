@@ -0,0 +1,104 @@
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from college_stream import iter_colleges
+
+
+class FakeScorecardAPI:
+    """
+    Local stand-in for the College Scorecard schools endpoint, serving colleges.json.
+
+    Answers GET /v1/schools?school.state=XX&page=N&per_page=M in the same shape as the
+    real API, with optional per-request latency and scripted 429 responses, so the
+    crawler can be exercised end to end without network access or an API key.
+    """
+
+    def __init__(self, colleges_path="colleges.json", latency=0.0, fail_every=0, port=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.by_state = defaultdict(list)
+        for college in iter_colleges(colleges_path):
+            self.by_state[college.get("school.state")].append(college)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/schools"
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with api._lock:
+                    api.requests += 1
+                    throttled = api.fail_every and api.requests % api.fail_every == 0
+                if api.latency:
+                    time.sleep(api.latency)
+                if throttled:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+
+                query = parse_qs(urlparse(self.path).query)
+                state = query.get("school.state", [None])[0]
+                page = int(query.get("page", [0])[0])
+                per_page = int(query.get("per_page", [20])[0])
+                colleges = api.by_state.get(state, [])
+                body = json.dumps({
+                    "metadata": {"total": len(colleges), "page": page, "per_page": per_page},
+                    "results": colleges[page * per_page:(page + 1) * per_page],
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve colleges.json as a fake College Scorecard API.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer every Nth request with a 429.")
+    args = parser.parse_args()
+
+    api = FakeScorecardAPI(args.colleges, args.latency_ms / 1000, args.fail_every, args.port)
+    print(f"Serving fake College Scorecard API at {api.url} (set SCORECARD_API_URL to use it)")
+    api.start()
+    try:
+        api._thread.join()
+    except KeyboardInterrupt:
+        api.stop()
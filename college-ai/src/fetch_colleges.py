@@ -1,37 +1,249 @@
 from flask import Request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import argparse
+import json
 import os
+import queue
+import threading
+import time
 import requests
 from google.cloud import firestore
 
+from crawl_cache import CrawlCheckpoint, PageCache
+from rate_limit import TokenBucket
+from upload_to_firestore import upload_colleges
+
+SCORECARD_API_URL = os.getenv("SCORECARD_API_URL", "https://api.data.gov/ed/collegescorecard/v1/schools")
+SCORECARD_API_KEY = os.getenv("COLLEGE_SCORECARD_API_KEY")
+
+# Fields requested from the College Scorecard API, matching colleges.json
+FIELDS = [
+    "id",
+    "school.name",
+    "school.city",
+    "school.state",
+    "latest.cost.tuition.in_state",
+    "latest.cost.tuition.out_of_state",
+    "latest.admissions.admission_rate.overall",
+    "latest.completion.rate_suppressed.overall",
+    "latest.student.size",
+]
+
+STATES = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY",
+          "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND",
+          "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY"]
+
+# Crawl tuning
+MAX_WORKERS = int(os.getenv("SCORECARD_MAX_WORKERS", 8))
+REQUESTS_PER_SECOND = float(os.getenv("SCORECARD_REQUESTS_PER_SECOND", 5))
+REQUEST_BURST = int(os.getenv("SCORECARD_REQUEST_BURST", 10))
+PAGE_QUEUE_SIZE = int(os.getenv("SCORECARD_PAGE_QUEUE_SIZE", 16))
+MAX_RETRIES = 3
+
+# Cloud Functions can only write under /tmp; a warm instance reuses these
+MANIFEST_PATH = os.getenv("COLLEGES_MANIFEST_PATH", "/tmp/colleges_manifest.json")
+CACHE_DIR = os.getenv("SCORECARD_CACHE_DIR", "/tmp/scorecard_cache")
+CACHE_TTL_SECONDS = int(os.getenv("SCORECARD_CACHE_TTL_SECONDS", 24 * 3600))
+CHECKPOINT_PATH = os.getenv("SCORECARD_CHECKPOINT_PATH", "/tmp/crawl_checkpoint.json")
+
+# One bucket shared by every crawler thread keeps us under the API quota
+rate_limiter = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+_sessions = threading.local()
+
+
+def _session():
+    if not hasattr(_sessions, "session"):
+        _sessions.session = requests.Session()
+    return _sessions.session
+
+
+def fetch_scorecard_page(state, page=0, per_page=100):
+    """
+    Fetch the raw API response for one page of a state, retrying on 429 and 5xx responses.
+    """
+    params = {
+        "school.state": state,
+        "fields": ",".join(FIELDS),
+        "page": page,
+        "per_page": per_page,
+    }
+    if SCORECARD_API_KEY:
+        params["api_key"] = SCORECARD_API_KEY
+
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limiter.acquire()
+        response = _session().get(SCORECARD_API_URL, params=params, timeout=30)
+        if response.status_code == 429 or response.status_code >= 500:
+            if attempt == MAX_RETRIES:
+                response.raise_for_status()
+            retry_after = response.headers.get("Retry-After")
+            time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt)
+            continue
+        response.raise_for_status()
+        return response.json()
+
+
 # Fetch colleges for a single state
 def fetch_colleges_by_state(state, page=0, per_page=100):
-    # Your existing fetch_colleges_by_state function code here
-    ...
+    return fetch_scorecard_page(state, page, per_page).get("results", [])
+
+
+class StateCrawler:
+    """
+    Crawls every page of every state on a bounded worker pool.
+
+    Iterating the crawler yields colleges as their pages arrive. Pages pass through a
+    bounded queue, so a slow consumer applies back-pressure to the crawl instead of
+    letting pages pile up in memory. States that fail are recorded in `failures`
+    rather than aborting the other states.
+
+    With a PageCache, raw responses are stored on disk and fresh entries are reused
+    instead of refetched. With a CrawlCheckpoint as well, pages recorded by an
+    interrupted run are read back from the cache whatever their age, so a rerun
+    picks up where the last one died.
+    """
+
+    _DONE = object()
+
+    def __init__(self, states=STATES, fetch_page=fetch_scorecard_page, max_workers=MAX_WORKERS,
+                 per_page=100, queue_size=PAGE_QUEUE_SIZE, cache=None, checkpoint=None):
+        self.states = list(states)
+        self.fetch_page = fetch_page
+        self.max_workers = max_workers
+        self.per_page = per_page
+        self.queue_size = queue_size
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.pages_fetched = 0
+        self.pages_cached = 0
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def _load_page(self, state, page, checkpointed):
+        body = None
+        if self.cache:
+            body = self.cache.get(state, page, ignore_ttl=checkpointed)
+        if body is not None:
+            with self._lock:
+                self.pages_cached += 1
+            return body
+
+        body = self.fetch_page(state, page=page, per_page=self.per_page)
+        with self._lock:
+            self.pages_fetched += 1
+        if self.cache:
+            self.cache.put(state, page, body)
+        return body
+
+    def _put(self, pages, stop, item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _crawl_state(self, state, pages, stop):
+        try:
+            pages_done = self.checkpoint.pages_done(state) if self.checkpoint else 0
+            page = 0
+            while not stop.is_set():
+                colleges = self._load_page(state, page, checkpointed=page < pages_done).get("results", [])
+                if self.checkpoint:
+                    self.checkpoint.record_page(state, page, last=not colleges)
+                if not colleges:
+                    break
+                if not self._put(pages, stop, colleges):
+                    break
+                page += 1
+        except Exception as e:
+            print(f"Failed to crawl {state}: {e}")
+            with self._lock:
+                self.failures[state] = str(e)
+        finally:
+            self._put(pages, stop, self._DONE)
+
+    def __iter__(self):
+        pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for state in self.states:
+                executor.submit(self._crawl_state, state, pages, stop)
+            remaining = len(self.states)
+            while remaining:
+                item = pages.get()
+                if item is self._DONE:
+                    remaining -= 1
+                    continue
+                yield from item
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+
 
 # Upload colleges to Firestore
-def upload_to_firestore(colleges):
-    # Your existing upload_to_firestore function code here
-    ...
+def upload_to_firestore(colleges, db=None):
+    """
+    Stream colleges into Firestore, writing only those that changed since the last sync.
+    """
+    return upload_colleges(colleges, db or firestore.Client(), manifest_path=MANIFEST_PATH)
+
 
 # Entry-point function
 def update_colleges(request: Request):
     """
     HTTP-triggered Cloud Function to update college data.
     """
-    STATES = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY",
-              "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND",
-              "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY"]
-    all_colleges = []
-
-    for state in STATES:
-        page = 0
-        while True:
-            colleges = fetch_colleges_by_state(state, page=page, per_page=100)
-            if not colleges:
-                break
-            all_colleges.extend(colleges)
-            page += 1
-
-    upload_to_firestore(all_colleges)
+    started = datetime.now()
+    checkpoint = CrawlCheckpoint(CHECKPOINT_PATH)
+    crawler = StateCrawler(cache=PageCache(CACHE_DIR, CACHE_TTL_SECONDS), checkpoint=checkpoint)
+    changed = upload_to_firestore(crawler)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Fetched {crawler.pages_fetched} pages ({crawler.pages_cached} from cache), "
+          f"{changed} colleges changed in {elapsed:.1f}s")
+    if crawler.failures:
+        failed = ", ".join(sorted(crawler.failures))
+        return f"Colleges partially updated; failed states: {failed}", 500
+    # The next scheduled crawl starts fresh; the page cache still honours its TTL
+    checkpoint.clear()
     return "Colleges updated successfully!", 200
+
+
+def replay_cache(cache, output_path, states=STATES):
+    """
+    Rebuild colleges.json from cached API responses only, without touching the network.
+    """
+    count = 0
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w') as file:
+        file.write("[")
+        for state in states:
+            for body in cache.iter_pages(state):
+                for college in body.get("results", []):
+                    file.write(",\n    " if count else "\n    ")
+                    file.write(json.dumps(college))
+                    count += 1
+        file.write("\n]\n")
+    os.replace(tmp_path, output_path)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the College Scorecard API into Firestore.")
+    parser.add_argument("--replay", action="store_true",
+                        help="Rebuild colleges.json from the page cache with no network access.")
+    parser.add_argument("--output", default="colleges.json")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.replay:
+        count = replay_cache(PageCache(args.cache_dir), args.output)
+        print(f"Wrote {count} colleges from {args.cache_dir} to {args.output}")
+    else:
+        CACHE_DIR = args.cache_dir
+        message, status = update_colleges(None)
+        print(message)
@@ -1,37 +1,285 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from google.cloud import firestore
 from langchain.embeddings import OpenAIEmbeddings
 from dotenv import load_dotenv
+import argparse
+import json
 import os
 
+from ann_index import IVFIndex
+from change_marker import commit_changes, read_change_marker
+from college_stream import iter_colleges
+from embedding_cache import CachedDocumentEmbeddings, EmbeddingCache, embedding_key
+from embedding_codec import (EMBEDDING_FIELDS, EMBEDDING_KEY_FIELD, STORAGE_TYPES, decode_embedding,
+                             embedding_storage, encode_embedding)
+
 # Load environment variables
 load_dotenv()
 
 # Initialize Firestore client
 firestore_client = firestore.Client()
 
-# Initialize LangChain embeddings
+# Initialize LangChain embeddings. Descriptions rarely change, so embeddings are
+# cached locally by hash(model + text) and only cache misses reach the API.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
 embeddings = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
+# Part of the embedding key stored on each college, so a new model re-embeds everything
+EMBEDDING_MODEL = getattr(embeddings, "model", type(embeddings).__name__)
+if EMBEDDING_CACHE_PATH:
+    embeddings = CachedDocumentEmbeddings(embeddings, EmbeddingCache(EMBEDDING_CACHE_PATH), model=EMBEDDING_MODEL)
+
+# Batching defaults; each batch is one embed_documents call
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 100))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", 4))
+CHECKPOINT_PATH = os.getenv("EMBEDDING_CHECKPOINT_PATH", "embeddings_checkpoint.json")
+# How embeddings are stored on college documents: "int8", "float16" or "float32"
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "int8")
+# Save the ANN index (and advance the checkpoint with it) every N batches
+ANN_SAVE_EVERY = int(os.getenv("ANN_SAVE_EVERY", 10))
+
+
+def load_checkpoint(path):
+    """
+    Return the last doc id recorded in the checkpoint file, or None to start from scratch.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file).get("last_doc_id")
+
+
+def save_checkpoint(path, last_doc_id):
+    """
+    Atomically record the last doc id whose embedding has been written.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump({"last_doc_id": last_doc_id, "updated_at": datetime.now().isoformat()}, file)
+    os.replace(tmp_path, path)
+
+
+def stream_colleges(colleges_ref, start_after_id=None):
+    """
+    Stream (doc_id, data) pairs in document-id order, optionally resuming after a given id.
+    """
+    query = colleges_ref.order_by(firestore.FieldPath.document_id())
+    if start_after_id is not None:
+        query = query.start_after(colleges_ref.document(start_after_id).get())
+    for doc in query.stream():
+        yield doc.id, doc.to_dict()
+
+
+def stream_colleges_from_file(path, start_after_id=None):
+    """
+    Stream (doc_id, data) pairs straight from colleges.json or its NDJSON export,
+    in file order, optionally resuming after a given id.
+    """
+    skipping = start_after_id is not None
+    for college in iter_colleges(path):
+        if "id" not in college:
+            continue
+        doc_id = str(college["id"])
+        if skipping:
+            skipping = doc_id != start_after_id
+            continue
+        yield doc_id, college
+
+
+def describe_college(data):
+    """
+    Build the text that gets embedded for a college, or None if required fields are missing.
+    """
+    if 'school.name' not in data or 'school.city' not in data or 'school.state' not in data:
+        return None
+    return f"{data['school.name']} in {data['school.city']}, {data['school.state']}."
+
+
+def stored_embedding(data, key, storage=EMBEDDING_STORAGE):
+    """
+    The embedding a document already holds, if it was made from the description
+    with embedding key `key` and is stored as `storage`; otherwise None.
+    """
+    if data.get(EMBEDDING_KEY_FIELD) != key or embedding_storage(data) != storage:
+        return None
+    return decode_embedding(data)
 
-def add_embeddings_to_firestore():
+
+def iter_batches(docs, batch_size, storage=EMBEDDING_STORAGE):
+    """
+    Group streamed (doc_id, data) pairs into batches of (doc_id, name, description,
+    key, stored): the description's embedding key and, if the document already holds
+    that embedding in `storage` format, the stored vector.
+
+    Each yielded batch also carries the id of the last document streamed, including
+    skipped ones, so the checkpoint always advances past everything already seen.
+    """
+    batch = []
+    last_doc_id = None
+    for doc_id, data in docs:
+        last_doc_id = doc_id
+        description = describe_college(data)
+        if description is None:
+            print(f"Skipping document {doc_id}: Missing required fields.")
+            continue
+        key = embedding_key(EMBEDDING_MODEL, description)
+        batch.append((doc_id, data['school.name'], description, key, stored_embedding(data, key, storage)))
+        if len(batch) >= batch_size:
+            yield batch, last_doc_id
+            batch = []
+    if batch or last_doc_id is not None:
+        yield batch, last_doc_id
+
+
+def embedding_update(embedding, storage=EMBEDDING_STORAGE, key=None):
+    """
+    Document update storing `embedding` in the given format, with the embedding key
+    of its description, and removing any embedding fields left over from a
+    different format.
+    """
+    update = encode_embedding(embedding, storage)
+    if key is not None:
+        update[EMBEDDING_KEY_FIELD] = key
+    for field in EMBEDDING_FIELDS:
+        update.setdefault(field, firestore.DELETE_FIELD)
+    return update
+
+
+def with_stored_embeddings(colleges_ref, batch, storage=EMBEDDING_STORAGE):
+    """
+    Fill in the stored embeddings of a batch streamed from a file, which carries
+    none, by reading the documents' embedding fields with a single get_all call.
+    """
+    refs = [colleges_ref.document(doc_id) for doc_id, *_ in batch]
+    current = {snapshot.id: snapshot.to_dict()
+               for snapshot in firestore_client.get_all(refs, field_paths=list(EMBEDDING_FIELDS)) if snapshot.exists}
+    return [(doc_id, name, description, key, stored_embedding(current.get(doc_id, {}), key, storage))
+            for doc_id, name, description, key, _ in batch]
+
+
+def embed_and_store_batch(colleges_ref, batch, storage=EMBEDDING_STORAGE, read_stored=False):
+    """
+    Embed the descriptions of a batch that have no up-to-date stored embedding with
+    a single API call and write them back to Firestore. Documents whose stored
+    embedding key and storage format already match are neither embedded nor written.
+
+    The updates are committed before returning, so the caller can checkpoint the batch.
+    Returns the (doc_id, embedding) pairs of the whole batch, the sync version the
+    new embeddings were committed at (None if there were none) and their count.
+    """
+    if read_stored:
+        batch = with_stored_embeddings(colleges_ref, batch, storage)
+    stale = [(doc_id, name, description, key) for doc_id, name, description, key, stored in batch if stored is None]
+    if not stale:
+        return [(doc_id, stored) for doc_id, _, _, _, stored in batch], None, 0
+    vectors = embeddings.embed_documents([description for _, _, description, _ in stale])
+    version = commit_changes(firestore_client, {
+        doc_id: embedding_update(embedding, storage, key) for (doc_id, _, _, key), embedding in zip(stale, vectors)
+    }, source="generate_embeddings", merge=False, max_workers=1)
+    for doc_id, name, _, _ in stale:
+        print(f"Added embedding for {name} (ID: {doc_id})")
+    embedded = {doc_id: embedding for (doc_id, _, _, _), embedding in zip(stale, vectors)}
+    return [(doc_id, embedded.get(doc_id, stored)) for doc_id, _, _, _, stored in batch], version, len(stale)
+
+
+def add_embeddings_to_firestore(batch_size=DEFAULT_BATCH_SIZE, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                                checkpoint_path=CHECKPOINT_PATH, source_path=None, ann_index_path=None,
+                                storage=EMBEDDING_STORAGE):
     """
     Fetch college data from Firestore, generate embeddings, and store them back in Firestore.
+
+    With `source_path`, descriptions are read by streaming that colleges file instead
+    of scanning the collection; the embeddings are still written to Firestore.
+
+    Descriptions are embedded in batches, with at most `max_concurrency` batches in
+    flight. Batches are retired in stream order and the checkpoint only moves once a
+    batch and everything before it is stored, so a crashed run resumes where it stopped.
+
+    Embeddings are stored as `storage` (int8 by default; see embedding_codec), with
+    the embedding key of their description. Documents whose stored key and format
+    already match are skipped, so a run over unchanged colleges writes nothing and
+    replicas have nothing to fetch. Each batch is committed with
+    change_marker.commit_changes, so read replicas pick the new embeddings up as
+    soon as it is stored.
+
+    With `ann_index_path`, every stored embedding is also inserted into an IVF index
+    that search_colleges.py can load. The index is saved every ANN_SAVE_EVERY batches
+    and the checkpoint only advances when it is, so the two never disagree.
     """
     colleges_ref = firestore_client.collection('colleges')
-    docs = colleges_ref.stream()
+    last_doc_id = load_checkpoint(checkpoint_path) if checkpoint_path else None
+    if last_doc_id is not None:
+        print(f"Resuming after document {last_doc_id}")
+    ann_index = None
+    if ann_index_path:
+        resume = last_doc_id is not None and os.path.exists(ann_index_path)
+        ann_index = IVFIndex.load(ann_index_path) if resume else IVFIndex()
 
-    for doc in docs:
-        data = doc.to_dict()
-        if 'school.name' not in data or 'school.city' not in data or 'school.state' not in data:
-            print(f"Skipping document {doc.id}: Missing required fields.")
-            continue
+    if source_path:
+        docs = stream_colleges_from_file(source_path, start_after_id=last_doc_id)
+    else:
+        docs = stream_colleges(colleges_ref, start_after_id=last_doc_id)
+    total = unchanged = 0
+    retired = 0
+    pending = []
+    # With no embedding to write, the index matches the colleges as of this marker
+    marker = read_change_marker(firestore_client)
+    version = marker["version"] if marker else None
 
-        # Create a description for the embedding
-        description = f"{data['school.name']} in {data['school.city']}, {data['school.state']}."
-        embedding = embeddings.embed_query(description)
+    def retire_oldest():
+        nonlocal total, unchanged, retired, version
+        future, batch_last_id = pending.pop(0)
+        stored, batch_version, written = future.result()
+        total += written
+        unchanged += len(stored) - written
+        retired += 1
+        if batch_version is not None and (version is None or batch_version > version):
+            version = batch_version
+        if ann_index is not None:
+            if stored:
+                ann_index.add([doc_id for doc_id, _ in stored], [embedding for _, embedding in stored])
+            if retired % ANN_SAVE_EVERY:
+                return
+            ann_index.save(ann_index_path)
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, batch_last_id)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        for batch, batch_last_id in iter_batches(docs, batch_size, storage):
+            pending.append((executor.submit(embed_and_store_batch, colleges_ref, batch, storage, bool(source_path)),
+                            batch_last_id))
+            while len(pending) >= max_concurrency:
+                retire_oldest()
+        while pending:
+            retire_oldest()
+
+    if ann_index is not None:
+        # Complete now: it matches the colleges as of the last commit of this run,
+        # unless another job committed after it
+        ann_index.data_version = version
+        ann_index.save(ann_index_path)
+        print(f"Saved ANN index with {len(ann_index)} vectors to {ann_index_path}")
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Embedded {total} colleges, {unchanged} unchanged.")
+    if isinstance(embeddings, CachedDocumentEmbeddings):
+        stats = embeddings.stats()
+        print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses, {stats['api_calls']} API calls")
+    return total
 
-        # Add the embedding back into Firestore
-        colleges_ref.document(doc.id).update({"embedding": embedding})
-        print(f"Added embedding for {data['school.name']} (ID: {doc.id})")
 
 if __name__ == "__main__":
-    add_embeddings_to_firestore()
+    parser = argparse.ArgumentParser(description="Generate embeddings for every college in Firestore.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint.")
+    parser.add_argument("--source", help="Read colleges from this JSON/NDJSON file instead of Firestore.")
+    parser.add_argument("--ann-index", help="Also insert embeddings into an IVF index saved at this path.")
+    parser.add_argument("--storage", choices=STORAGE_TYPES, default=EMBEDDING_STORAGE)
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    add_embeddings_to_firestore(args.batch_size, args.concurrency, args.checkpoint, args.source, args.ann_index,
+                                args.storage)
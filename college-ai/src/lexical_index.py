@@ -0,0 +1,146 @@
+from bisect import bisect_left
+from collections import defaultdict
+import re
+
+import numpy as np
+
+from college_filters import STATE_NAMES
+
+# Fields searched lexically; names matter most, so they are repeated in the text
+LEXICAL_FIELDS = {"school.name": 2, "school.city": 1, "school.state": 1}
+
+# Query filler that would otherwise match half the collection
+STOPWORDS = {
+    "a", "an", "the", "in", "at", "for", "from", "near", "of", "and", "or", "with",
+    "show", "me", "find", "list", "what", "which", "are", "is",
+    "school", "schools", "college", "colleges", "university", "universities",
+}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|&")
+_STATE_FULL_NAMES = {code: name for name, code in STATE_NAMES.items()}
+
+
+def tokenize(text):
+    """
+    Lower-case word tokens; "&" is kept so "A&M" and "A & M" both become a, &, m.
+    """
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+def normalize_name(text):
+    return " ".join(tokenize(text))
+
+
+def reciprocal_rank_fusion(rankings, k=60, limit=None):
+    """
+    Merge ranked id lists: each id scores sum(1 / (k + rank)) over the lists it is in.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, college_id in enumerate(ranking, start=1):
+            scores[college_id] += 1.0 / (k + rank)
+    fused = sorted(scores.items(), key=lambda item: -item[1])
+    return fused[:limit] if limit else fused
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over college name, city and state, row-aligned with a vector index.
+
+    Postings are NumPy arrays of (row, term frequency), so a query scores every
+    matching row with a handful of vectorized adds. Normalized names are also kept
+    sorted for exact and unique-prefix name lookups.
+    """
+
+    def __init__(self, ids, documents, names, k1=1.2, b=0.75):
+        self.ids = list(ids)
+        self.k1 = k1
+        self.b = b
+        postings = defaultdict(lambda: defaultdict(int))
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for row, tokens in enumerate(documents):
+            lengths[row] = len(tokens)
+            for token in tokens:
+                postings[token][row] += 1
+        average_length = lengths.mean() if len(lengths) else 0.0
+        self._length_norm = k1 * (1 - b + b * lengths / average_length) if average_length else lengths
+        self._postings = {}
+        for token, rows in postings.items():
+            self._postings[token] = (np.fromiter(rows.keys(), dtype=np.int64, count=len(rows)),
+                                     np.fromiter(rows.values(), dtype=np.float32, count=len(rows)))
+        self._rows_by_name = defaultdict(list)
+        for row, name in enumerate(names):
+            self._rows_by_name[normalize_name(name)].append(row)
+        self._sorted_names = sorted(self._rows_by_name)
+
+    @classmethod
+    def from_records(cls, ids, records, **params):
+        documents, names = [], []
+        for record in records:
+            tokens = []
+            for field, weight in LEXICAL_FIELDS.items():
+                tokens += tokenize(record.get(field)) * weight
+            state = _STATE_FULL_NAMES.get(record.get("school.state"))
+            if state:
+                tokens += tokenize(state)
+            documents.append(tokens)
+            names.append(record.get("school.name") or "")
+        return cls(ids, documents, names, **params)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def idf(self, token):
+        frequency = len(self._postings[token][0]) if token in self._postings else 0
+        return np.log(1 + (len(self) - frequency + 0.5) / (frequency + 0.5))
+
+    def scores(self, query):
+        """
+        BM25 score of every row (0 where no query term matches).
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        for token in set(tokenize(query)) - STOPWORDS:
+            if token not in self._postings:
+                continue
+            rows, tf = self._postings[token]
+            scores[rows] += self.idf(token) * tf * (self.k1 + 1) / (tf + self._length_norm[rows])
+        return scores
+
+    def search(self, query, k=5, mask=None):
+        """
+        Return the top-k (id, score) pairs with a positive BM25 score, best first.
+        """
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask] = 0
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        k = min(k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[row], float(scores[row])) for row in top]
+
+    def exact_match(self, query):
+        """
+        Id of the one college the query unambiguously names, else None.
+
+        The query must equal a college name, or be a word prefix of exactly one name
+        covering at least half its words ("Alabama A & M" -> "Alabama A & M University").
+        """
+        name = normalize_name(query)
+        if not name:
+            return None
+        rows = self._rows_by_name.get(name)
+        if rows is not None:
+            return self.ids[rows[0]] if len(rows) == 1 else None
+        start = bisect_left(self._sorted_names, name + " ")
+        candidates = []
+        for candidate in self._sorted_names[start:start + 2]:
+            if candidate.startswith(name + " "):
+                candidates.append(candidate)
+        if len(candidates) != 1 or len(self._rows_by_name[candidates[0]]) != 1:
+            return None
+        if len(name.split()) * 2 < len(candidates[0].split()):
+            return None
+        return self.ids[self._rows_by_name[candidates[0]][0]]
@@ -0,0 +1,265 @@
+import copy
+import random
+import threading
+import time
+
+try:
+    from google.cloud.firestore import DELETE_FIELD
+except ImportError:
+    # Stand-in sentinel with the same meaning: remove this field on update/merge
+    DELETE_FIELD = object()
+
+
+class MemoryFirestoreError(ConnectionError):
+    """
+    Raised by the stand-in when a simulated RPC failure is injected.
+    """
+
+
+class MemoryDocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field) if self._data is not None else None
+
+
+class MemoryDocumentReference:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = str(doc_id)
+        self.path = f"{collection.id}/{self.id}"
+
+    def get(self, transaction=None):
+        client = self._collection._client
+        client._rpc("reads")
+        with client._lock:
+            data = self._collection._docs.get(self.id)
+            return MemoryDocumentSnapshot(self, copy.deepcopy(data))
+
+    def set(self, data, merge=False):
+        self._collection._client._rpc("writes")
+        self._collection._apply("set", self.id, data, merge)
+
+    def update(self, data):
+        self._collection._client._rpc("writes")
+        self._collection._apply("update", self.id, data)
+
+    def delete(self):
+        self._collection._client._rpc("writes")
+        self._collection._apply("delete", self.id)
+
+
+class MemoryQuery:
+    def __init__(self, collection, start_after_id=None, limit=None, filters=()):
+        self._collection = collection
+        self._start_after_id = start_after_id
+        self._limit = limit
+        self._filters = filters
+
+    def order_by(self, field_path, direction=None):
+        # Only document-id ordering is supported, which is also the default order
+        return self
+
+    def start_after(self, document_or_id):
+        doc_id = getattr(document_or_id, "id", document_or_id)
+        return MemoryQuery(self._collection, str(doc_id), self._limit, self._filters)
+
+    def limit(self, count):
+        return MemoryQuery(self._collection, self._start_after_id, count, self._filters)
+
+    def where(self, field, op, value):
+        return MemoryQuery(self._collection, self._start_after_id, self._limit,
+                           self._filters + ((field, op, value),))
+
+    def _matches(self, data):
+        for field, op, value in self._filters:
+            current = data.get(field)
+            if current is None:
+                return False
+            if op == "==" and not current == value:
+                return False
+            if op == ">" and not current > value:
+                return False
+            if op == ">=" and not current >= value:
+                return False
+            if op == "<" and not current < value:
+                return False
+            if op == "<=" and not current <= value:
+                return False
+        return True
+
+    def stream(self):
+        client = self._collection._client
+        client._rpc("reads", count=0)
+        with client._lock:
+            items = sorted(self._collection._docs.items())
+        count = 0
+        for doc_id, data in items:
+            if self._start_after_id is not None and doc_id <= self._start_after_id:
+                continue
+            if not self._matches(data):
+                continue
+            if self._limit is not None and count >= self._limit:
+                break
+            client._count("reads")
+            count += 1
+            yield MemoryDocumentSnapshot(self._collection.document(doc_id), copy.deepcopy(data))
+
+    def get(self):
+        return list(self.stream())
+
+
+class MemoryCollection(MemoryQuery):
+    def __init__(self, client, name):
+        super().__init__(self)
+        self._client = client
+        self.id = name
+        self._docs = {}
+
+    def document(self, doc_id):
+        return MemoryDocumentReference(self, doc_id)
+
+    def list_documents(self):
+        with self._client._lock:
+            return [self.document(doc_id) for doc_id in sorted(self._docs)]
+
+    def _apply(self, op, doc_id, data=None, merge=False):
+        with self._client._lock:
+            if op == "delete":
+                self._docs.pop(doc_id, None)
+            elif op == "update":
+                if doc_id not in self._docs:
+                    raise KeyError(f"No document to update: {self.id}/{doc_id}")
+                _merge(self._docs[doc_id], data)
+            elif merge and doc_id in self._docs:
+                _merge(self._docs[doc_id], data)
+            else:
+                self._docs[doc_id] = copy.deepcopy(data)
+
+
+def _merge(document, data):
+    for key, value in data.items():
+        if value is DELETE_FIELD:
+            document.pop(key, None)
+        else:
+            document[key] = copy.deepcopy(value)
+
+
+def _project(document, field_paths):
+    if document is None or field_paths is None:
+        return copy.deepcopy(document)
+    return {field: copy.deepcopy(document[field]) for field in field_paths if field in document}
+
+
+class MemoryWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(("set", reference, data, merge))
+
+    def update(self, reference, data):
+        self._ops.append(("update", reference, data, False))
+
+    def delete(self, reference):
+        self._ops.append(("delete", reference, None, False))
+
+    def commit(self):
+        if len(self._ops) > 500:
+            raise ValueError("A batched write can contain at most 500 operations")
+        self._client._rpc("commits", fail=True)
+        with self._client._lock:
+            # All or nothing: an update of a missing document fails the whole commit
+            exists = {}
+            for op, reference, _, _ in self._ops:
+                found = exists.get(reference.path, reference.id in reference._collection._docs)
+                if op == "update" and not found:
+                    raise KeyError(f"No document to update: {reference.path}")
+                exists[reference.path] = op != "delete"
+            for op, reference, data, merge in self._ops:
+                reference._collection._apply(op, reference.id, data, merge)
+        self._client._count("writes", len(self._ops))
+        return self._ops
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """
+    Writes buffered until the transaction function returns. The client lock is
+    held for the whole function, so transactions are serialized and never retried.
+    """
+
+
+class InMemoryFirestore:
+    """
+    Local stand-in for google.cloud.firestore.Client.
+
+    Supports the subset of the client API used by the college scripts, counts every
+    read, write and commit, and can simulate per-RPC latency and failed commits so
+    bulk write throughput can be measured offline.
+    """
+
+    def __init__(self, latency=0.0, commit_failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.commit_failure_rate = commit_failure_rate
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.rpcs = 0
+        self._collections = {}
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+
+    def collection(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(self, name)
+            return self._collections[name]
+
+    def batch(self):
+        return MemoryWriteBatch(self)
+
+    def run_transaction(self, function):
+        """
+        Call `function(transaction)` and commit its writes atomically; stands in for
+        google.cloud.firestore.transactional.
+        """
+        with self._lock:
+            transaction = MemoryTransaction(self)
+            result = function(transaction)
+            transaction.commit()
+            return result
+
+    def get_all(self, references, field_paths=None):
+        references = list(references)
+        self._rpc("reads", count=len(references))
+        with self._lock:
+            return [
+                MemoryDocumentSnapshot(ref, _project(ref._collection._docs.get(ref.id), field_paths))
+                for ref in references
+            ]
+
+    def reset_counters(self):
+        with self._lock:
+            self.reads = self.writes = self.commits = self.rpcs = 0
+
+    def _count(self, counter, count=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + count)
+
+    def _rpc(self, counter, count=1, fail=False):
+        with self._lock:
+            self.rpcs += 1
+            setattr(self, counter, getattr(self, counter) + count)
+            should_fail = fail and self._random.random() < self.commit_failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if should_fail:
+            raise MemoryFirestoreError("Simulated commit failure")
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+import re
+import threading
+import time
+
+
+def normalize_query(query):
+    """
+    Canonical form of a query for cache keys: case, spacing and trailing punctuation ignored.
+    """
+    return re.sub(r"\s+", " ", query).strip().rstrip("?.!").strip().lower()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with an optional per-entry TTL and hit/miss/eviction counters.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedQueryEmbeddings:
+    """
+    Wraps a LangChain embeddings object so repeated queries are embedded only once.
+
+    Queries are keyed by their normalized text; document embedding is passed through.
+    """
+
+    def __init__(self, embeddings, maxsize=1024):
+        self.embeddings = embeddings
+        self.cache = LRUCache(maxsize)
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+
+class AnswerCache:
+    """
+    Final answers keyed by (normalized query, top-k college ids, data version).
+
+    Keying on the retrieved ids means an answer is only reused when the LLM would see
+    the same colleges. Entries expire after `ttl` seconds, and the whole cache is
+    dropped as soon as the college snapshot version changes.
+    """
+
+    def __init__(self, maxsize=512, ttl=3600):
+        self.cache = LRUCache(maxsize, ttl)
+        self.version = None
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        with self._lock:
+            if version != self.version:
+                if self.version is not None:
+                    self.cache.clear()
+                    self.invalidations += 1
+                self.version = version
+
+    def get(self, query, doc_ids, version):
+        self._check_version(version)
+        return self.cache.get((normalize_query(query), tuple(doc_ids)))
+
+    def put(self, query, doc_ids, version, answer):
+        self._check_version(version)
+        self.cache.put((normalize_query(query), tuple(doc_ids)), answer)
+
+    def stats(self):
+        return dict(self.cache.stats(), version=self.version, invalidations=self.invalidations)
@@ -1,18 +1,67 @@
 from google.cloud import firestore
+from langchain.callbacks.base import BaseCallbackHandler
 from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import FirestoreRetriever
-from langchain.chains import RetrievalQA
+from langchain.chains.question_answering import load_qa_chain
 from langchain.chat_models import ChatOpenAI
 from dotenv import load_dotenv
+import argparse
+from contextlib import contextmanager
 import os
+import queue
+import threading
+
+from ann_index import IVFIndex
+from college_rankings import RANKINGS_INDEX_PATH, RankingIndex
+from college_replica import REPLICA_PATH, CollegeReplica
+from college_retriever import CollegeRetriever, college_to_document, college_to_record
+from college_snapshot import current_snapshot_dir
+from search_cache import AnswerCache, CachedQueryEmbeddings
+from snapshot_manager import ReplicaManager, SnapshotManager
 
 # Load environment variables
 load_dotenv()
 
 # Initialize LangChain components
 firestore_client = firestore.Client()
-embeddings = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
-retriever = FirestoreRetriever(firestore_client, embeddings)
+# Popular queries repeat all day, so cache their embeddings in-process
+embeddings = CachedQueryEmbeddings(
+    OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY")),
+    maxsize=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+)
+answer_cache = AnswerCache(
+    maxsize=int(os.getenv("ANSWER_CACHE_SIZE", 512)),
+    ttl=int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+)
+
+# Search in-process: memory-map the published snapshot if there is one (see
+# college_snapshot.py --publish), otherwise read from the local SQLite replica, which
+# only fetches what changed in Firestore since its last sync. New snapshot versions,
+# and changes the replica syncs in, are picked up every COLLEGE_SNAPSHOT_POLL_SECONDS
+# and swapped in atomically. If an IVF index has been built (see generate_embeddings.py
+# --ann-index), search it instead of brute force; when it was built from other data
+# than is being served, its centroids are reused for the current embeddings.
+SNAPSHOT_DIR = os.getenv("COLLEGE_SNAPSHOT_DIR", "college_snapshot")
+SNAPSHOT_POLL_SECONDS = float(os.getenv("COLLEGE_SNAPSHOT_POLL_SECONDS", 60))
+ANN_INDEX_PATH = os.getenv("COLLEGE_ANN_INDEX", "college_ivf.npz")
+ann_index = IVFIndex.load(ANN_INDEX_PATH) if os.path.exists(ANN_INDEX_PATH) else None
+if ann_index is not None and os.getenv("COLLEGE_ANN_NPROBE"):
+    ann_index.nprobe = int(os.getenv("COLLEGE_ANN_NPROBE"))
+# World rankings joined offline by college_rankings.py: enables "top 100 ranked"
+# filters and nudges ranked colleges up the results
+rankings = RankingIndex(RANKINGS_INDEX_PATH) if os.path.exists(RANKINGS_INDEX_PATH) else None
+rank_boost = float(os.getenv("COLLEGE_RANK_BOOST", 1.0))
+if current_snapshot_dir(SNAPSHOT_DIR) is not None:
+    retrievers = SnapshotManager(SNAPSHOT_DIR, lambda snapshot: CollegeRetriever.from_snapshot(
+        snapshot, embeddings, index=ann_index, rankings=rankings, rank_boost=rank_boost))
+else:
+    retrievers = ReplicaManager(CollegeReplica(REPLICA_PATH), firestore_client, lambda replica: (
+        CollegeRetriever.from_colleges(list(replica.records()), embeddings, index=ann_index,
+                                       vectors=replica.vector_index(),
+                                       rankings=rankings, rank_boost=rank_boost,
+                                       data_version=f"replica-{replica.version}",
+                                       source_version=replica.version)))
+if SNAPSHOT_POLL_SECONDS > 0:
+    retrievers.start_polling(SNAPSHOT_POLL_SECONDS)
 
 chat_model = ChatOpenAI(
     model="gpt-4",
@@ -20,22 +69,151 @@ chat_model = ChatOpenAI(
     openai_api_key=os.getenv("OPENAI_API_KEY")
 )
 
-# Create retrieval chain
-retrieval_chain = RetrievalQA.from_chain_type(
-    llm=chat_model,
-    retriever=retriever,
-    return_source_documents=True
+# "Stuff" QA chain: the retrieved colleges are put straight into the prompt
+qa_chain = load_qa_chain(chat_model, chain_type="stuff")
+
+# Same "stuff" QA prompt, but the model reports each token as it is generated
+streaming_chain = load_qa_chain(
+    ChatOpenAI(model="gpt-4", temperature=0.7, streaming=True, openai_api_key=os.getenv("OPENAI_API_KEY")),
+    chain_type="stuff"
 )
 
+@contextmanager
+def current_retriever():
+    """
+    The retriever for the current snapshot or replica version, held until the block exits.
+    """
+    with retrievers.acquire() as current:
+        yield current
+
+
 def search_colleges(query):
     """
-    Search for colleges using LangChain's RetrievalQA.
+    Search for colleges: retrieve, then answer with GPT-4 over the retrieved colleges.
+
+    Retrieval always runs; the GPT-4 answer is reused when the same query already
+    retrieved the same colleges from the same college snapshot. A query that simply
+    names one college is answered from its record without calling the LLM.
     """
-    response = retrieval_chain.run(query)
+    with current_retriever() as retriever:
+        college_id = retriever.exact_match(query)
+        if college_id is not None:
+            return college_to_document(retriever.college(college_id)).page_content
+        docs = retriever.get_relevant_documents(query)
+        data_version = retriever.data_version
+    doc_ids = [doc.metadata["id"] for doc in docs]
+    response = answer_cache.get(query, doc_ids, data_version)
+    if response is None:
+        response = qa_chain.run(input_documents=docs, question=query)
+        answer_cache.put(query, doc_ids, data_version, response)
     return response
 
+
+def search_results(query, k=None):
+    """
+    Ranked college records straight from retrieval, without calling the LLM.
+
+    Each record is the college's fields plus `rank` and `score`; a college the query
+    names outright is always ranked first.
+    """
+    with current_retriever() as retriever:
+        hits = retriever.search(query, k=k)
+        college_id = retriever.exact_match(query)
+        if college_id is not None:
+            others = [hit for hit in hits if hit[0] != college_id]
+            hits = [(college_id, None)] + others[:max(len(hits) - 1, 0)]
+        results = []
+        for rank, (hit_id, score) in enumerate(hits, start=1):
+            record = college_to_record(retriever.college(hit_id), score)
+            record["rank"] = rank
+            results.append(record)
+    return results
+
+
+class _TokenQueueHandler(BaseCallbackHandler):
+    def __init__(self):
+        self.tokens = queue.Queue()
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens.put(token)
+
+
+def stream_search_colleges(query):
+    """
+    Like search_colleges(), but yields the answer token by token as GPT-4 writes it.
+
+    Cached and exact-match answers are yielded in one piece. The chain runs on a
+    background thread; tokens reach the caller through a queue.
+    """
+    with current_retriever() as retriever:
+        college_id = retriever.exact_match(query)
+        answer = college_to_document(retriever.college(college_id)).page_content if college_id is not None else None
+        docs = retriever.get_relevant_documents(query) if answer is None else []
+        data_version = retriever.data_version
+    if answer is not None:
+        yield answer
+        return
+    doc_ids = [doc.metadata["id"] for doc in docs]
+    cached = answer_cache.get(query, doc_ids, data_version)
+    if cached is not None:
+        yield cached
+        return
+
+    handler = _TokenQueueHandler()
+    done = object()
+    outcome = {}
+
+    def run_chain():
+        try:
+            outcome["answer"] = streaming_chain.run(input_documents=docs, question=query, callbacks=[handler])
+        except Exception as error:
+            outcome["error"] = error
+        finally:
+            handler.tokens.put(done)
+
+    thread = threading.Thread(target=run_chain, daemon=True)
+    thread.start()
+    while True:
+        token = handler.tokens.get()
+        if token is done:
+            break
+        yield token
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    answer_cache.put(query, doc_ids, data_version, outcome["answer"])
+
+
+def facet_counts(query="", selected=None):
+    """
+    Counts per state, tuition, admission-rate and size band for the filter UI,
+    narrowed by the query's filters and the options ticked in `selected`.
+    """
+    with current_retriever() as retriever:
+        return retriever.facet_counts(query, selected)
+
+
+def cache_stats():
+    """
+    Hit, miss and eviction counters for the query-embedding and answer caches.
+    """
+    return {"query_embeddings": embeddings.cache.stats(), "answers": answer_cache.stats()}
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search colleges.")
+    parser.add_argument("--results", action="store_true", help="Print ranked records only; no LLM call.")
+    parser.add_argument("--stream", action="store_true", help="Print the answer as it is generated.")
+    args = parser.parse_args()
+
     query = input("Enter your query: ")
-    response = search_colleges(query)
     print("\nSearch Results:")
-    print(response)
+    if args.results:
+        for result in search_results(query):
+            print(f"{result['rank']}. {result.get('school.name')} ({result.get('school.city')}, "
+                  f"{result.get('school.state')})")
+    elif args.stream:
+        for token in stream_search_colleges(query):
+            print(token, end="", flush=True)
+        print()
+    else:
+        print(search_colleges(query))
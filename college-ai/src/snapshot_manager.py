@@ -0,0 +1,164 @@
+from contextlib import contextmanager
+import threading
+import time
+
+from college_snapshot import KEEP_VERSIONS, CollegeSnapshot, collect_snapshots, current_snapshot_dir
+
+
+class _Loaded:
+    def __init__(self, version, value):
+        self.version = version
+        self.value = value
+        self.refs = 0
+
+
+class SnapshotManager:
+    """
+    Serves whatever `load(snapshot)` builds (e.g. a CollegeRetriever) for the
+    current published snapshot, and swaps in new versions without downtime.
+
+    refresh() opens and loads a newly published version off to the side; only the
+    pointer swap happens under the lock. Queries hold a reference through acquire(),
+    so a query that started on the old version finishes on it. A retired version is
+    dropped once its last query releases it, and versions no longer in use are then
+    garbage-collected from disk.
+    """
+
+    def __init__(self, root, load, keep=KEEP_VERSIONS):
+        self.root = root
+        self.load = load
+        self.keep = keep
+        self.swap_seconds = None
+        self._current = None
+        self._retired = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        if not self.refresh():
+            raise FileNotFoundError(f"No college snapshot published under {root}")
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @contextmanager
+    def acquire(self):
+        """
+        Hold the current version for the duration of the block.
+        """
+        with self._lock:
+            loaded = self._current
+            loaded.refs += 1
+        try:
+            yield loaded.value
+        finally:
+            with self._lock:
+                loaded.refs -= 1
+                if loaded.refs == 0 and loaded is not self._current:
+                    self._retired.pop(loaded.version, None)
+
+    def in_use(self):
+        """
+        Versions this process still serves: the current one and any with queries in flight.
+        """
+        with self._lock:
+            return {self._current.version, *self._retired} if self._current else set(self._retired)
+
+    def refresh(self):
+        """
+        Switch to the newest published version; returns whether it changed.
+        """
+        with self._refresh_lock:
+            directory = current_snapshot_dir(self.root)
+            if directory is None:
+                return False
+            snapshot = CollegeSnapshot(directory)
+            if self._current is not None and snapshot.version == self._current.version:
+                return False
+            loaded = _Loaded(snapshot.version, self.load(snapshot))
+
+            start = time.perf_counter()
+            with self._lock:
+                previous, self._current = self._current, loaded
+                if previous is not None and previous.refs:
+                    self._retired[previous.version] = previous
+            self.swap_seconds = time.perf_counter() - start
+
+            collect_snapshots(self.root, self.keep, in_use=self.in_use())
+            return True
+
+    def start_polling(self, interval):
+        """
+        Check for a newly published version every `interval` seconds on a daemon thread.
+        """
+        return _start_polling(self, interval, "college snapshot")
+
+
+class ReplicaManager:
+    """
+    Serves whatever `load(replica)` builds (e.g. a CollegeRetriever) from a
+    CollegeReplica, and rebuilds it whenever a sync brings in changes.
+
+    refresh() syncs the replica and loads the new data off to the side; only the
+    pointer swap happens under the lock, so queries keep using the value they
+    acquired until they finish with it.
+    """
+
+    def __init__(self, replica, db, load, collection="colleges"):
+        self.replica = replica
+        self.db = db
+        self.load = load
+        self.collection = collection
+        self.swap_seconds = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._current = None
+        self.refresh(force=True)
+
+    @property
+    def version(self):
+        return self._current.version
+
+    @contextmanager
+    def acquire(self):
+        """
+        Hold the current value for the duration of the block.
+        """
+        with self._lock:
+            loaded = self._current
+        yield loaded.value
+
+    def refresh(self, force=False):
+        """
+        Sync the replica and reload if anything changed; returns whether it did.
+        """
+        with self._refresh_lock:
+            if not self.replica.sync(self.db, self.collection) and not force:
+                return False
+            loaded = _Loaded(self.replica.version, self.load(self.replica))
+
+            start = time.perf_counter()
+            with self._lock:
+                self._current = loaded
+            self.swap_seconds = time.perf_counter() - start
+            return True
+
+    def start_polling(self, interval):
+        """
+        Sync with Firestore every `interval` seconds on a daemon thread.
+        """
+        return _start_polling(self, interval, "college replica version")
+
+
+def _start_polling(manager, interval, name):
+    def poll():
+        while True:
+            time.sleep(interval)
+            try:
+                if manager.refresh():
+                    print(f"Switched to {name} {manager.version} (swap {manager.swap_seconds * 1e6:.0f} us)")
+            except Exception as error:
+                print(f"Refreshing the {name} failed, still serving {manager.version}: {error}")
+
+    thread = threading.Thread(target=poll, daemon=True)
+    thread.start()
+    return thread
@@ -1,29 +1,158 @@
+import argparse
+import hashlib
 import json
+import os
 from google.cloud import firestore
 
-# Initialize Firestore client
-db = firestore.Client()
+from change_marker import SYNC_FIELD, VersionedWriter
+from college_stream import iter_colleges
+from embedding_codec import EMBEDDING_FIELDS
 
-# Load college data from JSON file
-with open('colleges.json', 'r') as file:
-    colleges = json.load(file)
+# Local record of what was last synced, keyed by college id
+MANIFEST_PATH = os.getenv("COLLEGES_MANIFEST_PATH", "colleges_manifest.json")
 
-# Upload or update data in Firestore
-for college in colleges:
-    if "id" not in college:
-        print(f"Skipping college due to missing ID: {college}")
-        continue
-    # Convert the ID to a string
-    doc_ref = db.collection('colleges').document(str(college['id']))
+# Fields added to college documents by other jobs; they are not part of the source data
+DERIVED_FIELDS = EMBEDDING_FIELDS + (SYNC_FIELD,)
 
-    # Check if the document already exists
-    existing_doc = doc_ref.get()
-    if existing_doc.exists and existing_doc.to_dict() == college:
-        print(f"No changes for college {college['school.name']} (ID: {college['id']})")
-        continue
 
-    # Add or update the document
-    doc_ref.set(college)
-    print(f"Uploaded/Updated: {college['school.name']} (ID: {college['id']})")
+def content_hash(college):
+    """
+    Stable hash of a college record: key order and derived fields do not affect it.
+    """
+    source = {key: value for key, value in college.items() if key not in DERIVED_FIELDS}
+    canonical = json.dumps(source, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
-print("Data upload/update completed successfully!")
+
+def load_manifest(path=MANIFEST_PATH):
+    """
+    Return the {college id: content hash} manifest from the last sync, or None if there is none.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def fetch_remote_documents(db, college_ids, collection='colleges'):
+    """
+    Read the documents currently in Firestore with a single get_all call.
+    """
+    colleges_ref = db.collection(collection)
+    refs = [colleges_ref.document(college_id) for college_id in college_ids]
+    return {snapshot.id: snapshot.to_dict() for snapshot in db.get_all(refs) if snapshot.exists}
+
+
+def document_update(college, current):
+    """
+    The merge that makes a stored document match `college`: source fields missing
+    from it are deleted, while derived fields such as embeddings are left alone.
+    """
+    update = dict(college)
+    for field in current or {}:
+        if field not in update and field not in DERIVED_FIELDS:
+            update[field] = firestore.DELETE_FIELD
+    return update
+
+
+def _iter_chunks(colleges, chunk_size):
+    chunk = {}
+    for college in colleges:
+        if "id" not in college:
+            print(f"Skipping college due to missing ID: {college}")
+            continue
+        # Convert the ID to a string
+        chunk[str(college['id'])] = college
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = {}
+    if chunk:
+        yield chunk
+
+
+def upload_colleges(colleges, db, manifest_path=MANIFEST_PATH, collection='colleges', chunk_size=1000,
+                    prune=False):
+    """
+    Write only the colleges whose content hash differs from the last successful sync.
+
+    `colleges` may be any iterable, such as college_stream.iter_colleges(), and is
+    consumed in chunks so memory does not grow with the dataset. Without a manifest,
+    the remote state of each chunk is read with a single get_all call; with one,
+    only the changed documents of a chunk are read, to find fields the source no
+    longer has. The manifest is only rewritten after every changed document has
+    been committed.
+
+    Changes are written through one change_marker.VersionedWriter, stamped with a
+    sync version that is released once they have all committed, so read replicas
+    can sync incrementally. With `prune`, colleges missing from `colleges` (those in
+    the manifest, or in Firestore when there is none) are deleted, leaving
+    tombstones for the replicas.
+    """
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        print("No manifest found, reading current documents from Firestore")
+
+    new_manifest = dict(manifest or {})
+    changed = unchanged = 0
+    seen = set()
+    with VersionedWriter(db, collection, source="upload_to_firestore") as writer:
+        for chunk in _iter_chunks(colleges, chunk_size):
+            remote = None if manifest is not None else fetch_remote_documents(db, list(chunk), collection)
+            known = manifest if remote is None else {
+                college_id: content_hash(document) for college_id, document in remote.items()}
+            updates = {}
+            for college_id, college in chunk.items():
+                digest = content_hash(college)
+                new_manifest[college_id] = digest
+                seen.add(college_id)
+                if known.get(college_id) == digest:
+                    unchanged += 1
+                else:
+                    updates[college_id] = college
+            if not updates:
+                continue
+            if remote is None:
+                remote = fetch_remote_documents(db, list(updates), collection)
+            # Merged so fields written by other jobs (embeddings) survive the update
+            writer.stage({college_id: document_update(college, remote.get(college_id))
+                          for college_id, college in updates.items()})
+            for college_id, college in updates.items():
+                changed += 1
+                print(f"Uploaded/Updated: {college['school.name']} (ID: {college_id})")
+
+        if prune:
+            stored = manifest if manifest is not None else [ref.id for ref in db.collection(collection).list_documents()]
+            removed = sorted(set(stored) - seen)
+            if removed:
+                writer.stage(dict.fromkeys(removed))
+            for college_id in removed:
+                new_manifest.pop(college_id, None)
+                print(f"Deleted: {college_id}")
+            changed += len(removed)
+    if manifest_path:
+        save_manifest(new_manifest, manifest_path)
+    print(f"{changed} changed, {unchanged} unchanged")
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sync colleges.json (or an NDJSON export) into the Firestore colleges collection.")
+    parser.add_argument("--colleges", default="colleges.json")
+    parser.add_argument("--manifest", default=MANIFEST_PATH)
+    parser.add_argument("--prune", action="store_true", help="Delete colleges that are no longer in the source.")
+    args = parser.parse_args()
+
+    # Initialize Firestore client
+    db = firestore.Client()
+
+    # Stream college records from the JSON array or NDJSON export
+    upload_colleges(iter_colleges(args.colleges), db, args.manifest, prune=args.prune)
+    print("Data upload/update completed successfully!")
@@ -0,0 +1,140 @@
+import os
+
+import numpy as np
+
+from embedding_codec import embedding_matrix
+
+# Large indexes score a query in two stages: every row in a COARSE_DIM-dimensional
+# PCA projection of the embeddings, then the best RERANK_CANDIDATES rows (at least
+# RERANK_FACTOR * k) exactly. Reading the projection instead of the full float32
+# matrix keeps a query over ~7k 1536-d embeddings under a millisecond. 0 disables it.
+COARSE_DIM = int(os.getenv("VECTOR_INDEX_COARSE_DIM", 256))
+RERANK_CANDIDATES = int(os.getenv("VECTOR_INDEX_RERANK", 100))
+RERANK_FACTOR = 8
+# Below this many rows the exact scan is already fast
+COARSE_MIN_ROWS = 2048
+# A projection keeping less of the embeddings' energy than this would lose too many
+# true neighbours (unstructured, isotropic vectors), so such indexes scan exactly
+COARSE_MIN_VARIANCE = 0.4
+# Rows sampled to estimate the projection
+PROJECTION_SAMPLE = 4096
+
+
+def normalize_rows(matrix):
+    """
+    Scale each row of a 2-D float32 matrix to unit length (zero rows are left as zeros).
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def coarse_projection(matrix, dim=COARSE_DIM, sample_size=PROJECTION_SAMPLE, seed=0):
+    """
+    (matrix dim, `dim`) float32 basis of the top principal directions of the rows,
+    estimated from a sample; projecting onto it best preserves dot products. None
+    when the index is too small or too unstructured for a coarse stage to help.
+    """
+    if not dim or dim >= matrix.shape[1] or matrix.shape[0] < COARSE_MIN_ROWS:
+        return None
+    if sample_size < len(matrix):
+        rows = np.sort(np.random.default_rng(seed).choice(len(matrix), sample_size, replace=False))
+        matrix = matrix[rows]
+    sample = np.asarray(matrix, dtype=np.float32)
+    values, vectors = np.linalg.eigh(sample.T @ sample)
+    if values[-dim:].sum() < COARSE_MIN_VARIANCE * values.sum():
+        return None
+    return np.ascontiguousarray(vectors[:, ::-1][:, :dim], dtype=np.float32)
+
+
+class VectorIndex:
+    """
+    In-process cosine-similarity index over college embeddings.
+
+    All vectors live in one contiguous float32 matrix with unit-length rows, so a
+    query is a single matrix-vector product followed by a partial sort. Large
+    indexes also keep a `coarse_dim`-dimensional projection of the matrix (see
+    coarse_projection): a query scores that first and rescores a shortlist exactly,
+    so returned scores are exact but a true top-k row can occasionally be missed.
+    """
+
+    def __init__(self, ids, matrix, normalized=False, coarse_dim=COARSE_DIM, projection=None, coarse=None):
+        """
+        With `normalized=True` the matrix is used as-is (for example a read-only
+        memory map from a college snapshot) instead of being copied and normalized.
+        `coarse_dim=0` always scans the full matrix. A precomputed `projection` and
+        `coarse` (matrix @ projection) are used instead of being derived here.
+        """
+        if not normalized:
+            matrix = normalize_rows(np.array(matrix, dtype=np.float32, order="C", copy=True))
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError(f"Expected a ({len(ids)}, dim) matrix, got shape {matrix.shape}")
+        self.ids = list(ids)
+        self.matrix = matrix
+        if projection is None:
+            projection = coarse_projection(matrix, coarse_dim)
+        if projection is not None and coarse is None:
+            coarse = np.ascontiguousarray(matrix @ projection)
+        self.projection = projection
+        self.coarse = None if projection is None else coarse
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build an index from college dicts, skipping any record without an embedding.
+
+        Both float lists and quantized (int8/float16) embeddings are accepted; see
+        embedding_codec.
+        """
+        records = list(records)
+        positions, matrix = embedding_matrix(records)
+        if not positions:
+            raise ValueError("No records with an embedding to index")
+        return cls([str(records[p]["id"]) for p in positions], normalize_rows(matrix), normalized=True)
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def scores(self, query_vector, rows=None):
+        """
+        Cosine similarity of the query against every indexed vector, or only `rows`.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        return matrix @ query
+
+    def shortlist(self, query_vector, size, rows=None):
+        """
+        The `size` rows (of `rows`, or of all) with the best scores in the coarse projection.
+        """
+        coarse = self.coarse if rows is None else self.coarse[rows]
+        scores = coarse @ (np.asarray(query_vector, dtype=np.float32) @ self.projection)
+        best = np.argpartition(-scores, size - 1)[:size]
+        return best if rows is None else rows[best]
+
+    def search(self, query_vector, k=5, mask=None):
+        """
+        Return the top-k (id, score) pairs, best first.
+
+        With a boolean `mask`, only the rows where it is True are scored.
+        """
+        rows = None if mask is None else np.flatnonzero(mask)
+        size = max(RERANK_CANDIDATES, RERANK_FACTOR * k)
+        if self.coarse is not None and size < (len(self) if rows is None else len(rows)):
+            rows = np.sort(self.shortlist(query_vector, size, rows))
+        scores = self.scores(query_vector, rows)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        positions = top if rows is None else rows[top]
+        return [(self.ids[p], float(s)) for p, s in zip(positions, scores[top])]
@@ -0,0 +1,70 @@
+import sys
+import threading
+
+import numpy as np
+
+from ann_index import IVFIndex
+
+
+def test_index_built_from_other_data_is_reindexed_with_its_centroids(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    ids = [str(i) for i in range(300)]
+    # Built before college 299 existed and while a since-deleted college was still there
+    stale = IVFIndex.build(ids[:-1] + ["deleted"], np.vstack([vectors[:-1], vectors[:1]]), nlist=8, nprobe=8)
+    stale.data_version = 4.0
+    path = str(tmp_path / "ivf.npz")
+    stale.save(path)
+    stale = IVFIndex.load(path)
+
+    assert stale.data_version == 4.0
+    assert not stale.covers(ids, 5.0)
+    current = stale.reindexed(ids, vectors, 5.0)
+    assert current.covers(ids, 5.0) and not current.covers(ids, 6.0)
+    assert np.array_equal(current.centroids, stale.centroids)
+    assert "deleted" not in current.ids
+    assert current.search(vectors[-1], k=1)[0][0] == "299"
+
+
+def test_unversioned_index_never_covers_published_data():
+    rng = np.random.default_rng(0)
+    ids = [str(i) for i in range(50)]
+    index = IVFIndex.build(ids, rng.standard_normal((50, 8)), nlist=4)
+    assert not index.covers(ids, None)
+
+
+def test_concurrent_searches_on_a_freshly_filled_index_agree():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((4000, 32)).astype(np.float32)
+    ids = [str(i) for i in range(4000)]
+    queries = vectors[:64] + 0.1 * rng.standard_normal((64, 32)).astype(np.float32)
+    trained = IVFIndex.train(vectors, nlist=64, nprobe=8)
+    expected = trained.reindexed(ids, vectors)
+    expected = [expected.search(query, k=10) for query in queries]
+
+    # Switch threads as often as possible so searches overlap the first one's merge
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(5):
+            index = IVFIndex(trained.centroids, nprobe=8)
+            for start in range(0, 4000, 10):
+                index.add(ids[start:start + 10], vectors[start:start + 10])
+            assert search_concurrently(index, queries) == expected
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def search_concurrently(index, queries, workers=8):
+    results = [None] * len(queries)
+
+    def run(worker):
+        for i in range(worker, len(queries), workers):
+            results[i] = index.search(queries[i], k=10)
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -0,0 +1,52 @@
+import pytest
+
+import bulk_writer
+from bulk_writer import BulkWriteError, BulkWriter
+from memory_firestore import InMemoryFirestore
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(bulk_writer.time, "sleep", delays.append)
+    return delays
+
+
+def write(writer, db, count):
+    for i in range(count):
+        writer.set(db.collection("colleges").document(str(i)), {"school.name": f"College {i}"})
+
+
+def test_failed_batches_are_retried_until_they_commit(sleeps):
+    db = InMemoryFirestore(commit_failure_rate=0.5, seed=3)
+    with BulkWriter(db, batch_size=10, max_retries=20) as writer:
+        write(writer, db, 95)
+
+    assert writer.retries > 0 and len(sleeps) == writer.retries
+    assert writer.batches_committed == 10 and writer.ops_written == 95
+    assert len(db.collection("colleges").list_documents()) == 95
+    # Only the failed commits were resent: every document was written exactly once
+    assert db.writes == 95
+
+
+def test_backoff_doubles_with_jitter_then_gives_up(sleeps):
+    db = InMemoryFirestore(commit_failure_rate=1.0)
+    writer = BulkWriter(db, batch_size=10, max_workers=1, max_retries=3, backoff=0.5)
+    write(writer, db, 15)
+    with pytest.raises(BulkWriteError) as raised:
+        writer.close()
+
+    assert len(raised.value.failures) == 2
+    assert [len(ops) for ops, _ in raised.value.failures] == [10, 5]
+    assert writer.retries == 6 and writer.ops_written == 0
+    for attempt, delay in enumerate(sleeps[:3]):
+        assert 0.5 * 2 ** attempt * 0.5 <= delay <= 0.5 * 2 ** attempt * 1.5
+
+
+def test_errors_that_are_not_transient_are_not_retried(sleeps):
+    db = InMemoryFirestore()
+    writer = BulkWriter(db)
+    writer.update(db.collection("colleges").document("missing"), {"school.name": "Nowhere"})
+    with pytest.raises(KeyError):
+        writer.close()
+    assert sleeps == [] and writer.retries == 0
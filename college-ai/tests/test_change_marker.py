@@ -0,0 +1,116 @@
+import threading
+
+import pytest
+
+import change_marker
+from change_marker import SYNC_FIELD, VersionedWriter, commit_changes, read_change_marker, tombstones_collection
+from college_replica import CollegeReplica
+from memory_firestore import InMemoryFirestore
+
+
+def college(college_id, size=100):
+    return {"id": college_id, "school.name": f"College {college_id}", "school.state": "CA",
+            "latest.student.size": size}
+
+
+def stored(db):
+    return {ref.id: ref.get().to_dict()["latest.student.size"] for ref in db.collection("colleges").list_documents()}
+
+
+def replicated(replica):
+    return {record["id"]: record["latest.student.size"] for record in replica.records()}
+
+
+def test_run_that_started_first_but_commits_last_still_reaches_the_replica(tmp_path):
+    db = InMemoryFirestore()
+    replica = CollegeReplica(str(tmp_path / "replica.sqlite3"))
+    commit_changes(db, {"1": college("1"), "2": college("2")})
+    replica.sync(db)
+    synced = replica.version
+
+    # Run A reserves its version first; run B reserves, commits and releases while A
+    # is still writing, and the replica syncs in between
+    with VersionedWriter(db, source="run A") as run_a:
+        run_a.stage({"3": college("3")})
+        assert commit_changes(db, {"2": college("2", size=200)}, source="run B") > run_a.version
+        assert read_change_marker(db)["version"] == synced
+        assert replica.sync(db) == 0
+
+    assert db.collection("colleges").document("3").get().get(SYNC_FIELD) > synced
+    assert replica.sync(db) == 2
+    assert replicated(replica) == {"1": 100, "2": 200, "3": 100}
+
+
+def test_writer_that_dies_stops_holding_the_marker_back_after_its_lease(monkeypatch):
+    db = InMemoryFirestore()
+    monkeypatch.setattr(change_marker, "RESERVATION_SECONDS", 0)
+    abandoned = change_marker.reserved_version(db)
+    assert abandoned.__enter__() == 1
+    monkeypatch.setattr(change_marker, "RESERVATION_SECONDS", 60)
+    assert commit_changes(db, {"1": college("1")}) == 2
+    assert read_change_marker(db)["version"] == 2
+
+
+def test_failed_writer_still_releases_its_version():
+    db = InMemoryFirestore()
+    with pytest.raises(KeyError):
+        commit_changes(db, {"missing": {"latest.student.size": 1}}, merge=False)
+    marker = read_change_marker(db)
+    assert marker["version"] == 1 and not marker["pending"]
+
+
+def test_marker_never_moves_backwards_under_concurrent_commits(tmp_path):
+    db = InMemoryFirestore()
+    replica = CollegeReplica(str(tmp_path / "replica.sqlite3"))
+    observed = []
+
+    def run(worker):
+        for step in range(20):
+            commit_changes(db, {f"{worker}-{step % 5}": college(f"{worker}-{step % 5}", size=step)})
+
+    def follow():
+        while any(thread.is_alive() for thread in writers):
+            replica.sync(db)
+            observed.append(read_change_marker(db)["version"])
+
+    writers = [threading.Thread(target=run, args=(worker,)) for worker in range(4)]
+    follower = threading.Thread(target=follow)
+    for thread in writers:
+        thread.start()
+    follower.start()
+    for thread in writers + [follower]:
+        thread.join()
+    replica.sync(db)
+
+    assert observed == sorted(observed)
+    assert read_change_marker(db)["version"] == 80
+    assert replicated(replica) == stored(db)
+
+
+def test_deletions_reach_the_replica_through_tombstones(tmp_path):
+    db = InMemoryFirestore()
+    replica = CollegeReplica(str(tmp_path / "replica.sqlite3"))
+    commit_changes(db, {college_id: college(college_id) for college_id in "123"})
+    replica.sync(db)
+
+    commit_changes(db, {"2": None, "3": None})
+    assert db.collection(tombstones_collection()).document("2").get().exists
+    assert replica.sync(db) == 2
+    assert replicated(replica) == {"1": 100}
+
+    # Re-created after its deletion: its old tombstone was already applied
+    commit_changes(db, {"3": college("3", size=300)})
+    assert replica.sync(db) == 1
+    assert replicated(replica) == {"1": 100, "3": 300}
+
+    # Deleted and re-created between two syncs: the document exists, so it stays
+    commit_changes(db, {"1": None})
+    commit_changes(db, {"1": college("1", size=150)})
+    assert replica.sync(db) == 1
+    assert replicated(replica) == {"1": 150, "3": 300}
+
+
+def test_versions_continue_above_a_timestamp_marker():
+    db = InMemoryFirestore()
+    db.collection("sync_markers").document("colleges").set({"version": 1760000000.25, "changed": 1})
+    assert commit_changes(db, {"1": college("1")}) == 1760000001
@@ -0,0 +1,63 @@
+import numpy as np
+
+from college_facets import FacetIndex, facet_labels
+from college_filters import STATE_CODES, CollegeColumns
+
+
+def records(count=300):
+    rng = np.random.default_rng(0)
+    states = ["CA", "OR", "WA", None]
+    for i in range(count):
+        yield {
+            "school.state": states[i % len(states)],
+            "latest.cost.tuition.in_state": float(rng.integers(0, 60000)) if i % 7 else None,
+            "latest.admissions.admission_rate.overall": float(rng.random()),
+            "latest.student.size": float(rng.integers(100, 40000)),
+        }
+
+
+def brute_force(index, facet, selected, mask):
+    """
+    Counts for one facet: rows matching every other facet's selection and the mask.
+    """
+    labels = facet_labels(facet)
+    rows = mask.copy()
+    for other, wanted in selected.items():
+        if other != facet:
+            buckets = [bucket for bucket, label in enumerate(facet_labels(other)) if label in wanted]
+            rows &= np.isin(index.codes[other], buckets)
+    return dict(zip(labels, np.bincount(index.codes[facet][rows], minlength=len(labels)).tolist()))
+
+
+def test_unfiltered_counts_are_the_totals():
+    index = FacetIndex.from_columns(CollegeColumns.from_records(list(records())))
+    counts = index.counts()
+    assert counts["total"] == 300
+    assert counts["state"]["CA"] == 75 and counts["state"]["unknown"] == 75
+    assert sum(counts["tuition_in_state"].values()) == 300
+    assert counts["tuition_in_state"]["unknown"] == len(range(0, 300, 7))
+
+
+def test_each_facet_ignores_its_own_selection():
+    columns = CollegeColumns.from_records(list(records()))
+    index = FacetIndex.from_columns(columns)
+    selected = {"state": ["CA", "OR"], "student_size": ["15k-30k", "30k+"]}
+    mask = columns.numeric["admission_rate"] < 0.5
+
+    counts = index.counts(selected, mask)
+    for facet in ["state", "tuition_in_state", "admission_rate", "student_size"]:
+        assert counts[facet] == brute_force(index, facet, selected, mask)
+    # WA is not ticked but still shows how many colleges it would add
+    assert counts["state"]["WA"] > 0
+    states = [STATE_CODES.index("CA"), STATE_CODES.index("OR")]
+    expected = mask & np.isin(columns.state_codes, states) & (columns.numeric["student_size"] >= 15000)
+    assert counts["total"] == int(expected.sum())
+
+
+def test_take_lines_counts_up_with_another_row_order():
+    index = FacetIndex.from_columns(CollegeColumns.from_records(list(records())))
+    rows = np.arange(0, 300, 2)
+    mask = np.zeros(len(rows), dtype=bool)
+    mask[:10] = True
+    expected = brute_force(index, "state", {}, np.isin(np.arange(300), rows[:10]))
+    assert index.take(rows).counts(mask=mask)["state"] == expected
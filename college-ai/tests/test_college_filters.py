@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from college_filters import CollegeColumns, QueryFilters, parse_query
+
+
+@pytest.mark.parametrize("query, states, conditions", [
+    ("schools in CA under $15k in-state tuition with >50% admission rate", {"CA"},
+     [("tuition_in_state", "<", 15000.0), ("admission_rate", ">", 0.5)]),
+    ("colleges in Texas or Oklahoma with more than 20,000 students", {"TX", "OK"},
+     [("student_size", ">", 20000.0)]),
+    ("CA schools with admission rate over 70", {"CA"}, [("admission_rate", ">", 0.7)]),
+    ("acceptance rate at most 0.2", set(), [("admission_rate", "<=", 0.2)]),
+    ("out-of-state tuition below 30000", set(), [("tuition_out_of_state", "<", 30000.0)]),
+    ("top 100 ranked universities in New York", {"NY"}, [("world_rank", "<=", 100.0)]),
+    ("schools in West Virginia", {"WV"}, []),
+])
+def test_parse_query_extracts_filters(query, states, conditions):
+    filters = parse_query(query)
+    assert filters.states == states
+    assert filters.conditions == conditions
+
+
+@pytest.mark.parametrize("query", [
+    "University of Virginia",
+    "what are the best colleges for me",
+    "teams over 3",
+])
+def test_names_and_stray_numbers_are_not_filters(query):
+    assert not parse_query(query)
+
+
+def test_mask_applies_every_filter_and_never_matches_missing_values():
+    columns = CollegeColumns.from_records([
+        {"school.state": "CA", "latest.cost.tuition.in_state": 9000},
+        {"school.state": "CA", "latest.cost.tuition.in_state": 20000},
+        {"school.state": "OR", "latest.cost.tuition.in_state": 9000},
+        {"school.state": "CA"},
+    ])
+    assert columns.mask(parse_query("schools in CA under $15k")).tolist() == [True, False, False, False]
+    # Conditions on columns the view lacks (no ranking index) are ignored
+    filters = QueryFilters({"CA"}, [("world_rank", "<=", 100.0)])
+    assert np.array_equal(columns.mask(filters), [True, True, False, True])
+    assert columns.take([2, 0]).mask(parse_query("colleges in OR")).tolist() == [True, False]
@@ -0,0 +1,46 @@
+from college_rankings import match_rankings
+
+
+def college(college_id, name, city, size):
+    return {"id": college_id, "school.name": name, "school.city": city, "latest.student.size": size}
+
+
+COLLEGES = [
+    college(104151, "Arizona State University Campus Immersion", "Tempe", 64778),
+    college(483124, "Arizona State University Digital Immersion", "Scottsdale", 46412),
+    college(10415101, "Arizona State University-West", "Glendale", 0),
+    college(10415104, "Arizona State University - Tucson", "Tucson", 0),
+    college(10415111, "Arizona State University - Pima", "Tucson", 0),
+    college(135726, "University of Miami", "Coral Gables", 12215),
+    college(204006, "Miami University-Hamilton", "Hamilton", 2065),
+    college(204015, "Miami University-Middletown", "Middletown", 946),
+    college(204024, "Miami University-Oxford", "Oxford", 16721),
+    college(451103, "Miami Regional University", "Miami Springs", 267),
+    college(166027, "Harvard University", "Cambridge", 7973),
+]
+
+
+def matched_ids(rankings):
+    matches, _ = match_rankings(rankings, COLLEGES)
+    return {institution: college["id"] for institution, (college, _) in matches.items()}
+
+
+def test_campus_city_does_not_beat_the_main_campus():
+    # The Tucson campus used to score 1.0 because its city was dropped from its name
+    assert matched_ids(["Arizona State University"]) == {"Arizona State University": 104151}
+
+
+def test_word_order_separates_the_two_miamis():
+    assert matched_ids(["University of Miami", "Miami University"]) == {
+        "University of Miami": 135726,
+        "Miami University": 204024,
+    }
+    assert matched_ids(["Miami University"]) == {"Miami University": 204024}
+
+
+def test_exact_names_score_exactly_one():
+    matches, _ = match_rankings(["Harvard University", "University of Miami"], COLLEGES)
+    assert {institution: similarity for institution, (_, similarity) in matches.items()} == {
+        "Harvard University": 1.0,
+        "University of Miami": 1.0,
+    }
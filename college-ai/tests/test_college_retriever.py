@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("langchain")
+
+from ann_index import IVFIndex
+from change_marker import commit_changes
+from college_replica import CollegeReplica
+from college_retriever import CollegeRetriever
+from embedding_codec import encode_embedding
+from memory_firestore import InMemoryFirestore
+
+DIM = 16
+
+
+class QueryVectors:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_query(self, query):
+        return self.vectors[query]
+
+
+@pytest.fixture
+def replica(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((40, DIM)).astype(np.float32)
+    db = InMemoryFirestore()
+    commit_changes(db, {str(i): dict(encode_embedding(vectors[i], "float16"), **{
+        "school.name": f"College {i}", "school.city": f"City {i}", "school.state": "CA"}) for i in range(40)})
+    replica = CollegeReplica(str(tmp_path / "replica.sqlite3"))
+    replica.sync(db)
+    replica.vectors = vectors
+    return replica
+
+
+def from_replica(replica, index=None):
+    return CollegeRetriever.from_colleges(list(replica.records()), QueryVectors({"query": replica.vectors[7]}),
+                                          index=index, vectors=replica.vector_index(),
+                                          source_version=replica.version)
+
+
+def test_replica_without_ann_index_searches_its_stored_embeddings(replica):
+    retriever = from_replica(replica)
+    assert len(retriever.index.ids) == 40
+    assert retriever.search("query")[0][0] == "7"
+
+
+def test_replica_reindexes_an_ann_index_built_from_other_data(replica):
+    rng = np.random.default_rng(1)
+    stale = IVFIndex.build([f"old-{i}" for i in range(40)], rng.standard_normal((40, DIM)), nlist=4, nprobe=4)
+    retriever = from_replica(replica, stale)
+
+    assert isinstance(retriever.index, IVFIndex)
+    assert sorted(retriever.index.ids, key=int) == [str(i) for i in range(40)]
+    assert retriever.index.covers(retriever.index.ids, replica.version)
+    assert retriever.search("query")[0][0] == "7"
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from college_filters import parse_query
+from college_snapshot import CollegeSnapshot, build_snapshot, current_snapshot_dir, publish_snapshot
+
+
+def colleges(count=3, dim=None):
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        college = {"id": i + 1, "school.name": f"College {i + 1}", "school.city": "Peoria" if i == 1 else "Normal",
+                   "school.state": "IL", "latest.cost.tuition.in_state": 1000.0 * (i + 1)}
+        if dim:
+            college["embedding"] = rng.standard_normal(dim).tolist()
+        yield college
+
+
+def test_snapshot_without_embeddings_is_not_published(tmp_path):
+    root = str(tmp_path / "snapshots")
+    publish_snapshot(colleges(dim=8), root)
+    published = current_snapshot_dir(root)
+
+    with pytest.raises(ValueError, match="no college has an embedding"):
+        publish_snapshot(colleges(), root)
+    assert current_snapshot_dir(root) == published
+    assert CollegeSnapshot(published).vector_index().search(np.ones(8), k=3)
+
+
+def test_snapshot_without_embeddings_is_served_by_the_lexical_index(tmp_path):
+    pytest.importorskip("langchain")
+    from college_retriever import CollegeRetriever
+
+    directory = str(tmp_path / "snapshot")
+    build_snapshot(colleges(), directory)
+    retriever = CollegeRetriever.from_snapshot(CollegeSnapshot(directory), embeddings=None)
+
+    assert retriever.index is None
+    assert retriever.exact_match("College 2") == "2"
+    assert sorted(college_id for college_id, _ in retriever.search("colleges in Normal")) == ["1", "3"]
+    assert [college_id for college_id, _ in retriever.search("colleges in Normal under $2500 tuition")] == ["1"]
+
+
+def test_facet_counts_leave_out_colleges_search_cannot_return(tmp_path):
+    pytest.importorskip("langchain")
+    from college_retriever import CollegeRetriever
+
+    directory = str(tmp_path / "snapshot")
+    records = list(colleges(dim=8))
+    del records[0]["embedding"]
+    build_snapshot(records, directory)
+    retriever = CollegeRetriever.from_snapshot(CollegeSnapshot(directory), embeddings=None)
+
+    assert retriever.facet_counts()["total"] == 2
+    assert retriever.facet_counts("colleges in IL")["state"]["IL"] == 2
+    assert retriever.facet_counts(selected={"state": ["IL"]})["total"] == 2
+
+
+def test_snapshot_round_trips_records_columns_and_embeddings(tmp_path):
+    directory = str(tmp_path / "snapshot")
+    source = list(colleges(dim=8))
+    source[1]["school.name"] = "Université de Montréal"
+    source[2]["latest.admissions.admission_rate.overall"] = 0.684
+    build_snapshot(source, directory)
+    snapshot = CollegeSnapshot(directory)
+
+    assert len(snapshot) == 3
+    record = snapshot.records()["2"]
+    assert record["school.name"] == "Université de Montréal"
+    assert record["latest.cost.tuition.in_state"] == 2000 and record["latest.student.size"] is None
+    assert snapshot.records()["3"]["latest.admissions.admission_rate.overall"] == 0.684
+    assert "4" not in snapshot.records()
+
+    assert snapshot.columns().mask(parse_query("colleges in IL under $2500 tuition")).tolist() == [True, True, False]
+    assert snapshot.text_column("school.city") == ["Normal", "Peoria", "Normal"]
+    hits = snapshot.vector_index().search(np.asarray(source[2]["embedding"]), k=1)
+    assert hits[0][0] == "3"
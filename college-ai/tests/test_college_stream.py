@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from college_stream import export_ndjson, iter_colleges
+
+COLLEGES = [
+    {"id": 100654, "school.name": "Alabama A & M University", "latest.cost.tuition.in_state": 10024},
+    {"id": 100663, "school.name": "University of Alabama at Birmingham", "aliases": ["UAB", "[]{},"]},
+    {"id": 100690, "school.name": "Amridge University", "latest.admissions.admission_rate.overall": None},
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_json_array_is_streamed_across_read_chunks(tmp_path, chunk_size):
+    path = tmp_path / "colleges.json"
+    path.write_text("\n  " + json.dumps(COLLEGES, indent=2))
+    assert list(iter_colleges(str(path), chunk_size=chunk_size)) == COLLEGES
+
+
+def test_ndjson_skips_blank_lines_and_reports_bad_ones(tmp_path):
+    path = tmp_path / "colleges.ndjson"
+    path.write_text("\n".join(json.dumps(college) for college in COLLEGES) + "\n\n")
+    assert list(iter_colleges(str(path))) == COLLEGES
+
+    path.write_text(json.dumps(COLLEGES[0]) + "\n{\"id\": \n")
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_colleges(str(path)))
+
+
+def test_truncated_array_and_empty_file(tmp_path):
+    path = tmp_path / "colleges.json"
+    path.write_text(json.dumps(COLLEGES)[:-20])
+    with pytest.raises(ValueError, match="Unexpected end of file"):
+        list(iter_colleges(str(path), chunk_size=16))
+
+    path.write_text("  \n")
+    assert list(iter_colleges(str(path))) == []
+
+
+def test_export_ndjson_round_trips(tmp_path):
+    source, dest = tmp_path / "colleges.json", tmp_path / "colleges.ndjson"
+    source.write_text(json.dumps(COLLEGES))
+    assert export_ndjson(str(source), str(dest)) == 3
+    assert [json.loads(line) for line in dest.read_text().splitlines()] == COLLEGES
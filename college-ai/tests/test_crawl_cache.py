@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from crawl_cache import CrawlCheckpoint, PageCache
+
+
+class FakeScorecard:
+    """
+    Three pages of colleges per state, then an empty page; page `fail_at` of
+    `fail_state` raises, as a dropped connection would.
+    """
+
+    def __init__(self, fail_state=None, fail_at=None):
+        self.fail_state = fail_state
+        self.fail_at = fail_at
+        self.requests = []
+
+    def __call__(self, state, page=0, per_page=100):
+        self.requests.append((state, page))
+        if (state, page) == (self.fail_state, self.fail_at):
+            raise ConnectionError("connection reset")
+        results = [{"id": f"{state}-{page}-{i}"} for i in range(2)] if page < 3 else []
+        return {"results": results}
+
+
+def test_checkpoint_survives_a_restart(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.record_page("CA", 0)
+    checkpoint.record_page("CA", 1)
+    checkpoint.record_page("OR", 0, last=True)
+
+    reloaded = CrawlCheckpoint(path)
+    assert reloaded.pages_done("CA") == 2 and not reloaded.is_complete("CA")
+    assert reloaded.pages_done("OR") == 1 and reloaded.is_complete("OR")
+    assert reloaded.pages_done("WA") == 0
+
+    reloaded.clear()
+    assert CrawlCheckpoint(path).pages_done("CA") == 0
+
+
+def test_interrupted_crawl_resumes_from_its_cached_pages(tmp_path):
+    pytest.importorskip("google.cloud.firestore")
+    from fetch_colleges import StateCrawler
+
+    # Every cache entry is already past its TTL: only the checkpoint makes them reusable
+    cache = PageCache(str(tmp_path / "cache"), ttl=-1)
+    checkpoint = CrawlCheckpoint(str(tmp_path / "checkpoint.json"))
+    first = FakeScorecard(fail_state="CA", fail_at=2)
+    crawler = StateCrawler(["CA", "OR"], fetch_page=first, max_workers=2, cache=cache, checkpoint=checkpoint)
+    assert len(list(crawler)) == 10
+    assert list(crawler.failures) == ["CA"]
+
+    second = FakeScorecard()
+    crawler = StateCrawler(["CA", "OR"], fetch_page=second, max_workers=2, cache=cache,
+                           checkpoint=CrawlCheckpoint(checkpoint.path))
+    colleges = list(crawler)
+    assert sorted(second.requests) == [("CA", 2), ("CA", 3)]
+    assert crawler.pages_cached == 6 and not crawler.failures
+    assert len(colleges) == 12 and len({college["id"] for college in colleges}) == 12
+
+
+def test_slow_consumer_holds_the_crawl_back():
+    pytest.importorskip("google.cloud.firestore")
+    from fetch_colleges import StateCrawler
+
+    crawler = StateCrawler(["CA", "OR", "WA"], fetch_page=FakeScorecard(fail_state="OR", fail_at=0),
+                           max_workers=2, queue_size=1)
+    colleges = iter(crawler)
+    first = next(colleges)
+    time.sleep(0.2)
+    # One page consumed, one queued and one held by each blocked worker
+    assert crawler.pages_fetched <= 4
+    assert len([first] + list(colleges)) == 12
+    assert list(crawler.failures) == ["OR"]
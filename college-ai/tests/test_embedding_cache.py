@@ -0,0 +1,44 @@
+import pytest
+
+from embedding_cache import CachedDocumentEmbeddings, EmbeddingCache, embedding_key
+
+
+class CountingEmbeddings:
+    model = "test-embedding"
+
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_only_uncached_texts_reach_the_model(cache):
+    embeddings = CachedDocumentEmbeddings(CountingEmbeddings(), cache)
+    assert embeddings.embed_documents(["a", "bb"]) == [[1.0, 0.5], [2.0, 0.5]]
+    assert embeddings.embed_documents(["bb", "ccc", "ccc"]) == [[2.0, 0.5], [3.0, 0.5], [3.0, 0.5]]
+
+    assert embeddings.embeddings.batches == [["a", "bb"], ["ccc"]]
+    # The repeated "ccc" is sent once
+    assert embeddings.stats() == {"hits": 2, "misses": 3, "api_calls": 2, "cached": 3}
+    assert embeddings.embed_documents(["a"]) == [[1.0, 0.5]] and embeddings.api_calls == 2
+
+
+def test_cache_persists_and_is_keyed_by_model(cache):
+    CachedDocumentEmbeddings(CountingEmbeddings(), cache).embed_documents(["a"])
+    reopened = EmbeddingCache(cache.path)
+    key = embedding_key("test-embedding", "a")
+    assert reopened.get_many([key, embedding_key("test-embedding", "b")]) == {key: [1.0, 0.5]}
+
+    other_model = CachedDocumentEmbeddings(CountingEmbeddings(), reopened, model="other-model")
+    other_model.embed_documents(["a"])
+    assert other_model.embeddings.batches == [["a"]]
+    reopened.close()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from embedding_codec import decode_embedding, embedding_matrix, embedding_storage, encode_embedding
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).standard_normal((6, 32)).astype(np.float32)
+
+
+@pytest.mark.parametrize("storage, tolerance", [("float32", 0.0), ("float16", 1e-3), ("int8", 1 / 254)])
+def test_round_trip_stays_within_quantization_error(vectors, storage, tolerance):
+    for vector in vectors:
+        record = encode_embedding(vector, storage)
+        assert embedding_storage(record) == storage
+        decoded = decode_embedding(record)
+        assert decoded.dtype == np.float32
+        # int8 error is at most half a step of max|x| / 127; float16 keeps ~3 significant digits
+        assert np.abs(decoded - vector).max() <= tolerance * np.abs(vector).max() + 1e-7
+
+
+def test_int8_is_one_byte_per_dimension_and_keeps_zero_vectors(vectors):
+    assert len(encode_embedding(vectors[0], "int8")["embedding_q"]) == 32
+    assert len(encode_embedding(vectors[0], "float16")["embedding_q"]) == 64
+    assert not decode_embedding(encode_embedding(np.zeros(8), "int8")).any()
+
+
+def test_matrix_decodes_mixed_storage_in_record_order(vectors):
+    records = [encode_embedding(vectors[0], "int8"), {"school.name": "No embedding"},
+               encode_embedding(vectors[1], "float32"), encode_embedding(vectors[2], "float16"),
+               encode_embedding(vectors[3], "int8")]
+    positions, matrix = embedding_matrix(records)
+
+    assert positions == [0, 2, 3, 4]
+    assert np.allclose(matrix, vectors[:4], atol=0.02)
+    assert decode_embedding(records[1]) is None and embedding_storage(records[1]) is None
+
+
+def test_unknown_storage_is_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding storage"):
+        encode_embedding([1.0], "bfloat16")
@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+# No local embedding cache: every description the tests expect embedded reaches the stub
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+try:
+    import generate_embeddings
+except Exception as error:  # needs google-cloud-firestore, langchain and Firestore credentials
+    pytest.skip(f"generate_embeddings is unavailable: {error}", allow_module_level=True)
+
+from ann_index import IVFIndex
+from change_marker import SYNC_FIELD, commit_changes, read_change_marker
+from embedding_codec import EMBEDDING_KEY_FIELD
+from memory_firestore import InMemoryFirestore
+
+COLLEGES = {str(i): {"school.name": f"College {i}", "school.city": f"City {i}", "school.state": "CA"}
+            for i in range(1, 6)}
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts += texts
+        return [[float(len(text)), float(text.count("o")), 1.0] for text in texts]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = InMemoryFirestore()
+    commit_changes(db, COLLEGES)
+    monkeypatch.setattr(generate_embeddings, "firestore_client", db)
+    monkeypatch.setattr(generate_embeddings, "embeddings", CountingEmbeddings())
+    return db
+
+
+def run(**params):
+    generate_embeddings.embeddings.texts = []
+    params = dict(dict(batch_size=2, max_concurrency=2, checkpoint_path=None, storage="int8"), **params)
+    return generate_embeddings.add_embeddings_to_firestore(**params)
+
+
+def test_unchanged_descriptions_are_neither_embedded_nor_written(db):
+    assert run() == 5
+    assert db.collection("colleges").document("1").get().get(EMBEDDING_KEY_FIELD)
+    marker = read_change_marker(db)
+
+    assert run() == 0
+    assert generate_embeddings.embeddings.texts == []
+    assert read_change_marker(db) == marker
+
+    commit_changes(db, {"3": {"school.city": "Normal"}})
+    stamped = db.collection("colleges").document("3").get().get(SYNC_FIELD)
+    assert run() == 1
+    assert generate_embeddings.embeddings.texts == ["College 3 in Normal, CA."]
+    assert db.collection("colleges").document("1").get().get(SYNC_FIELD) < stamped
+
+
+def test_new_storage_format_rewrites_every_embedding(db):
+    run()
+    assert run(storage="float16") == 5
+    assert db.collection("colleges").document("2").get().get("embedding_dtype") == "float16"
+
+
+def test_colleges_streamed_from_a_file_are_checked_against_firestore(db, tmp_path):
+    run()
+    source = tmp_path / "colleges.json"
+    source.write_text(json.dumps([dict(college, id=int(college_id)) for college_id, college in COLLEGES.items()]))
+    assert run(source_path=str(source)) == 0
+    assert generate_embeddings.embeddings.texts == []
+
+
+def test_ann_index_keeps_the_colleges_that_were_skipped(db, tmp_path):
+    run()
+    path = str(tmp_path / "ivf.npz")
+    assert run(ann_index_path=path) == 0
+    index = IVFIndex.load(path)
+    assert sorted(index.ids) == sorted(COLLEGES)
+    assert index.covers(sorted(COLLEGES), read_change_marker(db)["version"])
+
+
+def test_crashed_run_resumes_after_its_checkpoint(db, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    embed = generate_embeddings.embeddings.embed_documents
+
+    def fail_on_second_batch(texts):
+        if generate_embeddings.embeddings.texts:
+            raise ConnectionError("connection reset")
+        return embed(texts)
+
+    generate_embeddings.embeddings.embed_documents = fail_on_second_batch
+    with pytest.raises(ConnectionError):
+        run(max_concurrency=1, checkpoint_path=checkpoint)
+    assert generate_embeddings.load_checkpoint(checkpoint) == "2"
+
+    # Colleges before the checkpoint are not read again, even if they changed since
+    generate_embeddings.embeddings.embed_documents = embed
+    commit_changes(db, {"1": {"school.city": "Normal"}})
+    assert run(max_concurrency=1, checkpoint_path=checkpoint) == 3
+    assert generate_embeddings.embeddings.texts == [f"College {i} in City {i}, CA." for i in (3, 4, 5)]
+    assert not os.path.exists(checkpoint)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+
+COLLEGES = {
+    "100654": {"school.name": "Alabama A & M University", "school.city": "Normal", "school.state": "AL"},
+    "100663": {"school.name": "University of Alabama at Birmingham", "school.city": "Birmingham",
+               "school.state": "AL"},
+    "100706": {"school.name": "University of Alabama in Huntsville", "school.city": "Huntsville",
+               "school.state": "AL"},
+    "110635": {"school.name": "University of California-Berkeley", "school.city": "Berkeley",
+               "school.state": "CA"},
+    "145725": {"school.name": "Illinois State University", "school.city": "Normal", "school.state": "IL"},
+}
+
+
+@pytest.fixture
+def index():
+    return LexicalIndex.from_records(list(COLLEGES), COLLEGES.values())
+
+
+@pytest.mark.parametrize("query, college_id", [
+    ("Alabama A&M University", "100654"),
+    ("alabama a & m", "100654"),
+    ("University of California-Berkeley", "110635"),
+    ("Illinois State", "145725"),
+])
+def test_exact_match_finds_the_one_named_college(index, query, college_id):
+    assert index.exact_match(query) == college_id
+
+
+@pytest.mark.parametrize("query", [
+    "University of Alabama",  # prefix of two names
+    "Illinois",               # too short a prefix of the name
+    "colleges in Alabama",
+    "",
+])
+def test_exact_match_ignores_ambiguous_or_partial_names(index, query):
+    assert index.exact_match(query) is None
+
+
+def test_bm25_ranks_name_matches_above_city_matches(index):
+    hits = index.search("Birmingham")
+    assert [college_id for college_id, _ in hits] == ["100663"]
+
+    hits = index.search("normal illinois")
+    assert [college_id for college_id, _ in hits] == ["145725", "100654"]
+    assert index.search("normal illinois", mask=np.array([True, True, True, True, False]))[0][0] == "100654"
+    assert index.search("stanford") == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]], k=60)
+    assert [college_id for college_id, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    assert reciprocal_rank_fusion([["a", "b"], ["c"]], limit=2) == reciprocal_rank_fusion([["a", "b"], ["c"]])[:2]
@@ -0,0 +1,64 @@
+import pytest
+
+import search_cache
+from search_cache import AnswerCache, CachedQueryEmbeddings, LRUCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(search_cache.time, "monotonic", clock)
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_answers_expire_after_their_ttl(clock):
+    answers = AnswerCache(ttl=60)
+    answers.put("Colleges in Ohio?", ["1", "2"], "v1", "answer")
+    clock.now += 59
+    assert answers.get("colleges in  ohio", ["1", "2"], "v1") == "answer"
+    clock.now += 1
+    assert answers.get("colleges in ohio", ["1", "2"], "v1") is None
+    assert answers.stats()["expirations"] == 1
+
+
+def test_answers_are_keyed_on_retrieved_ids_and_dropped_on_a_new_version():
+    answers = AnswerCache()
+    answers.put("colleges in ohio", ["1", "2"], "v1", "answer")
+    assert answers.get("colleges in ohio", ["2", "1"], "v1") is None
+
+    assert answers.get("colleges in ohio", ["1", "2"], "v2") is None
+    assert answers.get("colleges in ohio", ["1", "2"], "v1") is None
+    assert answers.stats()["invalidations"] == 2
+
+
+def test_repeated_queries_are_embedded_once():
+    class Embeddings:
+        calls = 0
+
+        def embed_query(self, text):
+            self.calls += 1
+            return [float(len(text))]
+
+    embeddings = CachedQueryEmbeddings(Embeddings())
+    assert embeddings.embed_query("Colleges in Ohio") == embeddings.embed_query("colleges in ohio?")
+    assert embeddings.embeddings.calls == 1
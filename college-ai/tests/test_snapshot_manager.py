@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+from change_marker import commit_changes
+from college_replica import CollegeReplica
+from college_snapshot import VERSIONS_DIR, publish_snapshot
+from memory_firestore import InMemoryFirestore
+from snapshot_manager import ReplicaManager, SnapshotManager
+
+
+def publish(root, count):
+    rng = np.random.default_rng(count)
+    return publish_snapshot(({"id": i, "school.name": f"College {i}", "embedding": rng.standard_normal(4).tolist()}
+                             for i in range(count)), root)["version"]
+
+
+def test_snapshot_manager_keeps_a_version_until_its_queries_finish(tmp_path):
+    root = str(tmp_path / "snapshots")
+    with pytest.raises(FileNotFoundError):
+        SnapshotManager(root, len)
+    first = publish(root, 2)
+    manager = SnapshotManager(root, len, keep=1)
+    assert not manager.refresh()
+
+    with manager.acquire() as before:
+        second = publish(root, 3)
+        assert manager.refresh()
+        assert manager.version == second
+        assert before == 2
+        assert manager.in_use() == {first, second}
+        # Still being read, so garbage collection spares it
+        assert os.path.isdir(os.path.join(root, VERSIONS_DIR, first))
+
+    assert manager.in_use() == {second}
+    with manager.acquire() as after:
+        assert after == 3
+
+
+def names(replica):
+    return {record["id"]: record["school.name"] for record in replica.records()}
+
+
+def test_replica_manager_swaps_in_synced_changes(tmp_path):
+    db = InMemoryFirestore()
+    commit_changes(db, {"1": {"school.name": "College 1"}})
+    loads = []
+    manager = ReplicaManager(CollegeReplica(str(tmp_path / "replica.sqlite3")), db,
+                             lambda replica: loads.append(replica.version) or names(replica))
+    assert manager.version == 1
+
+    with manager.acquire() as before:
+        commit_changes(db, {"2": {"school.name": "College 2"}, "1": None})
+        assert manager.refresh()
+        # A query that acquired the old value keeps it until it finishes
+        assert before == {"1": "College 1"}
+
+    with manager.acquire() as after:
+        assert after == {"2": "College 2"}
+    assert manager.version == 2
+
+    # Nothing changed in Firestore: no reload
+    assert not manager.refresh()
+    assert loads == [1, 2]
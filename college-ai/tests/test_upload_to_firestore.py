@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from change_marker import SYNC_FIELD, tombstones_collection
+from memory_firestore import InMemoryFirestore
+from upload_to_firestore import load_manifest, upload_colleges
+
+
+def college(college_id, **fields):
+    return dict({"id": college_id, "school.name": f"College {college_id}", "school.state": "CA"}, **fields)
+
+
+def stored(db, college_id):
+    return db.collection("colleges").document(str(college_id)).get().to_dict()
+
+
+def versions(db):
+    """
+    Sync version each document was last written at.
+    """
+    return {ref.id: ref.get().get(SYNC_FIELD) for ref in db.collection("colleges").list_documents()}
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    return str(tmp_path / "manifest.json")
+
+
+def test_only_changed_colleges_are_written(manifest_path):
+    db = InMemoryFirestore()
+    assert upload_colleges([college(1), college(2), college(3)], db, manifest_path) == 3
+    assert sorted(load_manifest(manifest_path)) == ["1", "2", "3"]
+
+    db.reset_counters()
+    assert upload_colleges([college(1), college(2), college(3)], db, manifest_path) == 0
+    assert db.writes == db.reads == 0
+
+    assert upload_colleges([college(1), college(2, **{"school.city": "Fresno"}), college(3)], db, manifest_path) == 1
+    assert versions(db) == {"1": 1, "2": 2, "3": 1}
+    assert stored(db, 2)["school.city"] == "Fresno"
+
+
+def test_fields_dropped_from_the_source_are_deleted_but_embeddings_kept(manifest_path):
+    db = InMemoryFirestore()
+    upload_colleges([college(1, **{"school.city": "Fresno"})], db, manifest_path)
+    db.collection("colleges").document("1").update({"embedding": [0.5, 0.5]})
+
+    upload_colleges([college(1, **{"school.name": "Fresno College"})], db, manifest_path)
+    document = stored(db, 1)
+    assert "school.city" not in document
+    assert document["school.name"] == "Fresno College"
+    assert document["embedding"] == [0.5, 0.5]
+
+
+def test_without_a_manifest_firestore_is_compared_instead(manifest_path):
+    db = InMemoryFirestore()
+    upload_colleges([college(1), college(2)], db, manifest_path=None)
+
+    assert upload_colleges([college(1), college(2, **{"school.state": "OR"})], db, manifest_path) == 1
+    assert versions(db) == {"1": 1, "2": 2}
+    assert load_manifest(manifest_path) is not None
+
+
+@pytest.mark.parametrize("use_manifest", [True, False])
+def test_prune_deletes_colleges_gone_from_the_source(manifest_path, use_manifest):
+    db = InMemoryFirestore()
+    path = manifest_path if use_manifest else None
+    upload_colleges([college(1), college(2), college(3)], db, path)
+
+    assert upload_colleges([college(1), college(3)], db, path) == 0
+    assert sorted(versions(db)) == ["1", "2", "3"]
+
+    assert upload_colleges([college(1), college(3)], db, path, prune=True) == 1
+    assert sorted(versions(db)) == ["1", "3"]
+    assert db.collection(tombstones_collection()).document("2").get().get(SYNC_FIELD) == 2
+    if use_manifest:
+        assert sorted(load_manifest(manifest_path)) == ["1", "3"]
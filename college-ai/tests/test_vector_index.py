@@ -0,0 +1,35 @@
+import numpy as np
+
+from vector_index import VectorIndex
+
+
+def clustered(count, dim, clusters, rng):
+    centres = rng.standard_normal((clusters, dim), dtype=np.float32)
+    return centres[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dim), dtype=np.float32)
+
+
+def test_two_stage_search_keeps_recall_and_returns_exact_scores():
+    rng = np.random.default_rng(0)
+    vectors = clustered(3000, 128, 20, rng)
+    ids = [str(i) for i in range(len(vectors))]
+    exact = VectorIndex(ids, vectors, coarse_dim=0)
+    two_stage = VectorIndex(ids, vectors, coarse_dim=32)
+    assert exact.coarse is None and two_stage.coarse.shape == (3000, 32)
+    mask = rng.random(len(vectors)) < 0.5
+    recalls = []
+    for query in vectors[:20] + 0.5 * rng.standard_normal((20, 128), dtype=np.float32):
+        for search_mask in (None, mask):
+            expected = {college_id for college_id, _ in exact.search(query, k=10, mask=search_mask)}
+            found = two_stage.search(query, k=10, mask=search_mask)
+            recalls.append(len(expected & {college_id for college_id, _ in found}) / 10)
+            rows = [int(college_id) for college_id, _ in found]
+            assert search_mask is None or search_mask[rows].all()
+            np.testing.assert_allclose([score for _, score in found], exact.scores(query, rows), rtol=1e-5)
+    assert np.mean(recalls) >= 0.95
+
+
+def test_unstructured_or_small_indexes_scan_exactly():
+    rng = np.random.default_rng(0)
+    noise = rng.standard_normal((3000, 128), dtype=np.float32)
+    assert VectorIndex([str(i) for i in range(3000)], noise, coarse_dim=32).coarse is None
+    assert VectorIndex(["a", "b"], clustered(2, 128, 1, rng), coarse_dim=32).coarse is None
@@ -0,0 +1,267 @@
+"""
+Company intelligence store for the Company Research Agent.
+
+Research results are kept per normalized company name in a SQLite file shared by
+every gunicorn worker. Fresh entries are served directly; stale ones are served
+immediately while a background refresh runs; missing ones are fetched once no
+matter how many requests ask for the same company at the same time.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = os.getenv("COMPANY_INTEL_PATH", os.path.join(tempfile.gettempdir(), "launch_kit_company_intel.sqlite3"))
+FRESH_SECONDS = int(os.getenv("COMPANY_INTEL_FRESH_SECONDS", 24 * 3600))
+# After going stale, how long an entry may still be served while it refreshes
+STALE_SECONDS = int(os.getenv("COMPANY_INTEL_STALE_SECONDS", 7 * 24 * 3600))
+# How long one process may hold a company's fetch before others stop waiting for it
+LEASE_SECONDS = float(os.getenv("COMPANY_INTEL_LEASE_SECONDS", 60))
+LEASE_POLL_SECONDS = 0.2
+REFRESH_WORKERS = int(os.getenv("COMPANY_INTEL_REFRESH_WORKERS", 2))
+
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "lp", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "ag", "sa", "nv", "bv", "pte", "pty", "holdings", "group",
+}
+# Companies better known by another name; keys and values are normalized names
+ALIASES = {
+    "alphabet": "google",
+    "facebook": "meta",
+    "meta platforms": "meta",
+    "international business machines": "ibm",
+    "amazon com": "amazon",
+    "amazon web services": "amazon",
+    "aws": "amazon",
+    "x": "twitter",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS company_intel (
+    company_key TEXT PRIMARY KEY,
+    company_name TEXT NOT NULL,
+    intel TEXT NOT NULL,
+    refreshed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    company_key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def normalize_company_name(name):
+    """
+    Canonical key for a company name: "Google LLC", "google, inc." and "Alphabet"
+    all become "google".
+    """
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    text = text.replace("&", " and ")
+    words = re.findall(r"[a-z0-9]+", text)
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    key = " ".join(words)
+    return ALIASES.get(key, key)
+
+
+class _Flight:
+    """One in-process fetch that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class CompanyIntelStore:
+    """
+    Stale-while-revalidate cache in front of `fetch(company_name) -> dict`.
+
+    Concurrent misses for one company are coalesced: threads in this process wait
+    on a single in-flight fetch, and other processes see its lease row and poll for
+    the result instead of calling `fetch` themselves. `fetch` should raise rather
+    than return placeholder data, so failures are never stored.
+    """
+
+    def __init__(self, fetch, path=STORE_PATH, fresh_seconds=FRESH_SECONDS, stale_seconds=STALE_SECONDS,
+                 lease_seconds=LEASE_SECONDS, refresh_workers=REFRESH_WORKERS):
+        self.fetch = fetch
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{os.getpid()}-{id(self)}"
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "fetches": 0, "coalesced": 0, "refresh_errors": 0}
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="company-intel")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _read(self, key):
+        row = self._connection().execute(
+            "SELECT company_name, intel, refreshed_at FROM company_intel WHERE company_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {"company_key": key, "company_name": row[0], "intel": json.loads(row[1]), "refreshed_at": row[2]}
+
+    def _write(self, key, company_name, intel):
+        self._connection().execute("INSERT OR REPLACE INTO company_intel VALUES (?, ?, ?, ?)",
+                                   (key, company_name, json.dumps(intel), time.time()))
+
+    def _claim(self, key):
+        """
+        Take the cross-process lease on `key`, or return False if another live process holds it.
+        """
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT owner, expires_at FROM leases WHERE company_key = ?", (key,)).fetchone()
+            if row is not None and row[0] != self.owner and row[1] > now:
+                return False
+            connection.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (key, self.owner, now + self.lease_seconds))
+            return True
+        finally:
+            connection.execute("COMMIT")
+
+    def _release(self, key):
+        self._connection().execute("DELETE FROM leases WHERE company_key = ? AND owner = ?", (key, self.owner))
+
+    def _await_other_process(self, key, since):
+        """
+        Poll for the entry another process is fetching; None if its lease lapses first.
+        """
+        deadline = time.time() + self.lease_seconds
+        while time.time() < deadline:
+            entry = self._read(key)
+            if entry is not None and entry["refreshed_at"] >= since:
+                return entry
+            if self._connection().execute("SELECT 1 FROM leases WHERE company_key = ?", (key,)).fetchone() is None:
+                # Released: either it just stored the entry or its fetch failed
+                entry = self._read(key)
+                return entry if entry is not None and entry["refreshed_at"] >= since else None
+            time.sleep(LEASE_POLL_SECONDS)
+        return None
+
+    def _load(self, key, company_name, wait_for_others=True):
+        """
+        Fetch and store `key`, sharing the work with every concurrent caller.
+        Returns the new entry, or None when another process already holds the
+        lease and `wait_for_others` is False.
+        """
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = _Flight()
+                    break
+            self._count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.value is not None or not wait_for_others:
+                return flight.value
+            # That flight was a background refresh that deferred to another process
+        try:
+            started = time.time()
+            entry = None
+            if not self._claim(key):
+                if not wait_for_others:
+                    return None
+                self._count("coalesced")
+                entry = self._await_other_process(key, started)
+            if entry is None:
+                try:
+                    self._count("fetches")
+                    intel = self.fetch(company_name)
+                    self._write(key, company_name, intel)
+                finally:
+                    self._release(key)
+                entry = self._read(key)
+            flight.value = entry
+            return entry
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _refresh_in_background(self, key, company_name):
+        def refresh():
+            try:
+                entry = self._read(key)
+                if entry is None or time.time() - entry["refreshed_at"] >= self.fresh_seconds:
+                    self._load(key, company_name, wait_for_others=False)
+            except Exception as error:
+                self._count("refresh_errors")
+                logger.warning(f"Background refresh failed for {company_name}: {error}")
+
+        with self._lock:
+            if key in self._flights:
+                return
+        self._refresher.submit(refresh)
+
+    def get(self, company_name, force_refresh=False):
+        """
+        Research for `company_name` as (entry, state): state is "fresh", "stale"
+        (served while a background refresh runs) or "miss" (fetched now). Raises
+        whatever `fetch` raises when there is nothing stored to fall back on.
+        """
+        key = normalize_company_name(company_name)
+        entry = None if force_refresh else self._read(key)
+        age = time.time() - entry["refreshed_at"] if entry else None
+        if entry is not None and age < self.fresh_seconds:
+            state = "fresh"
+        elif entry is not None and age < self.fresh_seconds + self.stale_seconds:
+            state = "stale"
+            self._refresh_in_background(key, company_name)
+        else:
+            state = "miss"
+            entry = self._load(key, company_name)
+        self._count(state)
+        return entry, state
+
+    def warm(self, company_names, force_refresh=False, max_workers=4):
+        """
+        Load many companies at once, fetching only those not already fresh.
+        Returns {company_name: {"company_key", "state"}} with state "error" on failure.
+        """
+        def warm_one(company_name):
+            try:
+                entry, state = self.get(company_name, force_refresh=force_refresh)
+                if state == "stale":
+                    # Warming should leave the entry fresh, not just schedule the refresh
+                    entry = self._load(entry["company_key"], company_name)
+                    state = "refreshed"
+                return {"company_key": entry["company_key"], "state": state}
+            except Exception as error:
+                return {"company_key": normalize_company_name(company_name), "state": "error", "error": str(error)}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return dict(zip(company_names, pool.map(warm_one, company_names)))
@@ -4,13 +4,13 @@ Gathers and analyzes information about a company for personalization.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai
-import json
 import os
 from datetime import datetime
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from dotenv import load_dotenv
+from shared.utils import gemini_client
+from company_intel import CompanyIntelStore
 
 # Load environment variables
 load_dotenv()
@@ -28,11 +28,11 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 FLASK_ENV = os.getenv('FLASK_ENV', 'development')
 PORT = int(os.getenv('PORT', 8082)) # Different port
 AGENT_VERSION = os.getenv('AGENT_VERSION', '1.0.0')
+WARM_CONCURRENCY = int(os.getenv('COMPANY_INTEL_WARM_CONCURRENCY', 4))
 
 # Configure Gemini
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-1.5-flash')
+    model = gemini_client.get_model('models/gemini-1.5-flash', agent='company-research', api_key=GEMINI_API_KEY)
     logger.info("Gemini API configured successfully for Company Research Agent")
 else:
     logger.warning("No Gemini API key found - Company Research Agent will use mock data")
@@ -53,7 +53,8 @@ class CompanyResearchAgent:
             "input_schema": {
                 "type": "object",
                 "properties": {
-                    "company_name": {"type": "string", "description": "The name of the company to research"}
+                    "company_name": {"type": "string", "description": "The name of the company to research"},
+                    "bypass_cache": {"type": "boolean", "default": False, "description": "Skip the cached Gemini response"}
                 },
                 "required": ["company_name"]
             },
@@ -65,51 +66,63 @@ class CompanyResearchAgent:
                 }
             }
         }
+        self.intel_store = CompanyIntelStore(self._fetch_company_intel)
     
-    def research_company(self, company_name: str) -> Dict[str, Any]:
-        """Use Gemini to research and analyze a company."""
+    def research_company(self, company_name: str, bypass_cache: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Research a company through the intel store; returns (intelligence, cache metadata)."""
         
         if not GEMINI_API_KEY:
-            return self._get_mock_analysis()
+            return self._get_mock_analysis(), {"cache_state": "disabled"}
         
         try:
-            # In a real scenario, this would also involve web scraping or news API calls.
-            # For this version, we rely on the LLM's knowledge and simulated search.
-            prompt = f"""You are a JSON-generating AI that acts as a business analyst.
-            
-            Company to research: {company_name}
-
-            Instructions:
-            1. Return ONLY a valid JSON object.
-            2. Provide a brief analysis of the company's recent activities, culture, and industry positioning.
-            3. Your information should be concise and useful for someone preparing for an interview or outreach.
-            4. Keep the exact same structure and keys as the example below.
-            
-            Return this exact JSON structure (with your analysis):
-            {{
-                "company_overview": "A brief, one-sentence description of the company.",
-                "recent_news": [
-                    "A recent news item or development.",
-                    "Another recent event or announcement."
-                ],
-                "company_culture": "A summary of the company's culture (e.g., fast-paced, collaborative, innovative).",
-                "industry_trends": [
-                    "A relevant trend in the company's industry.",
-                    "Another key trend affecting the company."
-                ]
-            }}"""
-            
-            response = model.generate_content(prompt)
-            logger.info(f"Raw Gemini response for company research: {response.text}")
-            
-            text = response.text.strip().replace('```json', '').replace('```', '').strip()
-            ai_analysis = json.loads(text)
-            logger.info("Successfully parsed Gemini response for company research as JSON")
-            return ai_analysis
+            entry, state = self.intel_store.get(company_name, force_refresh=bypass_cache)
+            logger.info(f"Company intel for {company_name} ({entry['company_key']}): {state}")
+            return entry["intel"], {
+                "cache_state": state,
+                "company_key": entry["company_key"],
+                "refreshed_at": datetime.fromtimestamp(entry["refreshed_at"]).isoformat()
+            }
             
         except Exception as e:
             logger.error(f"Error in AI analysis for company research: {str(e)}")
-            return self._get_mock_analysis(error=str(e))
+            return self._get_mock_analysis(error=str(e)), {"cache_state": "error"}
+    
+    def _fetch_company_intel(self, company_name: str) -> Dict[str, Any]:
+        """Ask Gemini about a company. Raises on failure so errors never reach the intel store."""
+        # In a real scenario, this would also involve web scraping or news API calls.
+        # For this version, we rely on the LLM's knowledge and simulated search.
+        prompt = f"""You are a JSON-generating AI that acts as a business analyst.
+        
+        Company to research: {company_name}
+
+        Instructions:
+        1. Return ONLY a valid JSON object.
+        2. Provide a brief analysis of the company's recent activities, culture, and industry positioning.
+        3. Your information should be concise and useful for someone preparing for an interview or outreach.
+        4. Keep the exact same structure and keys as the example below.
+        
+        Return this exact JSON structure (with your analysis):
+        {{
+            "company_overview": "A brief, one-sentence description of the company.",
+            "recent_news": [
+                "A recent news item or development.",
+                "Another recent event or announcement."
+            ],
+            "company_culture": "A summary of the company's culture (e.g., fast-paced, collaborative, innovative).",
+            "industry_trends": [
+                "A relevant trend in the company's industry.",
+                "Another key trend affecting the company."
+            ]
+        }}"""
+        
+        # The intel store keeps the result and decides freshness, so skip the response cache entirely
+        ai_analysis = model.generate_json(prompt, use_cache=False)
+        logger.info("Successfully parsed Gemini response for company research as JSON")
+        return ai_analysis
+    
+    def warm(self, company_names: List[str], bypass_cache: bool = False) -> Dict[str, Any]:
+        """Preload the intel store for many companies, fetching only those not already fresh."""
+        return self.intel_store.warm(company_names, force_refresh=bypass_cache, max_workers=WARM_CONCURRENCY)
     
     def _get_mock_analysis(self, error: str = None) -> Dict[str, Any]:
         """Return mock analysis data for a company."""
@@ -131,7 +144,8 @@ class CompanyResearchAgent:
                 raise ValueError("company_name is required")
             
             logger.info(f"Starting company research for: {company_name}")
-            company_intelligence = self.research_company(company_name)
+            bypass_cache = task_data.get('input', {}).get('bypass_cache', False)
+            company_intelligence, cache_metadata = self.research_company(company_name, bypass_cache)
             
             result = {
                 "task_id": task_data.get('task_id', f"company_research_{datetime.now().timestamp()}"),
@@ -141,7 +155,8 @@ class CompanyResearchAgent:
                     "company_intelligence": company_intelligence,
                     "research_metadata": {
                         "processed_at": datetime.now().isoformat(),
-                        "data_sources": ["simulated_llm_knowledge"]
+                        "data_sources": ["simulated_llm_knowledge"],
+                        **cache_metadata
                     }
                 },
                 "next_suggested_agents": ["connection_mapping_agent", "email_composition_agent"]
@@ -161,6 +176,11 @@ agent = CompanyResearchAgent()
 def health_check():
     return jsonify({"status": "healthy", "agent": "Company Research Agent"})
 
+@app.route('/metrics', methods=['GET'])
+def gemini_metrics():
+    """Per-call Gemini metrics and company intel store counters for this worker process."""
+    return jsonify({**gemini_client.metrics(), "company_intel": agent.intel_store.stats})
+
 @app.route('/agent-card', methods=['GET'])
 def get_agent_card():
     return jsonify(agent.agent_card)
@@ -181,6 +201,29 @@ def research_company_endpoint():
         logger.error(f"Error in research-company endpoint: {str(e)}")
         return jsonify({"status": "error", "error": str(e)}), 500
 
+@app.route('/warm', methods=['POST'])
+def warm_endpoint():
+    """Preload company intelligence for a list of companies."""
+    try:
+        task_data = request.get_json() or {}
+        companies = task_data.get('input', {}).get('company_names')
+        if not companies or not isinstance(companies, list):
+            return jsonify({"status": "error", "error": "company_names must be a non-empty list"}), 400
+        if not GEMINI_API_KEY:
+            return jsonify({"status": "error", "error": "Gemini API key is not configured"}), 503
+        
+        results = agent.warm(companies, task_data.get('input', {}).get('bypass_cache', False))
+        failed = [name for name, result in results.items() if result["state"] == "error"]
+        return jsonify({
+            "task_id": task_data.get('task_id', f"company_warm_{datetime.now().timestamp()}"),
+            "status": "completed" if not failed else "partial",
+            "output": {"results": results, "failed": failed}
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in warm endpoint: {str(e)}")
+        return jsonify({"status": "error", "error": str(e)}), 500
+
 if __name__ == '__main__':
     debug_mode = FLASK_ENV == 'development'
     logger.info(f"Starting Company Research Agent v{AGENT_VERSION} on port {PORT}")
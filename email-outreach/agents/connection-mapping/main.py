@@ -4,13 +4,13 @@ Finds connections between a user's context and a target's profile.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai
 import json
 import os
 from datetime import datetime
 import logging
 from typing import Dict, Any
 from dotenv import load_dotenv
+from shared.utils import gemini_client
 
 load_dotenv()
 logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
@@ -25,8 +25,7 @@ PORT = int(os.getenv('PORT', 8083))
 AGENT_VERSION = os.getenv('AGENT_VERSION', '1.0.0')
 
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-1.5-flash')
+    model = gemini_client.get_model('models/gemini-1.5-flash', agent='connection-mapping', api_key=GEMINI_API_KEY)
     logger.info("Gemini API configured for Connection Mapping Agent")
 else:
     logger.warning("No Gemini API key found - Connection Mapping Agent will use mock data")
@@ -44,7 +43,8 @@ class ConnectionMappingAgent:
                 "type": "object",
                 "properties": {
                     "user_context": {"type": "object", "description": "Structured data about the user."},
-                    "target_profile_analysis": {"type": "object", "description": "Structured data about the target."}
+                    "target_profile_analysis": {"type": "object", "description": "Structured data about the target."},
+                    "bypass_cache": {"type": "boolean", "default": False, "description": "Skip the cached Gemini response"}
                 },
                 "required": ["user_context", "target_profile_analysis"]
             },
@@ -57,7 +57,8 @@ class ConnectionMappingAgent:
             }
         }
     
-    def map_connections(self, user_context: Dict[str, Any], target_profile: Dict[str, Any]) -> Dict[str, Any]:
+    def map_connections(self, user_context: Dict[str, Any], target_profile: Dict[str, Any],
+                        bypass_cache: bool = False) -> Dict[str, Any]:
         """Use Gemini to find connections between two profiles."""
         if not GEMINI_API_KEY:
             return self._get_mock_analysis()
@@ -96,11 +97,7 @@ class ConnectionMappingAgent:
                 ]
             }}"""
             
-            response = model.generate_content(prompt)
-            logger.info(f"Raw Gemini response for connection mapping: {response.text}")
-            
-            text = response.text.strip().replace('```json', '').replace('```', '').strip()
-            ai_analysis = json.loads(text)
+            ai_analysis = model.generate_json(prompt, bypass_cache=bypass_cache)
             logger.info("Successfully parsed Gemini response for connection mapping")
             return ai_analysis
             
@@ -128,7 +125,8 @@ class ConnectionMappingAgent:
                 raise ValueError("user_context and target_profile_analysis are required")
             
             logger.info("Starting connection mapping")
-            connections = self.map_connections(user_context, target_profile)
+            bypass_cache = task_data.get('input', {}).get('bypass_cache', False)
+            connections = self.map_connections(user_context, target_profile, bypass_cache)
             
             result = {
                 "task_id": task_data.get('task_id', f"conn_map_{datetime.now().timestamp()}"),
@@ -154,6 +152,11 @@ agent = ConnectionMappingAgent()
 def health_check():
     return jsonify({"status": "healthy", "agent": "Connection Mapping Agent"})
 
+@app.route('/metrics', methods=['GET'])
+def gemini_metrics():
+    """Per-call Gemini metrics for this worker process."""
+    return jsonify(gemini_client.metrics())
+
 @app.route('/agent-card', methods=['GET'])
 def get_agent_card():
     return jsonify(agent.agent_card)
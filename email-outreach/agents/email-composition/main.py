@@ -4,13 +4,13 @@ Drafts personalized outreach emails based on collected intelligence.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai
 import json
 import os
 from datetime import datetime
 import logging
 from typing import Dict, Any
 from dotenv import load_dotenv
+from shared.utils import gemini_client
 
 load_dotenv()
 logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
@@ -25,8 +25,7 @@ PORT = int(os.getenv('PORT', 8084))
 AGENT_VERSION = os.getenv('AGENT_VERSION', '1.0.0')
 
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-1.5-flash')
+    model = gemini_client.get_model('models/gemini-1.5-flash', agent='email-composition', api_key=GEMINI_API_KEY)
     logger.info("Gemini API configured for Email Composition Agent")
 else:
     logger.warning("No Gemini API key found - Email Composition Agent will use mock data")
@@ -46,7 +45,8 @@ class EmailCompositionAgent:
                     "user_context": {"type": "object"},
                     "company_intelligence": {"type": "object"},
                     "connection_points": {"type": "array"},
-                    "email_tone": {"type": "string", "enum": ["formal", "casual", "enthusiastic"], "default": "formal"}
+                    "email_tone": {"type": "string", "enum": ["formal", "casual", "enthusiastic"], "default": "formal"},
+                    "bypass_cache": {"type": "boolean", "default": False, "description": "Skip the cached Gemini response"}
                 },
                 "required": ["user_context", "company_intelligence", "connection_points"]
             },
@@ -59,7 +59,8 @@ class EmailCompositionAgent:
             }
         }
     
-    def compose_email(self, user_context: Dict[str, Any], company_intel: Dict[str, Any], connections: list, tone: str) -> Dict[str, Any]:
+    def compose_email(self, user_context: Dict[str, Any], company_intel: Dict[str, Any], connections: list, tone: str,
+                      bypass_cache: bool = False) -> Dict[str, Any]:
         """Use Gemini to draft a personalized email."""
         if not GEMINI_API_KEY:
             return self._get_mock_draft()
@@ -92,11 +93,7 @@ class EmailCompositionAgent:
                 "call_to_action": "e.g., 'Would you be open to a brief chat next week?'"
             }}"""
             
-            response = model.generate_content(prompt)
-            logger.info(f"Raw Gemini response for email composition: {response.text}")
-            
-            text = response.text.strip().replace('```json', '').replace('```', '').strip()
-            ai_draft = json.loads(text)
+            ai_draft = model.generate_json(prompt, bypass_cache=bypass_cache)
             logger.info("Successfully parsed Gemini response for email composition")
             return ai_draft
             
@@ -121,9 +118,10 @@ class EmailCompositionAgent:
             company_intel = task_data['input']['company_intelligence']
             connections = task_data['input']['connection_points']
             tone = task_data['input'].get('email_tone', 'formal')
+            bypass_cache = task_data['input'].get('bypass_cache', False)
             
             logger.info("Starting email composition")
-            draft = self.compose_email(user_context, company_intel, connections, tone)
+            draft = self.compose_email(user_context, company_intel, connections, tone, bypass_cache)
             
             result = {
                 "task_id": task_data.get('task_id', f"email_comp_{datetime.now().timestamp()}"),
@@ -149,6 +147,11 @@ agent = EmailCompositionAgent()
 def health_check():
     return jsonify({"status": "healthy", "agent": "Email Composition Agent"})
 
+@app.route('/metrics', methods=['GET'])
+def gemini_metrics():
+    """Per-call Gemini metrics for this worker process."""
+    return jsonify(gemini_client.metrics())
+
 @app.route('/agent-card', methods=['GET'])
 def get_agent_card():
     return jsonify(agent.agent_card)
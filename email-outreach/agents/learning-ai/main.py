@@ -4,13 +4,13 @@ Analyzes email campaign performance to provide optimization insights.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai
 import json
 import os
 from datetime import datetime
 import logging
 from typing import Dict, Any
 from dotenv import load_dotenv
+from shared.utils import gemini_client
 
 load_dotenv()
 logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
@@ -23,8 +23,7 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 PORT = int(os.getenv('PORT', 8086))
 
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-1.5-flash')
+    model = gemini_client.get_model('models/gemini-1.5-flash', agent='learning-ai', api_key=GEMINI_API_KEY)
 
 class LearningAiAgent:
     """A2A agent for analyzing campaign performance."""
@@ -36,13 +35,13 @@ class LearningAiAgent:
             "capabilities": ["performance_analysis", "pattern_recognition", "success_prediction"],
             "input_schema": {
                 "type": "object",
-                "properties": {"interaction_data": {"type": "array"}},
+                "properties": {"interaction_data": {"type": "array"}, "bypass_cache": {"type": "boolean", "default": False}},
                 "required": ["interaction_data"]
             },
             "output_schema": {"type": "object"}
         }
     
-    def analyze_performance(self, interaction_data: list) -> Dict[str, Any]:
+    def analyze_performance(self, interaction_data: list, bypass_cache: bool = False) -> Dict[str, Any]:
         """Use Gemini to analyze email performance data."""
         if not GEMINI_API_KEY:
             return {"insights": ["Enable Gemini API for analysis."]}
@@ -68,8 +67,7 @@ class LearningAiAgent:
                 ]
             }}"""
             
-            response = model.generate_content(prompt)
-            return json.loads(response.text.strip().replace('```json', '').replace('```', '').strip())
+            return model.generate_json(prompt, bypass_cache=bypass_cache)
             
         except Exception as e:
             return {"error": str(e)}
@@ -78,7 +76,7 @@ class LearningAiAgent:
         """Main A2A task processing method."""
         try:
             interactions = task_data['input']['interaction_data']
-            analysis = self.analyze_performance(interactions)
+            analysis = self.analyze_performance(interactions, task_data['input'].get('bypass_cache', False))
             return {"status": "completed", "output": analysis}
         except Exception as e:
             return {"status": "error", "error": str(e)}
@@ -90,5 +88,10 @@ def analyze_performance_endpoint():
     result = agent.process_task(request.get_json())
     return jsonify(result)
 
+@app.route('/metrics', methods=['GET'])
+def gemini_metrics():
+    """Per-call Gemini metrics for this worker process."""
+    return jsonify(gemini_client.metrics())
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=PORT)
@@ -0,0 +1,215 @@
+"""
+Benchmark LinkedIn profile extraction on saved HTML pages.
+
+Compares the previous path (a full html.parser BeautifulSoup tree searched with
+find()) against the targeted extractor's backends, checks that they extract the
+same fields, and reports parse time, Python allocations and peak RSS growth. Peak
+RSS is measured in a fresh process per path so lxml's C allocations are included.
+
+    python benchmark_extraction.py --fixtures saved_pages/
+    python benchmark_extraction.py --pages 5 --save-fixtures saved_pages/
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from profile_extractor import extract_profile, lxml
+
+WORDS = ["data", "platform", "team", "growth", "cloud", "product", "lead", "build", "scale", "customer",
+         "engineering", "strategy", "research", "design", "launch", "ops", "analytics", "mentor"]
+
+
+def legacy_extract(html):
+    """The extraction main.py did before profile_extractor: full tree, three find() calls."""
+    soup = BeautifulSoup(html, 'html.parser')
+    name_element = soup.find('h1', class_='text-heading-xlarge')
+    headline_element = soup.find('div', class_='text-body-medium')
+    about_section = soup.find('section', id='about')
+    about_text_element = about_section.find('div', class_='inline-show-more-text') if about_section else None
+    return {
+        "name": name_element.get_text(strip=True) if name_element else "N/A",
+        "headline": headline_element.get_text(strip=True) if headline_element else "N/A",
+        "about": about_text_element.get_text(strip=True) if about_text_element else "N/A",
+    }
+
+
+PATHS = {
+    "html.parser full tree": legacy_extract,
+    "soup + strainer (html.parser)": lambda html: extract_profile(html, backend="soup", parser="html.parser"),
+}
+if lxml is not None:
+    PATHS["soup + strainer (lxml)"] = lambda html: extract_profile(html, backend="soup", parser="lxml")
+    PATHS["lxml + xpath"] = lambda html: extract_profile(html, backend="lxml")
+
+
+def synthetic_page(seed, feed_posts=150):
+    """
+    A page shaped like a logged-out LinkedIn profile: large JSON and CSS blobs in the
+    head, a wide nav, the profile sections, and an activity feed that dominates the size.
+    """
+    rng = random.Random(seed)
+
+    def words(count):
+        return " ".join(rng.choice(WORDS) for _ in range(count))
+
+    def entry(bold, normal, dates):
+        return (f'<li class="artdeco-list__item pvs-list__item--line-separated"><div class="display-flex">'
+                f'<span class="mr1 t-bold"><span aria-hidden="true">{bold}</span>'
+                f'<span class="visually-hidden">{bold}</span></span>'
+                f'<span class="t-14 t-normal"><span aria-hidden="true">{normal}</span>'
+                f'<span class="visually-hidden">{normal}</span></span>'
+                f'<span class="t-14 t-normal t-black--light"><span aria-hidden="true">{dates}</span>'
+                f'<span class="visually-hidden">{dates}</span></span></div>'
+                f'<div class="inline-show-more-text">{words(40)}</div></li>')
+
+    parts = ['<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Profile | LinkedIn</title>']
+    parts += [f'<script type="application/json" id="bpr-guid-{i}">'
+              f'{json.dumps({f"k{key}": words(30) for key in range(40)})}</script>' for i in range(15)]
+    parts.append("<style>" + "".join(f".c{i}{{margin:{i}px}}" for i in range(2000)) + "</style></head><body>")
+    parts.append('<nav class="global-nav">' + "".join(
+        f'<a class="global-nav__link" href="/feed/{i}"><span>{words(2)}</span></a>' for i in range(300)) + "</nav><main>")
+    parts.append(f'<section class="artdeco-card pv-top-card"><div class="ph5"><div class="mt2">'
+                 f'<h1 class="text-heading-xlarge inline t-24 v-align-middle break-words">Person {seed}</h1>'
+                 f'<div class="text-body-medium break-words">{words(6).title()}</div></div></div></section>')
+    parts.append(f'<section id="about" class="artdeco-card"><h2>About</h2>'
+                 f'<div class="display-flex inline-show-more-text full-width"><span aria-hidden="true">'
+                 f'{words(120)}</span></div></section>')
+    parts.append('<section id="experience" class="artdeco-card"><h2>Experience</h2><ul>' + "".join(
+        entry(words(3).title(), f"{words(1).title()} Inc", f"{2010 + i} - {2012 + i}") for i in range(8)) + "</ul></section>")
+    parts.append('<section id="education" class="artdeco-card"><h2>Education</h2><ul>' + "".join(
+        entry(f"{words(1).title()} University", f"BS, {words(2).title()}", f"{2004 + i} - {2008 + i}")
+        for i in range(3)) + "</ul></section>")
+    for _ in range(feed_posts):
+        parts.append('<div class="feed-shared-update-v2"><div class="update-components-text"><span dir="ltr">'
+                     + words(80) + "</span></div>" + "".join(
+                         f'<button class="artdeco-button artdeco-button--muted"><span>{words(1)}</span></button>'
+                         for _ in range(12)) + "</div>")
+    parts.append("</main></body></html>")
+    return "".join(parts)
+
+
+def load_pages(fixtures, pages, save_to=None):
+    paths = []
+    for fixture in fixtures:
+        paths += sorted(glob.glob(os.path.join(fixture, "*.html"))) if os.path.isdir(fixture) else [fixture]
+    if paths:
+        named = []
+        for path in paths:
+            with open(path, encoding="utf-8") as file:
+                named.append((os.path.basename(path), file.read()))
+        return named
+    named = [(f"synthetic_{seed}.html", synthetic_page(seed)) for seed in range(pages)]
+    if save_to:
+        os.makedirs(save_to, exist_ok=True)
+        for name, html in named:
+            with open(os.path.join(save_to, name), "w", encoding="utf-8") as file:
+                file.write(html)
+        print(f"Saved {len(named)} fixtures to {save_to}")
+    return named
+
+
+def normalized(profile):
+    return {key: " ".join(value.split()) if isinstance(value, str) else value for key, value in profile.items()}
+
+
+def check_agreement(pages):
+    """Every targeted path must match each other, and the legacy path on the fields it extracts."""
+    for name, html in pages:
+        results = {path: normalized(extract(html)) for path, extract in PATHS.items()}
+        legacy = results.pop("html.parser full tree")
+        reference_path, reference = next(iter(results.items()))
+        for path, result in results.items():
+            assert result == reference, f"{name}: {path} disagrees with {reference_path}"
+        for field, value in legacy.items():
+            # get_text(strip=True) glued adjacent strings; the extractor separates them with a space
+            assert value.replace(" ", "") == reference[field].replace(" ", ""), f"{name}: {field} differs from legacy"
+
+
+def reset_peak_rss():
+    """
+    Reset the kernel's RSS high-water mark (Linux 4.0+). A spawned child otherwise
+    inherits its parent's ru_maxrss across exec, hiding anything smaller.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss_growth(path, files):
+    """Peak RSS increase (MB) while running one path over saved pages, in this fresh process."""
+    pages = []
+    for file_path in files:
+        with open(file_path, encoding="utf-8") as file:
+            pages.append(file.read())
+    reset_peak_rss()
+    baseline = peak_rss_kb()
+    for html in pages:
+        PATHS[path](html)
+    return (peak_rss_kb() - baseline) / 1024
+
+
+def run_benchmark(pages, repeat):
+    check_agreement(pages)
+    size_kb = statistics.mean(len(html.encode("utf-8")) for _, html in pages) / 1024
+    print(f"Pages: {len(pages)}  mean size: {size_kb:.0f} KB  repeat: {repeat}")
+    print(f"\n{'path':<32}{'mean ms':>9}{'p50 ms':>9}{'speedup':>9}{'py alloc MB':>13}{'peak RSS MB':>13}")
+    context = multiprocessing.get_context("spawn")
+    workdir = tempfile.TemporaryDirectory()
+    files = []
+    for index, (_, html) in enumerate(pages):
+        files.append(os.path.join(workdir.name, f"{index}.html"))
+        with open(files[-1], "w", encoding="utf-8") as file:
+            file.write(html)
+    baseline_ms = None
+    for path, extract in PATHS.items():
+        timings = []
+        for _ in range(repeat):
+            for _, html in pages:
+                start = time.perf_counter()
+                extract(html)
+                timings.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        extract(pages[0][1])
+        allocated = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        with context.Pool(1) as pool:
+            rss = pool.apply(peak_rss_growth, (path, files))
+        mean_ms = statistics.mean(timings)
+        baseline_ms = baseline_ms or mean_ms
+        print(f"{path:<32}{mean_ms:>9.1f}{statistics.median(timings):>9.1f}{baseline_ms / mean_ms:>8.1f}x"
+              f"{allocated:>13.2f}{rss:>13.1f}")
+    workdir.cleanup()
+    print("\nSample extraction:", json.dumps(extract_profile(pages[0][1]), indent=2)[:600])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LinkedIn profile HTML extraction.")
+    parser.add_argument("--fixtures", nargs="*", default=[], help="Saved .html pages or directories of them")
+    parser.add_argument("--pages", type=int, default=5, help="Synthetic pages to generate when no fixtures are given")
+    parser.add_argument("--save-fixtures", help="Write the synthetic pages here for later runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(load_pages(args.fixtures, args.pages, args.save_fixtures), args.repeat)
@@ -3,34 +3,19 @@ Profile Analysis Agent - A2A Compatible
 Analyzes LinkedIn profiles and extracts structured data for email personalization
 """
 
-import sys
 import os
-from pathlib import Path
-
-# Add project root to the Python path to allow for shared module imports
-def find_project_root(marker=".git"):
-    """Finds the project root by searching upwards for a marker file or directory."""
-    current_path = Path(__file__).parent
-    for parent in [current_path] + list(current_path.parents):
-        if (parent / marker).exists():
-            return parent
-    raise FileNotFoundError(f"Project root marker '{marker}' not found.")
-
-project_root = find_project_root()
-if str(project_root) not in sys.path:
-    sys.path.insert(0, str(project_root))
-
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai  # Replace OpenAI with Gemini
 import requests
-from bs4 import BeautifulSoup
 import json
 from datetime import datetime
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from scraperapi_sdk import ScraperAPIClient
-from shared.utils import config # Now this will work correctly
+from shared.utils import config
+from shared.utils import gemini_client
+from profile_extractor import extract_profile
+from profile_cache import ProfileCache, canonicalize_linkedin_url, content_hash
 
 # The config loader runs automatically when imported, so no need to call load_dotenv()
 
@@ -52,8 +37,7 @@ ANALYSIS_DEPTH = os.getenv('ANALYSIS_DEPTH', 'basic')
 
 # Configure Gemini
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-2.5-flash')
+    model = gemini_client.get_model('models/gemini-2.5-flash', agent='profile-analysis', api_key=GEMINI_API_KEY)
     logger.info("Gemini API configured successfully")
 else:
     logger.warning("No Gemini API key found - using mock data")
@@ -76,7 +60,9 @@ class ProfileAnalysisAgent:
                 "type": "object",
                 "properties": {
                     "linkedin_url": {"type": "string", "description": "LinkedIn profile URL"},
-                    "analysis_depth": {"type": "string", "enum": ["basic", "detailed"], "default": "basic"}
+                    "analysis_depth": {"type": "string", "enum": ["basic", "detailed"], "default": "basic"},
+                    "bypass_cache": {"type": "boolean", "default": False, "description": "Skip the cached Gemini response"},
+                    "force_refresh": {"type": "boolean", "default": False, "description": "Re-scrape even if the cached profile is fresh"}
                 },
                 "required": ["linkedin_url"]
             },
@@ -89,10 +75,11 @@ class ProfileAnalysisAgent:
                 }
             }
         }
+        self.profile_cache = ProfileCache()
     
     def extract_linkedin_profile(self, linkedin_url: str) -> Dict[str, Any]:
         """
-        Extract profile data from LinkedIn URL using ScraperAPI and BeautifulSoup.
+        Extract profile data from LinkedIn URL using ScraperAPI and the targeted profile extractor.
         """
         if not SCRAPER_API_KEY:
             logger.warning("No ScraperAPI key found - LinkedIn scraping may be unreliable.")
@@ -105,34 +92,13 @@ class ProfileAnalysisAgent:
             response_text = response.text
 
         try:
-            soup = BeautifulSoup(response_text, 'html.parser')
-
-            # Updated selectors for LinkedIn public profiles (as of late 2025)
-            name_element = soup.find('h1', class_='text-heading-xlarge')
-            name = name_element.get_text(strip=True) if name_element else "N/A"
-
-            headline_element = soup.find('div', class_='text-body-medium')
-            headline = headline_element.get_text(strip=True) if headline_element else "N/A"
+            profile = extract_profile(response_text)
             
-            # The 'about' section is often within a div with the id 'about'
-            # This is a more complex selector to get the text directly following the 'About' h2
-            about_section = soup.find('section', id='about')
-            about = "N/A"
-            if about_section:
-                about_text_element = about_section.find('div', class_='inline-show-more-text')
-                if about_text_element:
-                    about = about_text_element.get_text(strip=True)
-
             profile_data = {
                 "url": linkedin_url,
                 "extraction_method": "scraping",
                 "extracted_at": datetime.now().isoformat(),
-                "profile": {
-                    "name": name,
-                    "headline": headline,
-                    "about": about,
-                    # Add more fields as needed
-                }
+                "profile": profile
             }
             
             logger.info(f"Successfully extracted profile data for: {linkedin_url}")
@@ -142,7 +108,7 @@ class ProfileAnalysisAgent:
             logger.error(f"Error parsing profile from {linkedin_url}: {str(e)}")
             raise
     
-    def analyze_profile_with_ai(self, profile_data: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze_profile_with_ai(self, profile_data: Dict[str, Any], bypass_cache: bool = False) -> Dict[str, Any]:
         """Use Gemini to analyze the profile and extract insights for personalization"""
         
         if not GEMINI_API_KEY:
@@ -154,6 +120,8 @@ class ProfileAnalysisAgent:
 Name: {profile_data['profile'].get('name', 'Unknown')}
 Headline: {profile_data['profile'].get('headline', 'No headline')}
 About: {profile_data['profile'].get('about', 'No about section')}
+Experience: {'; '.join(f"{job['title']} at {job['company']} ({job['dates']})" for job in profile_data['profile'].get('experience', [])) or 'Not listed'}
+Education: {'; '.join(f"{school['school']}, {school['degree']} ({school['dates']})" for school in profile_data['profile'].get('education', [])) or 'Not listed'}
 """
             
             # AI prompt for profile analysis
@@ -189,29 +157,14 @@ Return this exact JSON structure (with your analysis):
     ]
 }}""".format(profile=profile_summary)
             
-            # Get response from Gemini
-            response = model.generate_content(prompt)
-            
-            # Log the raw response for debugging
-            logger.info(f"Raw Gemini response: {response.text}")
-            
-            # Clean and parse the response
+            # Get the parsed response from Gemini (or the shared response cache)
             try:
-                # Clean the response
-                text = response.text.strip()
-                # Remove any markdown code block markers
-                if text.startswith('```'):
-                    text = text.split('```')[1]
-                if text.startswith('json'):
-                    text = text[4:]
-                text = text.strip()
-                
-                # Try to parse as JSON
-                ai_analysis = json.loads(text)
+                ai_analysis = model.generate_json(prompt, bypass_cache=bypass_cache)
                 logger.info("Successfully parsed Gemini response as JSON")
                 return ai_analysis
                 
             except json.JSONDecodeError as e:
+                text = e.doc
                 logger.error(f"Invalid JSON from Gemini: {text}")
                 logger.error(f"JSON Error: {str(e)}")
                 return {
@@ -262,23 +215,57 @@ Return this exact JSON structure (with your analysis):
             analysis["ai_analysis_error"] = error
         return analysis
     
+    def analyze_with_cache(self, linkedin_url: str, force_refresh: bool = False,
+                           bypass_cache: bool = False) -> Tuple[Dict[str, Any], Dict[str, Any], str, float]:
+        """
+        Profile data and AI analysis for a canonical LinkedIn URL, via the profile cache.
+        Returns (profile_data, ai_analysis, cache_state, last_scraped) where cache_state is
+        "fresh" (no scrape), "unchanged" (re-scraped, analysis reused), "scraped", or
+        "stale_fallback" (the re-scrape failed, so the stale entry is served).
+        """
+        cached = self.profile_cache.get(linkedin_url)
+        if cached and cached["fresh"] and not force_refresh:
+            logger.info(f"Serving cached profile for: {linkedin_url}")
+            return cached["profile_data"], cached["ai_analysis"], "fresh", cached["last_scraped"]
+        
+        # Step 1: Extract profile data
+        logger.info(f"Starting profile extraction for: {linkedin_url}")
+        try:
+            profile_data = self.extract_linkedin_profile(linkedin_url)
+        except Exception as e:
+            if not cached:
+                raise
+            logger.warning(f"Re-scrape failed for {linkedin_url}, serving cached profile: {str(e)}")
+            return cached["profile_data"], cached["ai_analysis"], "stale_fallback", cached["last_scraped"]
+        
+        # Step 2: AI analysis, skipped when the profile has not changed since the last scrape
+        if cached and cached["content_hash"] == content_hash(profile_data) and not bypass_cache:
+            logger.info("Profile unchanged since last scrape; reusing AI analysis")
+            ai_analysis, cache_state = cached["ai_analysis"], "unchanged"
+        else:
+            logger.info("Starting AI analysis of profile")
+            ai_analysis, cache_state = self.analyze_profile_with_ai(profile_data, bypass_cache), "scraped"
+        
+        # Blocked scrapes and fallback analyses are not worth keeping
+        if GEMINI_API_KEY and profile_data['profile']['name'] != "N/A" and "ai_analysis_error" not in ai_analysis:
+            self.profile_cache.put(linkedin_url, profile_data, ai_analysis)
+        return profile_data, ai_analysis, cache_state, datetime.now().timestamp()
+    
     def process_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Main A2A task processing method"""
         try:
             # Extract input parameters
             linkedin_url = task_data.get('input', {}).get('linkedin_url')
             analysis_depth = task_data.get('input', {}).get('analysis_depth', 'basic')
+            bypass_cache = task_data.get('input', {}).get('bypass_cache', False)
+            force_refresh = task_data.get('input', {}).get('force_refresh', False)
             
             if not linkedin_url:
                 raise ValueError("linkedin_url is required")
+            linkedin_url = canonicalize_linkedin_url(linkedin_url)
             
-            # Step 1: Extract profile data
-            logger.info(f"Starting profile extraction for: {linkedin_url}")
-            profile_data = self.extract_linkedin_profile(linkedin_url)
-            
-            # Step 2: AI analysis
-            logger.info("Starting AI analysis of profile")
-            ai_analysis = self.analyze_profile_with_ai(profile_data)
+            profile_data, ai_analysis, cache_state, last_scraped = self.analyze_with_cache(
+                linkedin_url, force_refresh, bypass_cache)
             
             # Step 3: Prepare A2A response
             result = {
@@ -291,6 +278,8 @@ Return this exact JSON structure (with your analysis):
                     "extraction_metadata": {
                         "processed_at": datetime.now().isoformat(),
                         "analysis_depth": analysis_depth,
+                        "cache_state": cache_state,
+                        "last_scraped": datetime.fromtimestamp(last_scraped).isoformat(),
                         "data_quality": "high" if profile_data['profile']['name'] != "N/A" else "scraped"
                     }
                 },
@@ -329,6 +318,11 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/metrics', methods=['GET'])
+def gemini_metrics():
+    """Per-call Gemini metrics for this worker process."""
+    return jsonify(gemini_client.metrics())
+
 @app.route('/agent-card', methods=['GET'])
 def get_agent_card():
     """Return A2A agent card for capability discovery"""
@@ -0,0 +1,119 @@
+"""
+Persistent cache of scraped LinkedIn profiles and their AI analysis.
+
+Scraping through ScraperAPI is the slowest and most expensive step of the agent,
+so each profile is stored under its canonical URL in a SQLite file shared by every
+gunicorn worker, together with a hash of the parsed profile. A profile older than
+the freshness window is re-scraped, but when its content hash is unchanged the
+stored analysis is reused instead of asking Gemini again.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("PROFILE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "launch_kit_profile_cache.sqlite3"))
+FRESH_SECONDS = int(os.getenv("PROFILE_CACHE_FRESH_SECONDS", 3 * 24 * 3600))
+
+# Profile, company and school pages; anything after the slug (/details/..., /recent-activity) is the same entity
+LINKEDIN_PATH = re.compile(r"^/(in|pub|company|school)/([^/]+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    url TEXT PRIMARY KEY,
+    profile_data TEXT NOT NULL,
+    ai_analysis TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    last_scraped REAL NOT NULL
+);
+"""
+
+
+def canonicalize_linkedin_url(url):
+    """
+    One URL per LinkedIn profile: https://www.linkedin.com/in/<slug>, whatever the
+    scheme, country or mobile subdomain, case, query string or trailing path.
+    Non-LinkedIn URLs are returned stripped of query and fragment.
+    """
+    url = url.strip()
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    host = parts.netloc.lower().split("@")[-1].split(":")[0]
+    path = unquote(parts.path).rstrip("/")
+    if host == "linkedin.com" or host.endswith(".linkedin.com"):
+        match = LINKEDIN_PATH.match(path)
+        if match:
+            return f"https://www.linkedin.com/{match.group(1).lower()}/{match.group(2).lower()}"
+        return f"https://www.linkedin.com{path.lower()}"
+    return f"{parts.scheme.lower()}://{host}{path}"
+
+
+def content_hash(profile_data):
+    """
+    Hash of the scraped profile fields, ignoring per-scrape metadata such as extracted_at.
+    """
+    profile = profile_data.get("profile", {})
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ProfileCache:
+    """
+    Scraped profiles and their analysis keyed by canonical LinkedIn URL. SQLite
+    errors are logged and treated as misses so the agent can always fall back to
+    scraping.
+    """
+
+    def __init__(self, path=CACHE_PATH, fresh_seconds=FRESH_SECONDS):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, url):
+        """
+        The cached entry for `url` whatever its age, with a "fresh" flag, or None.
+        """
+        if not self.path:
+            return None
+        try:
+            row = self._connection().execute(
+                "SELECT profile_data, ai_analysis, content_hash, last_scraped FROM profiles WHERE url = ?",
+                (canonicalize_linkedin_url(url),)).fetchone()
+        except sqlite3.Error as error:
+            logger.warning(f"Profile cache read failed: {error}")
+            return None
+        if row is None:
+            return None
+        return {
+            "profile_data": json.loads(row[0]),
+            "ai_analysis": json.loads(row[1]),
+            "content_hash": row[2],
+            "last_scraped": row[3],
+            "fresh": time.time() - row[3] < self.fresh_seconds,
+        }
+
+    def put(self, url, profile_data, ai_analysis):
+        if not self.path:
+            return
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?)",
+                (canonicalize_linkedin_url(url), json.dumps(profile_data), json.dumps(ai_analysis),
+                 content_hash(profile_data), time.time()))
+        except sqlite3.Error as error:
+            logger.warning(f"Profile cache write failed: {error}")
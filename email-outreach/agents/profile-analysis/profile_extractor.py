@@ -0,0 +1,183 @@
+"""
+Targeted field extraction for LinkedIn profile pages.
+
+Profile pages are several hundred KB, almost all of it scripts, navigation and
+feed markup we never read, so instead of building a full BeautifulSoup tree this
+module only materializes the elements named in SELECTORS and LIST_SELECTORS:
+
+- "lxml" (default when lxml is installed): lxml's C parser plus compiled XPath.
+- "soup": BeautifulSoup with a SoupStrainer that drops every top-level subtree
+  the selectors cannot match, so only those few elements become Python objects.
+
+Each selector is a list of descendant steps (tag, attribute, value). A "class"
+step matches one class token, any other attribute must equal the value, and an
+attribute of None matches the tag alone. The same table drives both backends.
+"""
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # fall back to BeautifulSoup with the pure-Python parser
+    lxml = None
+
+BACKENDS = ("lxml", "soup")
+DEFAULT_BACKEND = os.getenv("PROFILE_HTML_BACKEND", "lxml" if lxml else "soup")
+MISSING = "N/A"
+
+# Updated selectors for LinkedIn public profiles (as of late 2025)
+SELECTORS = {
+    "name": [("h1", "class", "text-heading-xlarge")],
+    "headline": [("div", "class", "text-body-medium")],
+    "about": [("section", "id", "about"), ("div", "class", "inline-show-more-text")],
+}
+# Repeated entries: `items` selects each entry, `fields` are relative to one entry.
+# LinkedIn repeats visible text in a visually-hidden span, so read the aria-hidden copy.
+VISIBLE = ("span", "aria-hidden", "true")
+LIST_SELECTORS = {
+    "experience": {
+        "items": [("section", "id", "experience"), ("li", "class", "artdeco-list__item")],
+        "fields": {
+            "title": [("span", "class", "t-bold"), VISIBLE],
+            "company": [("span", "class", "t-normal"), VISIBLE],
+            "dates": [("span", "class", "t-black--light"), VISIBLE],
+        },
+    },
+    "education": {
+        "items": [("section", "id", "education"), ("li", "class", "artdeco-list__item")],
+        "fields": {
+            "school": [("span", "class", "t-bold"), VISIBLE],
+            "degree": [("span", "class", "t-normal"), VISIBLE],
+            "dates": [("span", "class", "t-black--light"), VISIBLE],
+        },
+    },
+}
+
+
+def _xpath_step(step):
+    tag, attribute, value = step
+    if attribute is None:
+        return tag
+    if attribute == "class":
+        return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {value} ')]"
+    return f"{tag}[@{attribute}='{value}']"
+
+
+def to_xpath(steps, relative=False):
+    return ("." if relative else "") + "".join("//" + _xpath_step(step) for step in steps)
+
+
+def _css_step(step):
+    tag, attribute, value = step
+    if attribute is None:
+        return tag
+    if attribute == "class":
+        return f"{tag}.{value}"
+    if attribute == "id":
+        return f"{tag}#{value}"
+    return f'{tag}[{attribute}="{value}"]'
+
+
+def to_css(steps):
+    return " ".join(_css_step(step) for step in steps)
+
+
+def _matches(step, name, attrs):
+    tag, attribute, value = step
+    if name != tag:
+        return False
+    if attribute is None:
+        return True
+    actual = attrs.get(attribute)
+    if attribute == "class":
+        tokens = actual.split() if isinstance(actual, str) else actual or []
+        return value in tokens
+    return actual == value
+
+
+# Every extracted element lives inside one of these, so nothing else needs parsing
+ROOT_STEPS = [steps[0] for steps in SELECTORS.values()] + [spec["items"][0] for spec in LIST_SELECTORS.values()]
+
+
+class _RootStrainer(SoupStrainer):
+    """
+    Keep only subtrees whose root matches a first selector step. beautifulsoup4
+    4.12 consults search_tag() while parsing; 4.13+ consults allow_tag_creation()
+    and allow_string_creation().
+    """
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return any(_matches(step, markup_name, dict(markup_attrs or {})) for step in ROOT_STEPS)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.search_tag(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+
+def _text(value):
+    return " ".join(value.split())
+
+
+def _compile():
+    return {
+        "fields": {field: etree.XPath(to_xpath(steps)) for field, steps in SELECTORS.items()},
+        "lists": {
+            section: (etree.XPath(to_xpath(spec["items"])),
+                      {field: etree.XPath(to_xpath(steps, relative=True)) for field, steps in spec["fields"].items()})
+            for section, spec in LIST_SELECTORS.items()
+        },
+    }
+
+
+XPATHS = _compile() if lxml else None
+TEXT_NODES = etree.XPath(".//text()") if lxml else None
+
+
+def _extract_lxml(html):
+    try:
+        root = lxml.html.fromstring(html)
+    except etree.ParserError:  # empty document: every field is missing, as with BeautifulSoup
+        root = lxml.html.fromstring("<html></html>")
+
+    def first_text(xpath, element):
+        found = xpath(element)
+        # Text nodes joined with spaces, like get_text(" "), so both backends agree
+        return _text(" ".join(TEXT_NODES(found[0]))) if found else MISSING
+
+    profile = {field: first_text(xpath, root) for field, xpath in XPATHS["fields"].items()}
+    for section, (items, fields) in XPATHS["lists"].items():
+        profile[section] = [{field: first_text(xpath, item) for field, xpath in fields.items()}
+                            for item in items(root)]
+    return profile
+
+
+def _extract_soup(html, parser="html.parser"):
+    soup = BeautifulSoup(html, parser, parse_only=_RootStrainer())
+
+    def first_text(steps, element):
+        found = element.select_one(to_css(steps))
+        return _text(found.get_text(" ")) if found else MISSING
+
+    profile = {field: first_text(steps, soup) for field, steps in SELECTORS.items()}
+    for section, spec in LIST_SELECTORS.items():
+        profile[section] = [{field: first_text(steps, item) for field, steps in spec["fields"].items()}
+                            for item in soup.select(to_css(spec["items"]))]
+    return profile
+
+
+def extract_profile(html, backend=None, parser=None):
+    """
+    Fields named in SELECTORS (missing ones are "N/A") plus a list of entries for
+    each section in LIST_SELECTORS. `parser` is the BeautifulSoup tree builder used
+    by the "soup" backend, lxml's when installed.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "lxml" and lxml is not None:
+        return _extract_lxml(html)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown HTML backend {backend!r}; expected one of {BACKENDS}")
+    return _extract_soup(html, parser or ("lxml" if lxml is not None else "html.parser"))
@@ -4,13 +4,13 @@ Reviews and scores draft emails for quality and personalization.
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai
 import json
 import os
 from datetime import datetime
 import logging
 from typing import Dict, Any
 from dotenv import load_dotenv
+from shared.utils import gemini_client
 
 load_dotenv()
 logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
@@ -25,8 +25,7 @@ PORT = int(os.getenv('PORT', 8085))
 AGENT_VERSION = os.getenv('AGENT_VERSION', '1.0.0')
 
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-1.5-flash')
+    model = gemini_client.get_model('models/gemini-1.5-flash', agent='quality-assurance', api_key=GEMINI_API_KEY)
     logger.info("Gemini API configured for Quality Assurance Agent")
 else:
     logger.warning("No Gemini API key found - Quality Assurance Agent will use mock data")
@@ -42,7 +41,7 @@ class QualityAssuranceAgent:
             "capabilities": ["content_review", "personalization_check", "spam_score_analysis"],
             "input_schema": {
                 "type": "object",
-                "properties": {"draft_email": {"type": "object"}},
+                "properties": {"draft_email": {"type": "object"}, "bypass_cache": {"type": "boolean", "default": False}},
                 "required": ["draft_email"]
             },
             "output_schema": {
@@ -55,7 +54,7 @@ class QualityAssuranceAgent:
             }
         }
     
-    def review_email(self, draft_email: Dict[str, Any]) -> Dict[str, Any]:
+    def review_email(self, draft_email: Dict[str, Any], bypass_cache: bool = False) -> Dict[str, Any]:
         """Use Gemini to review an email draft."""
         if not GEMINI_API_KEY:
             return self._get_mock_review()
@@ -83,9 +82,7 @@ class QualityAssuranceAgent:
                 "spam_trigger_warning": false
             }}"""
             
-            response = model.generate_content(prompt)
-            text = response.text.strip().replace('```json', '').replace('```', '').strip()
-            return json.loads(text)
+            return model.generate_json(prompt, bypass_cache=bypass_cache)
             
         except Exception as e:
             logger.error(f"Error in AI analysis for QA: {str(e)}")
@@ -101,7 +98,7 @@ class QualityAssuranceAgent:
         """Main A2A task processing method."""
         try:
             draft_email = task_data['input']['draft_email']
-            review = self.review_email(draft_email)
+            review = self.review_email(draft_email, task_data['input'].get('bypass_cache', False))
             
             result = {
                 "task_id": task_data.get('task_id', f"qa_{datetime.now().timestamp()}"),
@@ -119,6 +116,11 @@ agent = QualityAssuranceAgent()
 def health_check():
     return jsonify({"status": "healthy", "agent": "Quality Assurance Agent"})
 
+@app.route('/metrics', methods=['GET'])
+def gemini_metrics():
+    """Per-call Gemini metrics for this worker process."""
+    return jsonify(gemini_client.metrics())
+
 @app.route('/agent-card', methods=['GET'])
 def get_agent_card():
     return jsonify(agent.agent_card)
@@ -4,13 +4,12 @@ Analyzes the user's resume and LinkedIn profile to understand their background a
 """
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai
-import json
 import os
 from datetime import datetime
 import logging
 from typing import Dict, Any
 from dotenv import load_dotenv
+from shared.utils import gemini_client
 import fitz  # PyMuPDF
 
 # Load environment variables
@@ -32,8 +31,7 @@ AGENT_VERSION = os.getenv('AGENT_VERSION', '1.0.0')
 
 # Configure Gemini
 if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-1.5-flash')
+    model = gemini_client.get_model('models/gemini-1.5-flash', agent='user-context', api_key=GEMINI_API_KEY)
     logger.info("Gemini API configured successfully for User Context Agent")
 else:
     logger.warning("No Gemini API key found - User Context Agent will use mock data")
@@ -56,7 +54,8 @@ class UserContextAgent:
                 "type": "object",
                 "properties": {
                     "user_linkedin_url": {"type": "string", "description": "URL of the user's LinkedIn profile"},
-                    "user_resume_file_path": {"type": "string", "description": "Local file path to the user's PDF resume"}
+                    "user_resume_file_path": {"type": "string", "description": "Local file path to the user's PDF resume"},
+                    "bypass_cache": {"type": "boolean", "default": False, "description": "Skip the cached Gemini response"}
                 },
                 "required": ["user_linkedin_url", "user_resume_file_path"]
             },
@@ -83,7 +82,7 @@ class UserContextAgent:
             logger.error(f"Error reading or parsing PDF at {file_path}: {str(e)}")
             raise
 
-    def analyze_user_context(self, linkedin_url: str, resume_text: str) -> Dict[str, Any]:
+    def analyze_user_context(self, linkedin_url: str, resume_text: str, bypass_cache: bool = False) -> Dict[str, Any]:
         """Use Gemini to analyze the user's data and create a context profile."""
         
         if not GEMINI_API_KEY:
@@ -116,12 +115,7 @@ class UserContextAgent:
                 ]
             }}"""
             
-            response = model.generate_content(prompt)
-            logger.info(f"Raw Gemini response for user context: {response.text}")
-            
-            # Clean and parse the response
-            text = response.text.strip().replace('```json', '').replace('```', '').strip()
-            ai_analysis = json.loads(text)
+            ai_analysis = model.generate_json(prompt, bypass_cache=bypass_cache)
             logger.info("Successfully parsed Gemini response for user context as JSON")
             return ai_analysis
             
@@ -155,7 +149,8 @@ class UserContextAgent:
             resume_text = self._extract_text_from_pdf(resume_path)
             
             logger.info(f"Starting user context analysis for: {linkedin_url}")
-            user_context = self.analyze_user_context(linkedin_url, resume_text)
+            bypass_cache = task_data.get('input', {}).get('bypass_cache', False)
+            user_context = self.analyze_user_context(linkedin_url, resume_text, bypass_cache)
             
             result = {
                 "task_id": task_data.get('task_id', f"user_context_{datetime.now().timestamp()}"),
@@ -194,6 +189,11 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route('/metrics', methods=['GET'])
+def gemini_metrics():
+    """Per-call Gemini metrics for this worker process."""
+    return jsonify(gemini_client.metrics())
+
 @app.route('/agent-card', methods=['GET'])
 def get_agent_card():
     return jsonify(agent.agent_card)
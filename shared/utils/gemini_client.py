@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import deque
+
+import google.generativeai as genai
+
+from shared.utils import llm_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so the rate limit stays per process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# One quota is shared by every agent and gunicorn worker using the same API key, so
+# the defaults are deliberately conservative; tune them to the project's quota.
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 4))
+REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", 60))
+BURST = int(os.getenv("GEMINI_BURST", 10))
+# Token bucket state shared by all processes on this host; empty = per process only
+RATE_LIMIT_FILE = os.getenv("GEMINI_RATE_LIMIT_FILE",
+                            os.path.join(tempfile.gettempdir(), "launch_kit_gemini_bucket.json"))
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 4))
+BACKOFF_SECONDS = float(os.getenv("GEMINI_BACKOFF_SECONDS", 1.0))
+BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", 30.0))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RECENT_CALLS = 100
+
+
+class TokenBucket:
+    """
+    In-process token bucket: `rate` tokens per second, holding at most `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, updated):
+        """
+        Refill, then take one token if available. Returns (tokens, updated, seconds to wait).
+        """
+        now = time.time()
+        tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, 0.0
+        return tokens, now, (1 - tokens) / self.rate
+
+    def acquire(self):
+        """
+        Block until a token is available; returns the seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._tokens, self._updated, wait = self._take(self._tokens, self._updated)
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a small JSON file guarded by flock, so every
+    worker process and agent service on the host draws from the same bucket.
+    """
+
+    def __init__(self, path, rate, capacity):
+        super().__init__(rate, capacity)
+        self.path = path
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock, open(self.path, "a+") as file:
+                fcntl.flock(file, fcntl.LOCK_EX)
+                try:
+                    file.seek(0)
+                    try:
+                        state = json.loads(file.read() or "{}")
+                    except ValueError:
+                        state = {}
+                    tokens, updated, wait = self._take(state.get("tokens", float(self.capacity)),
+                                                       state.get("updated", time.time()))
+                    file.seek(0)
+                    file.truncate()
+                    file.write(json.dumps({"tokens": tokens, "updated": updated}))
+                    file.flush()
+                finally:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+def make_rate_limiter(rate_per_minute=REQUESTS_PER_MINUTE, burst=BURST, path=RATE_LIMIT_FILE):
+    """
+    A FileTokenBucket when a shared file is configured and flock is available,
+    otherwise an in-process TokenBucket.
+    """
+    rate = rate_per_minute / 60.0
+    if path and fcntl is not None:
+        return FileTokenBucket(path, rate, burst)
+    return TokenBucket(rate, burst)
+
+
+class GeminiMetrics:
+    """
+    Per-call metrics, aggregated per (agent, model), plus the most recent calls.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.recent = deque(maxlen=RECENT_CALLS)
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        key = f"{call['agent']}:{call['model']}"
+        with self._lock:
+            totals = self.totals.setdefault(key, {
+                "calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "rate_limited": 0,
+                "latency_seconds": 0.0, "wait_seconds": 0.0, "prompt_tokens": 0, "response_tokens": 0,
+            })
+            totals["calls"] += 1
+            totals["succeeded" if call["status"] == "ok" else "failed"] += 1
+            totals["retries"] += call["attempts"] - 1
+            totals["rate_limited"] += call["rate_limited"]
+            totals["latency_seconds"] += call["latency_seconds"]
+            totals["wait_seconds"] += call["wait_seconds"]
+            totals["prompt_tokens"] += call.get("prompt_tokens") or 0
+            totals["response_tokens"] += call.get("response_tokens") or 0
+            self.recent.append(call)
+
+    def snapshot(self):
+        with self._lock:
+            return {"totals": {key: dict(value) for key, value in self.totals.items()},
+                    "recent": list(self.recent)}
+
+
+def status_code(error):
+    """
+    HTTP status of a Gemini API error (google.api_core exceptions carry `code`), or None.
+    """
+    code = getattr(error, "code", None)
+    code = getattr(code, "value", code)  # http.HTTPStatus -> int
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(error):
+    return status_code(error) in RETRYABLE_STATUS_CODES
+
+
+def parse_json(text):
+    """
+    Parse a JSON response, dropping the ```json fences Gemini likes to add.
+    """
+    return json.loads(text.strip().replace("```json", "").replace("```", "").strip())
+
+
+def backoff_delay(attempt, base=BACKOFF_SECONDS, cap=BACKOFF_MAX_SECONDS):
+    """
+    Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)].
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class GeminiClient:
+    """
+    Drop-in for genai.GenerativeModel.generate_content() that every agent shares.
+
+    Each call waits for a slot under the process-wide concurrency limit and a token
+    from the (host-wide) rate limiter, then retries 429 and 5xx responses with
+    jittered exponential backoff. Every call is recorded in `metrics`.
+    """
+
+    def __init__(self, model, agent, semaphore, rate_limiter, metrics, cache=None, max_retries=MAX_RETRIES):
+        self.model_name = model
+        self.agent = agent
+        self.model = genai.GenerativeModel(model)
+        self.semaphore = semaphore
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.cache = cache
+        self.max_retries = max_retries
+
+    def generate_json(self, prompt, bypass_cache=False, use_cache=True, **kwargs):
+        """
+        generate_content() parsed with parse_json(), served from the shared response
+        cache when the same model has answered the same prompt within this agent's
+        TTL. `bypass_cache` skips the lookup but still stores the fresh answer;
+        `use_cache=False` neither reads nor writes the cache, for callers that keep
+        the result themselves. Unparseable responses raise json.JSONDecodeError and
+        are never cached.
+        """
+        cache = self.cache if use_cache else None
+        ttl = llm_cache.ttl_for(self.agent)
+        key = llm_cache.prompt_hash(prompt, **kwargs)
+        if cache is not None and not bypass_cache:
+            cached = cache.get(self.model_name, key, ttl)
+            if cached is not None:
+                logger.info(f"LLM cache hit agent={self.agent} model={self.model_name}")
+                return cached
+        response = self.generate_content(prompt, **kwargs)
+        logger.debug(f"Raw Gemini response for {self.agent}: {response.text}")
+        value = parse_json(response.text)
+        if cache is not None and ttl > 0:
+            cache.put(self.model_name, key, value, agent=self.agent)
+        return value
+
+    def generate_content(self, prompt, **kwargs):
+        call = {"agent": self.agent, "model": self.model_name, "started_at": time.time(), "attempts": 0,
+                "rate_limited": 0, "wait_seconds": 0.0, "prompt_chars": len(str(prompt))}
+        start = time.perf_counter()
+        try:
+            response = self._generate_with_retry(prompt, call, **kwargs)
+        except Exception as error:
+            call.update(status="error", error=str(error), status_code=status_code(error))
+            raise
+        else:
+            call["status"] = "ok"
+            usage = getattr(response, "usage_metadata", None)
+            call["prompt_tokens"] = getattr(usage, "prompt_token_count", None)
+            call["response_tokens"] = getattr(usage, "candidates_token_count", None)
+            return response
+        finally:
+            call["latency_seconds"] = time.perf_counter() - start
+            self.metrics.record(call)
+            logger.info(f"Gemini call agent={self.agent} model={self.model_name} status={call['status']} "
+                        f"attempts={call['attempts']} wait={call['wait_seconds']:.2f}s "
+                        f"latency={call['latency_seconds']:.2f}s")
+
+    def _generate_with_retry(self, prompt, call, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            wait_start = time.perf_counter()
+            with self.semaphore:
+                self.rate_limiter.acquire()
+                call["wait_seconds"] += time.perf_counter() - wait_start
+                call["attempts"] += 1
+                try:
+                    return self.model.generate_content(prompt, **kwargs)
+                except Exception as error:
+                    if not is_retryable(error) or attempt == self.max_retries:
+                        raise
+                    call["rate_limited"] += status_code(error) == 429
+                    delay = backoff_delay(attempt)
+                    logger.warning(f"Gemini {status_code(error)} for {self.agent}; retry {attempt + 1} "
+                                   f"of {self.max_retries} in {delay:.1f}s")
+            # Back off outside the semaphore so the slot is free for other calls
+            time.sleep(delay)
+
+
+_semaphore = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_rate_limiter = make_rate_limiter()
+_metrics = GeminiMetrics()
+_cache = llm_cache.LLMCache()
+_clients = {}
+_clients_lock = threading.Lock()
+_configured_key = None
+
+
+def get_model(model, agent, api_key=None):
+    """
+    The shared GeminiClient for `model`, configuring the API key on first use.
+    Clients are pooled per (model, agent) and share one limiter and metrics store.
+    """
+    global _configured_key
+    with _clients_lock:
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if api_key != _configured_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+        key = (model, agent)
+        if key not in _clients:
+            _clients[key] = GeminiClient(model, agent, _semaphore, _rate_limiter, _metrics, _cache)
+        return _clients[key]
+
+
+def metrics():
+    """
+    Metrics for every Gemini call this process has made, plus response cache counters.
+    """
+    return {**_metrics.snapshot(), "cache": _cache.stats()}
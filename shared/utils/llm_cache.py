@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# One file for every agent and gunicorn worker on the host; empty disables caching
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "launch_kit_llm_cache.sqlite3"))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+DEFAULT_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 3600))
+# How long each agent's answers stay valid, overridable with LLM_CACHE_TTL_<AGENT>
+# (e.g. LLM_CACHE_TTL_COMPANY_RESEARCH=3600). Company facts move slowly; campaign
+# performance data is appended to constantly.
+AGENT_TTL_SECONDS = {
+    "company-research": 7 * 24 * 3600,
+    "profile-analysis": 3 * 24 * 3600,
+    "user-context": 7 * 24 * 3600,
+    "connection-mapping": 24 * 3600,
+    "email-composition": 24 * 3600,
+    "quality-assurance": 7 * 24 * 3600,
+    "learning-ai": 3600,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    agent TEXT,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (model, prompt_hash)
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def ttl_for(agent):
+    """
+    Cache lifetime in seconds for `agent`'s responses; 0 disables caching.
+    """
+    override = os.getenv(f"LLM_CACHE_TTL_{agent.upper().replace('-', '_')}") if agent else None
+    if override is not None:
+        return int(override)
+    return AGENT_TTL_SECONDS.get(agent, DEFAULT_TTL_SECONDS)
+
+
+def prompt_hash(prompt, **kwargs):
+    """
+    SHA-256 of the prompt plus any generation arguments that change the answer.
+    """
+    payload = str(prompt)
+    if kwargs:
+        payload += "\0" + json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Exact-match cache of parsed LLM responses, keyed by (model, prompt hash), in a
+    SQLite file shared across processes. Entries expire after the caller's TTL and
+    the least recently used are evicted beyond `max_entries`. Any SQLite error is
+    logged and treated as a miss, so a broken cache never fails a request.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, model, key, ttl):
+        """
+        The cached value for (model, key) if younger than `ttl` seconds, else None.
+        """
+        if not self.path or ttl <= 0:
+            return None
+        now = time.time()
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT value FROM responses WHERE model = ? AND prompt_hash = ? AND created_at > ?",
+                (model, key, now - ttl)).fetchone()
+            if row is not None:
+                connection.execute("UPDATE responses SET accessed_at = ? WHERE model = ? AND prompt_hash = ?",
+                                   (now, model, key))
+        except sqlite3.Error as error:
+            logger.warning(f"LLM cache read failed: {error}")
+            self._count("errors")
+            return None
+        self._count("misses" if row is None else "hits")
+        return None if row is None else json.loads(row[0])
+
+    def put(self, model, key, value, agent=None):
+        """
+        Store a JSON-serializable value, then evict least recently used entries.
+        """
+        if not self.path:
+            return
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                               (model, key, agent, json.dumps(value), now, now))
+            connection.execute(
+                "DELETE FROM responses WHERE rowid IN "
+                "(SELECT rowid FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+        except sqlite3.Error as error:
+            logger.warning(f"LLM cache write failed: {error}")
+            self._count("errors")
+            return
+        self._count("writes")
+
+    def stats(self):
+        with self._lock:
+            return {"path": self.path, "hits": self.hits, "misses": self.misses,
+                    "writes": self.writes, "errors": self.errors}